@@ -0,0 +1,132 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import (
+    AuthenticationFailed,
+    InvalidToken,
+)
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.revocation import revoked_tokens
+
+
+User = get_user_model()
+
+CLAIMS = ("username", "role", "is_staff", "is_active")
+ISSUED_AT_CLAIM = "iat"
+CLAIMS_CACHE_KEY = "auth:user:{}"
+USER_NOT_FOUND = "Пользователь не найден."
+USER_INACTIVE = "Пользователь неактивен."
+NO_USER_ID = "Токен не содержит идентификатор пользователя."
+TOKEN_REVOKED = "Токен отозван."
+
+
+def user_claims(user):
+    return {claim: getattr(user, claim) for claim in CLAIMS}
+
+
+def cache_user_claims(user, changed_at):
+    """
+    Кладет в кеш актуальные данные пользователя вместе с временем
+    изменения, после которого они прочитаны. Запись из кеша
+    используется, только пока claims пользователя не менялись снова.
+    """
+    cache.set(
+        CLAIMS_CACHE_KEY.format(user.pk),
+        {"claims": user_claims(user), "changed_at": changed_at},
+        settings.USER_CLAIMS_CACHE_TIMEOUT,
+    )
+
+
+class RoleAccessToken(AccessToken):
+    """Токен доступа с ролью пользователя в claims."""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token.payload.update(user_claims(user))
+        # Дробная метка времени: изменения роли в ту же секунду, что и
+        # выдача токена, тоже делают токен устаревшим.
+        token[ISSUED_AT_CLAIM] = token.current_time.timestamp()
+        return token
+
+
+class RoleTokenUser(TokenUser):
+    """
+    Пользователь без обращения к БД, собранный из claims токена
+    или из кеша. Повторяет свойства ролей модели User.
+    """
+
+    @cached_property
+    def role(self):
+        return self.token.get("role", User.USER)
+
+    @property
+    def is_user(self):
+        return self.role == User.USER
+
+    @property
+    def is_admin(self):
+        return self.role == User.ADMIN or self.is_staff
+
+    @property
+    def is_moderator(self):
+        return self.role == User.MODERATOR
+
+
+class RoleJWTAuthentication(JWTAuthentication):
+    """
+    Аутентификация по JWT без запроса пользователя из БД.
+
+    Роль берется из claims токена, пока роль пользователя не менялась
+    после выдачи токена: изменения хранятся в таблице ClaimsChange,
+    а процесс держит их копию в памяти (см. api.revocation). Иначе,
+    а также для токенов без claims, данные пользователя берутся из кеша,
+    если они прочитаны после последнего изменения, и только при промахе -
+    из БД.
+    """
+
+    def get_validated_token(self, raw_token):
+        validated_token = super().get_validated_token(raw_token)
+        if validated_token.get(api_settings.JTI_CLAIM) in revoked_tokens:
+            raise InvalidToken(TOKEN_REVOKED)
+        return validated_token
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            raise InvalidToken(NO_USER_ID)
+        changed_at = revoked_tokens.claims_changed_at(user_id)
+        if all(claim in validated_token for claim in CLAIMS) and (
+            changed_at is None
+            or validated_token.get(ISSUED_AT_CLAIM, 0) >= changed_at
+        ):
+            claims = validated_token.payload
+        else:
+            cached = cache.get(CLAIMS_CACHE_KEY.format(user_id))
+            if cached is not None and cached["changed_at"] == changed_at:
+                claims = cached["claims"]
+            else:
+                claims = self.load_claims(user_id, changed_at)
+        if not claims["is_active"]:
+            raise AuthenticationFailed(USER_INACTIVE, code="user_inactive")
+        return RoleTokenUser({**claims, api_settings.USER_ID_CLAIM: user_id})
+
+    def load_claims(self, user_id, changed_at):
+        claims = (
+            User.objects.filter(**{api_settings.USER_ID_FIELD: user_id})
+            .values(*CLAIMS)
+            .first()
+        )
+        if claims is None:
+            raise AuthenticationFailed(USER_NOT_FOUND, code="user_not_found")
+        cache.set(
+            CLAIMS_CACHE_KEY.format(user_id),
+            {"claims": claims, "changed_at": changed_at},
+            settings.USER_CLAIMS_CACHE_TIMEOUT,
+        )
+        return claims
@@ -0,0 +1,310 @@
+import hashlib
+import threading
+import time
+from datetime import timedelta
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils import timezone
+from django.utils.http import http_date, parse_http_date_safe
+from rest_framework.response import Response
+
+from reviews.models import CacheInvalidation, User
+
+
+RESPONSE_CACHE_KEY = "response:{role}:{versions}:{digest}"
+ANONYMOUS_ROLE = "anonymous"
+ALL_NAMESPACES = "all"
+VALIDATOR_HEADERS = ("ETag", "Last-Modified")
+# Сколько хранятся сбросы: за это время их прочитают все процессы.
+INVALIDATION_RETENTION = timedelta(hours=1)
+
+
+class NamespaceVersions:
+    """
+    Версии пространств имен кеша ответов, общие для всех процессов.
+
+    Сброс пространства - строка CacheInvalidation, а версия
+    пространства - id его последнего сброса (0, если сбросов не было).
+    Процесс учитывает свои сбросы сразу, а сбросы других процессов,
+    в том числе команд управления, дочитывает из таблицы раз в
+    CACHE_INVALIDATION_CHECK_INTERVAL секунд одним запросом
+    по первичному ключу (id больше последнего прочитанного). Сами ответы
+    хранятся в кеше процесса и с новой версией просто перестают
+    находиться.
+
+    Раз в INVALIDATION_RETENTION пространства, которые не сбрасывались
+    с прошлой чистки, удаляются из словаря версий, а их наибольшая
+    версия становится версией по умолчанию (`floor`). Так версии
+    не уменьшаются и старые ответы не находятся снова, а словарь не
+    растет с количеством пространств вида `reviews:{title_id}`; ценой
+    становится промах кеша для таких пространств раз в период чистки.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.versions = {}
+        self.last_id = 0
+        self.max_version = 0
+        self.floor = 0
+        self.pruned_version = 0
+        # Кеш процесса при запуске пуст, поэтому первая проверка
+        # может подождать интервал.
+        self.checked_at = self.pruned_at = time.monotonic()
+
+    def check_is_due(self):
+        return (
+            time.monotonic() - self.checked_at
+            >= settings.CACHE_INVALIDATION_CHECK_INTERVAL
+        )
+
+    def check(self):
+        with self.lock:
+            if not self.check_is_due():
+                return
+            for pk, namespace in (
+                CacheInvalidation.objects.filter(id__gt=self.last_id)
+                .order_by("id")
+                .values_list("id", "namespace")
+            ):
+                self.apply(namespace, pk)
+                self.last_id = pk
+            self.checked_at = time.monotonic()
+            if (
+                self.checked_at - self.pruned_at
+                >= INVALIDATION_RETENTION.total_seconds()
+            ):
+                self.prune()
+
+    def prune(self):
+        """Убирает версии пространств, не сбрасывавшихся с прошлой чистки."""
+        for name, version in list(self.versions.items()):
+            if version <= self.pruned_version:
+                self.floor = max(self.floor, self.versions.pop(name))
+        self.pruned_version = self.max_version
+        self.pruned_at = self.checked_at
+
+    def apply(self, namespace, version):
+        self.versions[namespace] = max(
+            version, self.versions.get(namespace, self.floor)
+        )
+        self.max_version = max(self.max_version, version)
+
+    def get(self, namespaces):
+        if self.check_is_due():
+            self.check()
+        return [self.versions.get(name, self.floor) for name in namespaces]
+
+    def bump(self, namespaces):
+        for name in namespaces:
+            self.apply(
+                name, CacheInvalidation.objects.create(namespace=name).pk
+            )
+        CacheInvalidation.objects.filter(
+            created_at__lt=timezone.now() - INVALIDATION_RETENTION
+        ).delete()
+
+
+cache_versions = NamespaceVersions()
+
+
+def namespace_versions(namespaces):
+    """Текущие версии пространств имен кеша."""
+    return cache_versions.get(namespaces)
+
+
+def bump_namespaces(*namespaces):
+    """
+    Делает недействительными ответы из пространств имен во всех
+    процессах после фиксации транзакции, чтобы в кеш не попали данные
+    до изменения.
+    """
+    transaction.on_commit(lambda: cache_versions.bump(namespaces))
+
+
+class CachedListMixin:
+    """
+    Кеширует ответы на GET-запросы списка вьюсета.
+
+    Ключ состоит из роли пользователя, версий пространств имен
+    из `cache_namespaces` и хеша полного адреса (со схемой и хостом,
+    которые попадают в ссылки пагинации) с отсортированными параметрами.
+    Сигналы моделей сбрасывают пространства при записи, поэтому
+    старые ответы просто перестают находиться и вытесняются по таймауту.
+    """
+
+    cache_namespaces = ()
+
+    def get_cache_namespaces(self):
+        return (ALL_NAMESPACES,) + tuple(
+            name.format(**self.kwargs) for name in self.cache_namespaces
+        )
+
+    def get_cache_key(self, request):
+        if not request.user.is_authenticated:
+            role = ANONYMOUS_ROLE
+        elif request.user.is_admin:
+            role = User.ADMIN
+        else:
+            role = request.user.role
+        query = urlencode(sorted(request.query_params.lists()), doseq=True)
+        url = request.build_absolute_uri(request.path)
+        return RESPONSE_CACHE_KEY.format(
+            role=role,
+            versions=".".join(
+                str(version)
+                for version in namespace_versions(self.get_cache_namespaces())
+            ),
+            digest=hashlib.md5(f"{url}?{query}".encode()).hexdigest(),
+        )
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        key = self.get_cache_key(request)
+        cached = cache.get(key)
+        if cached is not None:
+            data, headers = cached
+            not_modified = get_conditional_response(
+                request,
+                etag=headers.get("ETag"),
+                last_modified=parse_http_date_safe(
+                    headers.get("Last-Modified")
+                ),
+            )
+            return not_modified or Response(data, headers=headers)
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            headers = {
+                header: response[header]
+                for header in VALIDATOR_HEADERS
+                if response.has_header(header)
+            }
+            cache.set(
+                key, (response.data, headers), settings.RESPONSE_CACHE_TIMEOUT
+            )
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+
+class CachedResponseMixin(CachedListMixin):
+    """Кеширует ответы на GET-запросы списка и объекта вьюсета."""
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+
+def is_conditional(request):
+    return (
+        "HTTP_IF_NONE_MATCH" in request.META
+        or "HTTP_IF_MODIFIED_SINCE" in request.META
+    )
+
+
+class ConditionalGetMixin:
+    """
+    Отдает заголовки ETag и Last-Modified и отвечает 304 Not Modified
+    на условные GET-запросы, не выполняя основной запрос и сериализацию.
+
+    Версия объекта - его поле `updated_at` из `get_version_queryset()`.
+    Версия списка - счетчик `list_version_field` в строке родительского
+    объекта из `get_list_version_queryset()`, который сигналы увеличивают
+    при каждой записи в список, вместе с `updated_at` родителя: сохранение
+    родителя с устаревшим значением счетчика все равно дает новую версию.
+    Массовые загрузки сигналов не отправляют и учитываются через версию
+    пространства ALL_NAMESPACES. Обе версии читаются одним запросом
+    по первичному ключу. Для списка Last-Modified не отдается.
+    """
+
+    conditional_list = True
+    list_version_field = None
+
+    def get_version_queryset(self):
+        return self.get_serializer_class().Meta.model.objects.all()
+
+    def get_list_version_queryset(self):
+        raise NotImplementedError
+
+    def get_object(self):
+        obj = super().get_object()
+        self.object_updated_at = obj.updated_at
+        return obj
+
+    def object_version(self):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        return (
+            self.get_version_queryset()
+            .filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+            .order_by()
+            .values_list("updated_at", flat=True)
+            .first()
+        )
+
+    def list_version(self):
+        version = (
+            self.get_list_version_queryset()
+            .values_list(self.list_version_field, "updated_at")
+            .first()
+        )
+        if version is None:
+            return None
+        (bulk_version,) = namespace_versions((ALL_NAMESPACES,))
+        return f"{version[0]}:{version[1].isoformat()}:{bulk_version}"
+
+    def get_validators(self, request, version, updated_at=None):
+        digest = hashlib.md5(
+            f"{version}|{request.get_full_path()}".encode()
+        ).hexdigest()
+        # Слабый ETag: данные одни, а оформление зависит от рендерера.
+        etag = f'W/"{digest}"'
+        if updated_at is None:
+            return etag, None
+        return etag, int(updated_at.timestamp())
+
+    def with_validators(self, response, etag, last_modified):
+        if response.status_code == 200:
+            response["ETag"] = etag
+            if last_modified is not None:
+                response["Last-Modified"] = http_date(last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        version = self.conditional_list and self.list_version()
+        if not version:
+            return super().list(request, *args, **kwargs)
+        etag, _ = self.get_validators(request, version)
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            return not_modified
+        response = super().list(request, *args, **kwargs)
+        return self.with_validators(response, etag, None)
+
+    def retrieve(self, request, *args, **kwargs):
+        if is_conditional(request):
+            updated_at = self.object_version()
+            if updated_at is not None:
+                etag, last_modified = self.get_validators(
+                    request, updated_at.isoformat(), updated_at
+                )
+                not_modified = get_conditional_response(
+                    request, etag=etag, last_modified=last_modified
+                )
+                if not_modified is not None:
+                    return not_modified
+        response = super().retrieve(request, *args, **kwargs)
+        if response.status_code != 200:
+            return response
+        return self.with_validators(
+            response,
+            *self.get_validators(
+                request,
+                self.object_updated_at.isoformat(),
+                self.object_updated_at,
+            ),
+        )
@@ -0,0 +1,60 @@
+import sys
+
+from rest_framework import filters
+from rest_framework.settings import api_settings
+
+from reviews.search import normalize
+
+
+def prefix_upper_bound(prefix):
+    """Наименьшая строка больше всех строк, начинающихся с `prefix`."""
+    for index in range(len(prefix) - 1, -1, -1):
+        if ord(prefix[index]) < sys.maxunicode:
+            return prefix[:index] + chr(ord(prefix[index]) + 1)
+    return None
+
+
+class PrefixSearchFilter(filters.BaseFilterBackend):
+    """
+    Поиск по началу строки без учета регистра по нормализованному
+    столбцу из `prefix_search_field` вьюсета. Условие
+    `column >= prefix AND column < следующий префикс` использует обычный
+    индекс в любой БД, в отличие от icontains и LIKE без учета регистра.
+    """
+
+    search_param = api_settings.SEARCH_PARAM
+
+    def get_search_prefix(self, request):
+        value = request.query_params.get(self.search_param, "")
+        return normalize(" ".join(value.split()))
+
+    def filter_queryset(self, request, queryset, view):
+        field = getattr(view, "prefix_search_field", None)
+        prefix = self.get_search_prefix(request)
+        if field is None or not prefix:
+            return queryset
+        queryset = queryset.filter(**{f"{field}__gte": prefix})
+        upper_bound = prefix_upper_bound(prefix)
+        if upper_bound is None:
+            return queryset
+        return queryset.filter(**{f"{field}__lt": upper_bound})
+
+
+class StableOrderingFilter(filters.OrderingFilter):
+    """
+    Сортировка по `?ordering=` с первичным ключом в конце: страницы
+    не пересекаются при равных значениях. Ключ сортируется в том же
+    направлении, что и последнее поле, поэтому порядок совпадает
+    с индексом по этим полям (SQLite неявно добавляет rowid в конец
+    индекса) при чтении в любую сторону.
+    """
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if not ordering:
+            return ordering
+        pk_name = queryset.model._meta.pk.name
+        if ordering[-1].lstrip("-") in (pk_name, "pk"):
+            return ordering
+        direction = "-" if ordering[-1].startswith("-") else ""
+        return (*ordering, f"{direction}{pk_name}")
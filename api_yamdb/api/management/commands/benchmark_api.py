@@ -0,0 +1,408 @@
+import json
+import platform
+import re
+import subprocess
+import time
+import tracemalloc
+from io import StringIO
+
+import django
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import override_settings
+from django.test.utils import (
+    CaptureQueriesContext,
+    setup_test_environment,
+    teardown_test_environment,
+)
+from django.urls import URLResolver, get_resolver
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.authentication import RoleAccessToken
+from api.cache import ALL_NAMESPACES, bump_namespaces
+from reviews.models import Category, Genre, Review, Title, User
+
+
+API_PREFIX = "/api/"
+# Какой объект контекста подставлять в `pk` и `slug` маршрутов вьюсетов.
+LOOKUP_CONTEXT = {
+    "title": "title_id",
+    "review": "review_id",
+    "comment": "comment_id",
+    "genre": "genre_slug",
+    "categories": "category_slug",
+    "users": "username",
+}
+# Роли, от имени которых по очереди пробуется запрос к эндпоинту:
+# замеряется первая, получившая ответ 2xx.
+ROLES = (None, User.USER, User.ADMIN)
+PERCENTILES = (50, 90, 95, 99)
+MEMORY_RUNS = 3
+BENCH_CODE = "bench1"
+ROUTE_RESULT = (
+    "{name}: p50 {p50:.2f} мс, p95 {p95:.2f} мс, запросов к БД {queries}, "
+    "память {memory_kb:.0f} КБ"
+)
+RESULTS_SAVED = "Результаты сохранены в {}."
+REGRESSION = "{name}: {metric} {old} -> {new}"
+REGRESSIONS_FOUND = "Найдены регрессии относительно {}:\n{}"
+NO_REGRESSIONS = "Регрессий относительно {} не найдено."
+UNKNOWN_KWARG = "Не удалось подставить параметр {kwarg} в адрес {url}."
+NO_SUCCESS = "Эндпоинт {name} не ответил статусом 2xx ни для одной роли."
+
+
+def percentile(values, rank):
+    """Процентиль по методу ближайшего ранга."""
+    ordered = sorted(values)
+    index = max(0, -(-rank * len(ordered) // 100) - 1)
+    return ordered[index]
+
+
+def iter_patterns(patterns, prefix="/"):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from iter_patterns(
+                pattern.url_patterns, prefix + str(pattern.pattern)
+            )
+        else:
+            yield prefix + str(pattern.pattern), pattern
+
+
+def discover_routes():
+    """
+    Эндпоинты API из URL-резолвера: имя, метод и шаблон адреса.
+
+    Замеряются GET-запросы, а у представлений, которые принимают только
+    POST (авторизация), - POST-запросы. Варианты адресов с суффиксом
+    формата пропускаются.
+    """
+    routes = []
+    for regex, pattern in iter_patterns(get_resolver().url_patterns):
+        if not regex.startswith(API_PREFIX) or "<format>" in regex:
+            continue
+        url = re.sub(r"\(\?P<(\w+)>[^)]*\)", r"{\1}", regex)
+        url = url.replace("^", "").replace("$", "")
+        callback = pattern.callback
+        actions = getattr(callback, "actions", None)
+        if actions is not None:
+            methods = set(actions)
+        else:
+            methods = set(callback.cls.http_method_names)
+        if "get" in methods:
+            method = "get"
+        elif actions is None and "post" in methods:
+            method = "post"
+        else:
+            continue
+        name = pattern.name or "-".join(
+            part
+            for part in url.split("/")
+            if part and not part.startswith("{") and part not in ("api", "v1")
+        )
+        routes.append((name, method, url))
+    return routes
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ("git", "rev-parse", "HEAD"),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Замер времени ответа, количества запросов к БД и памяти "
+        "для эндпоинтов API на сгенерированных данных"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output",
+            default="benchmark.json",
+            help="Файл для сохранения результатов в формате JSON.",
+        )
+        parser.add_argument(
+            "--compare",
+            default=None,
+            help="Файл с результатами предыдущего запуска для сравнения.",
+        )
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.2,
+            help="Допустимый относительный рост медианы времени ответа.",
+        )
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=50,
+            help="Количество замеров для каждого эндпоинта.",
+        )
+        parser.add_argument(
+            "--warm-cache",
+            action="store_true",
+            help=(
+                "Отдавать повторные GET-запросы из кеша ответов. По "
+                "умолчанию кеш сбрасывается перед каждым замером."
+            ),
+        )
+        parser.add_argument(
+            "--in-place",
+            action="store_true",
+            help=(
+                "Использовать текущую базу данных вместо временной "
+                "тестовой базы."
+            ),
+        )
+        for name, default in (
+            ("users", 1000),
+            ("titles", 1000),
+            ("reviews", 20000),
+            ("comments", 20000),
+        ):
+            parser.add_argument(f"--{name}", type=int, default=default)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        if options["in_place"]:
+            results = self.run(options)
+        else:
+            setup_test_environment()
+            old_name = connection.creation.create_test_db(
+                verbosity=0, autoclobber=True
+            )
+            try:
+                results = self.run(options)
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+                teardown_test_environment()
+        with open(options["output"], "w", encoding="utf-8") as output:
+            json.dump(results, output, ensure_ascii=False, indent=2)
+        self.stdout.write(
+            self.style.SUCCESS(RESULTS_SAVED.format(options["output"]))
+        )
+        if options["compare"]:
+            self.compare(results, options["compare"], options["tolerance"])
+
+    def run(self, options):
+        dataset = {
+            name: options[name]
+            for name in ("users", "titles", "reviews", "comments", "seed")
+        }
+        call_command(
+            "generate_data",
+            *(f"--{name}={value}" for name, value in dataset.items()),
+            stdout=StringIO(),
+        )
+        context = self.context = self.prepare_context()
+        clients = self.prepare_clients()
+        routes = {}
+        # Опрос общих таблиц отзыва токенов и сброса кеша выполняется раз
+        # в интервал и случайно попадал бы в замеры отдельных запросов.
+        with override_settings(
+            TOKEN_REVOCATION_CHECK_INTERVAL=24 * 60 * 60,
+            CACHE_INVALIDATION_CHECK_INTERVAL=24 * 60 * 60,
+        ):
+            for name, method, url in discover_routes():
+                routes[name] = self.measure(
+                    name,
+                    method,
+                    self.format_url(name, url, context),
+                    clients,
+                    options["requests"],
+                    options["warm_cache"],
+                )
+            self.stdout.write(
+                ROUTE_RESULT.format(
+                    name=name,
+                    queries=routes[name]["queries"],
+                    memory_kb=routes[name]["memory_kb"],
+                    **routes[name]["latency_ms"],
+                )
+            )
+        return {
+            "meta": {
+                "created": timezone.now().isoformat(),
+                "commit": git_commit(),
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "database": connection.vendor,
+                "requests": options["requests"],
+                "warm_cache": options["warm_cache"],
+                "dataset": dataset,
+            },
+            "routes": routes,
+        }
+
+    def prepare_context(self):
+        """Выбирает самые нагруженные объекты для подстановки в адреса."""
+        title = Title.objects.order_by("-review_count").first()
+        review = (
+            Review.objects.filter(title=title)
+            .annotate(comments_count=Count("comments"))
+            .order_by("-comments_count")
+            .first()
+        )
+        comment = review.comments.first() if review else None
+        genre = Genre.objects.annotate(count=Count("titles")).order_by(
+            "-count"
+        )
+        category = Category.objects.annotate(count=Count("titles")).order_by(
+            "-count"
+        )
+        return {
+            "title_id": title.id if title else 0,
+            "review_id": review.id if review else 0,
+            "comment_id": comment.id if comment else 0,
+            "genre_slug": genre.values_list("slug", flat=True).first(),
+            "category_slug": category.values_list("slug", flat=True).first(),
+            "username": f"bench_{User.USER}",
+            "query": title.name[:3] if title else "",
+        }
+
+    def format_url(self, name, url, context):
+        kwargs = {}
+        for kwarg in re.findall(r"{(\w+)}", url):
+            key = kwarg
+            if kwarg not in context:
+                key = LOOKUP_CONTEXT.get(name.rsplit("-", 1)[0])
+            if key not in context:
+                raise CommandError(UNKNOWN_KWARG.format(kwarg=kwarg, url=url))
+            kwargs[kwarg] = context[key]
+        return url.format(**kwargs)
+
+    def prepare_clients(self):
+        clients = {None: APIClient()}
+        for role in (User.USER, User.ADMIN):
+            user, _ = User.objects.get_or_create(
+                username=f"bench_{role}",
+                defaults={
+                    "email": f"bench_{role}@yamdb.fake",
+                    "role": role,
+                    "confirmation_code": BENCH_CODE,
+                },
+            )
+            client = APIClient()
+            client.credentials(
+                HTTP_AUTHORIZATION=f"Bearer {RoleAccessToken.for_user(user)}"
+            )
+            clients[role] = client
+        return clients
+
+    def request_data(self, name, iteration):
+        if name == "suggest":
+            return {"q": self.context["query"]}
+        if name == "auth-signup":
+            return {
+                "username": f"bench_signup_{iteration}",
+                "email": f"bench_signup_{iteration}@yamdb.fake",
+            }
+        if name == "auth-token":
+            return {
+                "username": f"bench_{User.USER}",
+                "confirmation_code": BENCH_CODE,
+            }
+        return None
+
+    def request_headers(self, name):
+        if name == "auth-revoke":
+            # Каждый запрос отзывает свой токен, иначе следующие запросы
+            # с тем же токеном получали бы 401.
+            user = User.objects.get(username=f"bench_{User.USER}")
+            token = RoleAccessToken.for_user(user)
+            return {"HTTP_AUTHORIZATION": f"Bearer {token}"}
+        return {}
+
+    def measure(self, name, method, url, clients, requests, warm_cache):
+        def request(iteration):
+            return getattr(client, method)(
+                url,
+                data=self.request_data(name, iteration),
+                **self.request_headers(name),
+            )
+
+        def reset_cache():
+            # Сброс записывается в БД, поэтому не входит в замер.
+            if not warm_cache:
+                bump_namespaces(ALL_NAMESPACES)
+
+        for role in ROLES:
+            client = clients[role]
+            reset_cache()
+            response = request(0)
+            if response.status_code < 300:
+                break
+        else:
+            raise CommandError(NO_SUCCESS.format(name=name))
+        latencies = []
+        queries = []
+        for iteration in range(1, requests + 1):
+            reset_cache()
+            with CaptureQueriesContext(connection) as context:
+                started = time.perf_counter()
+                request(iteration)
+                latencies.append((time.perf_counter() - started) * 1000)
+            queries.append(len(context.captured_queries))
+        peaks = []
+        for iteration in range(requests + 1, requests + 1 + MEMORY_RUNS):
+            reset_cache()
+            tracemalloc.start()
+            request(iteration)
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+        latency = {
+            f"p{rank}": percentile(latencies, rank) for rank in PERCENTILES
+        }
+        latency["mean"] = sum(latencies) / len(latencies)
+        return {
+            "method": method.upper(),
+            "url": url,
+            "role": role,
+            "status": response.status_code,
+            "latency_ms": latency,
+            "queries": max(queries),
+            "memory_kb": max(peaks) / 1024,
+        }
+
+    def compare(self, results, path, tolerance):
+        with open(path, encoding="utf-8") as previous_file:
+            previous = json.load(previous_file)["routes"]
+        regressions = []
+        for name, current in results["routes"].items():
+            old = previous.get(name)
+            if old is None:
+                continue
+            if current["queries"] > old["queries"]:
+                regressions.append(
+                    REGRESSION.format(
+                        name=name,
+                        metric="запросов к БД",
+                        old=old["queries"],
+                        new=current["queries"],
+                    )
+                )
+            old_p50 = old["latency_ms"]["p50"]
+            new_p50 = current["latency_ms"]["p50"]
+            if new_p50 > old_p50 * (1 + tolerance):
+                regressions.append(
+                    REGRESSION.format(
+                        name=name,
+                        metric="p50, мс",
+                        old=f"{old_p50:.2f}",
+                        new=f"{new_p50:.2f}",
+                    )
+                )
+        if regressions:
+            raise CommandError(
+                REGRESSIONS_FOUND.format(path, "\n".join(regressions))
+            )
+        self.stdout.write(self.style.SUCCESS(NO_REGRESSIONS.format(path)))
@@ -0,0 +1,78 @@
+import logging
+import time
+
+from django.conf import settings
+from django.db import connection
+
+
+logger = logging.getLogger(__name__)
+
+QUERY_COUNT_HEADER = "X-DB-Query-Count"
+QUERY_TIME_HEADER = "X-DB-Query-Time"
+QUERY_BUDGET_HEADER = "X-DB-Query-Budget"
+BUDGET_EXCEEDED = "%s %s: выполнено %s запросов к БД при бюджете %s (%s.%s)"
+
+
+class QueryCounter:
+    """Обертка выполнения SQL, которая считает запросы и их время."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+
+
+class QueryCountMiddleware:
+    """
+    Считает запросы к БД и время их выполнения для каждого запроса
+    и, если включена настройка QUERY_COUNT_HEADERS, отдает их в заголовках
+    ответа. Вьюсеты могут объявить бюджет запросов для своих действий
+    в атрибуте `query_budget`: это общее количество запросов к БД
+    на HTTP-запрос, включая аутентификацию. Превышение бюджета попадает
+    в лог, а тесты проверяют бюджеты по заголовку X-DB-Query-Budget.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not getattr(settings, "QUERY_COUNT_HEADERS", False):
+            return self.get_response(request)
+        request.query_budget = None
+        counter = QueryCounter()
+        with connection.execute_wrapper(counter):
+            response = self.get_response(request)
+        response[QUERY_COUNT_HEADER] = str(counter.count)
+        response[QUERY_TIME_HEADER] = f"{counter.duration * 1000:.2f}"
+        if request.query_budget is not None:
+            view_name, action, budget = request.query_budget
+            response[QUERY_BUDGET_HEADER] = str(budget)
+            if counter.count > budget:
+                logger.warning(
+                    BUDGET_EXCEEDED,
+                    request.method,
+                    request.path,
+                    counter.count,
+                    budget,
+                    view_name,
+                    action,
+                )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not hasattr(request, "query_budget"):
+            return None
+        view_class = getattr(view_func, "cls", None)
+        actions = getattr(view_func, "actions", None) or {}
+        action = actions.get(request.method.lower())
+        budget = getattr(view_class, "query_budget", {}).get(action)
+        if budget is not None:
+            request.query_budget = (view_class.__name__, action, budget)
+        return None
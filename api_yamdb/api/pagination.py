@@ -0,0 +1,156 @@
+import json
+from functools import reduce
+from operator import or_
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (
+    Cursor,
+    CursorPagination,
+    PageNumberPagination,
+    _reverse_ordering,
+)
+
+
+class FixedCursorPagination(CursorPagination):
+    """
+    Курсорная пагинация по составному ключу.
+
+    Порядок всегда берется из `ordering`, даже если у вьюсета есть фильтр
+    сортировки. Позиция курсора хранит значения всех полей `ordering`,
+    а следующая страница выбирается условием «строго после позиции»
+    в лексикографическом порядке, поэтому совпадения первого поля
+    не требуют OFFSET. Последнее поле `ordering` должно быть уникальным,
+    все поля - не NULL.
+    """
+
+    def get_ordering(self, request, queryset, view):
+        return self.ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor.reverse
+        position = self.decode_position()
+        ordering = (
+            _reverse_ordering(self.ordering) if reverse else self.ordering
+        )
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self.after(ordering, position))
+        results = list(queryset[: self.page_size + 1])
+        self.page = results[: self.page_size]
+        has_more = len(results) > self.page_size
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def decode_position(self):
+        if self.cursor is None or self.cursor.position is None:
+            return None
+        try:
+            position = json.loads(self.cursor.position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(
+            self.ordering
+        ):
+            raise NotFound(self.invalid_cursor_message)
+        return position
+
+    @staticmethod
+    def after(ordering, position):
+        """
+        Условие «строго после `position`» для порядка `ordering`:
+        (a > x) OR (a = x AND b > y) OR ...
+        """
+        conditions = []
+        for idx, order in enumerate(ordering):
+            lookup = "lt" if order.startswith("-") else "gt"
+            equal = {
+                field.lstrip("-"): value
+                for field, value in zip(ordering[:idx], position)
+            }
+            conditions.append(
+                Q(**equal, **{f"{order.lstrip('-')}__{lookup}": position[idx]})
+            )
+        return reduce(or_, conditions)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        # Пустая страница бывает только при обратном проходе от начала
+        # списка: следующей для нее будет первая страница.
+        position = (
+            self._get_position_from_instance(self.page[-1], self.ordering)
+            if self.page
+            else None
+        )
+        return self.encode_cursor(
+            Cursor(offset=0, reverse=False, position=position)
+        )
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        position = (
+            self._get_position_from_instance(self.page[0], self.ordering)
+            if self.page
+            else None
+        )
+        return self.encode_cursor(
+            Cursor(offset=0, reverse=True, position=position)
+        )
+
+    def _get_position_from_instance(self, instance, ordering):
+        fields = [order.lstrip("-") for order in ordering]
+        if isinstance(instance, dict):
+            values = [instance[field] for field in fields]
+        else:
+            values = [getattr(instance, field) for field in fields]
+        return json.dumps([str(value) for value in values])
+
+
+class OptionalCursorPagination(PageNumberPagination):
+    """
+    Постраничная пагинация, которая переключается на курсорную,
+    если в запросе передан параметр `cursor` (в том числе пустой).
+    Курсорная пагинация не выполняет COUNT(*) и OFFSET, поэтому
+    любая страница выдается за то же время, что и первая.
+    """
+
+    cursor_query_param = "cursor"
+    cursor_ordering = ("id",)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        if self.cursor_query_param not in request.query_params:
+            return super().paginate_queryset(queryset, request, view)
+        self.cursor_paginator = FixedCursorPagination()
+        self.cursor_paginator.cursor_query_param = self.cursor_query_param
+        self.cursor_paginator.ordering = self.cursor_ordering
+        return self.cursor_paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+
+class TitlePagination(OptionalCursorPagination):
+    cursor_ordering = ("id",)
+
+
+class FeedbackPagination(OptionalCursorPagination):
+    """Пагинация отзывов и комментариев, новые записи первыми."""
+
+    cursor_ordering = ("-pub_date", "-id")
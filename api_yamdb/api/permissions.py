@@ -23,7 +23,7 @@ class IsOwnerAdminModeratorOrReadOnly(permissions.BasePermission):
             request.method in permissions.SAFE_METHODS
             or request.user.is_admin
             or request.user.is_moderator
-            or request.user == obj.author
+            or obj.author_id == request.user.pk
         )
 
 
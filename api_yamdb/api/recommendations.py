@@ -0,0 +1,68 @@
+from django.conf import settings
+from django.core.cache import cache
+
+from api.cache import ALL_NAMESPACES, bump_namespaces, namespace_versions
+from api.serializers import RecommendedTitleSerializer
+from reviews.models import Title
+from reviews.similarity import recommend_titles
+
+
+RECOMMENDATIONS_CACHE_KEY = "recommendations:{versions}:{user_id}"
+# Сбрасывается после пересчета похожих произведений.
+RECOMMENDATIONS_NAMESPACE = "recommendations"
+USER_NAMESPACE = "recommendations:{}"
+
+
+def recommendations_cache_key(user_id):
+    """
+    Ключ подборки с версиями пространств имен кеша: подборка
+    сбрасывается во всех процессах после отзыва пользователя, пересчета
+    похожих произведений и массовой загрузки данных.
+    """
+    versions = namespace_versions(
+        (
+            ALL_NAMESPACES,
+            RECOMMENDATIONS_NAMESPACE,
+            USER_NAMESPACE.format(user_id),
+        )
+    )
+    return RECOMMENDATIONS_CACHE_KEY.format(
+        versions=".".join(str(version) for version in versions),
+        user_id=user_id,
+    )
+
+
+def user_recommendations(user_id):
+    """
+    Подборка «рекомендуем вам» из кеша. При промахе считается по таблице
+    похожих произведений и хранится RECOMMENDATIONS_CACHE_TIMEOUT секунд
+    или до нового отзыва пользователя.
+    """
+    key = recommendations_cache_key(user_id)
+    data = cache.get(key)
+    if data is not None:
+        return data
+    ranked = recommend_titles(
+        user_id,
+        settings.RECOMMENDATIONS_SIZE,
+        settings.RECOMMENDATIONS_MIN_SCORE,
+    )
+    titles = Title.objects.in_bulk([title_id for _, title_id in ranked])
+    entries = []
+    for score, title_id in ranked:
+        # Произведение могли удалить после расчета похожих.
+        if title_id in titles:
+            titles[title_id].recommendation_score = score
+            entries.append(titles[title_id])
+    data = list(RecommendedTitleSerializer(entries, many=True).data)
+    cache.set(key, data, settings.RECOMMENDATIONS_CACHE_TIMEOUT)
+    return data
+
+
+def forget_recommendations(user_id):
+    """Сбрасывает подборку пользователя после фиксации транзакции."""
+    bump_namespaces(USER_NAMESPACE.format(user_id))
+
+
+def forget_all_recommendations():
+    bump_namespaces(RECOMMENDATIONS_NAMESPACE)
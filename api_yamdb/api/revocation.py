@@ -0,0 +1,144 @@
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from reviews.models import ClaimsChange, RevokedToken
+
+
+class RevocationList:
+    """
+    Отозванные токены и изменения claims пользователей в памяти процесса.
+
+    Проверка токена - поиск в словарях без обращения к БД. Раз в
+    TOKEN_REVOCATION_CHECK_INTERVAL секунд процесс дочитывает из таблиц
+    RevokedToken и ClaimsChange новые строки (id больше последнего
+    прочитанного) запросами по первичному ключу, поэтому изменения
+    из других процессов учитываются не позже чем через этот интервал.
+    Кеш Django для этого не используется: вытеснение ключа из кеша
+    не должно возвращать доверие к устаревшим токенам.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.expires = {}
+        self.last_id = 0
+        self.changed = {}
+        self.last_change_id = 0
+        self.checked_at = None
+
+    def check_is_due(self):
+        return (
+            self.checked_at is None
+            or time.monotonic() - self.checked_at
+            >= settings.TOKEN_REVOCATION_CHECK_INTERVAL
+        )
+
+    def __contains__(self, jti):
+        if self.check_is_due():
+            self.check()
+        return jti in self.expires
+
+    def claims_changed_at(self, user_id):
+        """
+        Время последнего изменения claims пользователя (метка времени)
+        или None, если за время жизни токенов они не менялись.
+        """
+        if self.check_is_due():
+            self.check()
+        return self.changed.get(user_id)
+
+    def check(self):
+        with self.lock:
+            if not self.check_is_due():
+                return
+            self.refresh()
+            self.checked_at = time.monotonic()
+
+    def refresh(self):
+        now = timezone.now()
+        self.expires = {
+            jti: expires_at
+            for jti, expires_at in self.expires.items()
+            if expires_at > now
+        }
+        for pk, jti, expires_at in (
+            RevokedToken.objects.filter(id__gt=self.last_id)
+            .order_by("id")
+            .values_list("id", "jti", "expires_at")
+        ):
+            if expires_at > now:
+                self.expires[jti] = expires_at
+            self.last_id = pk
+        # Токены, выданные раньше этого срока, уже истекли.
+        valid_since = now - api_settings.ACCESS_TOKEN_LIFETIME
+        self.changed = {
+            user_id: changed_at
+            for user_id, changed_at in self.changed.items()
+            if changed_at > valid_since.timestamp()
+        }
+        for pk, user_id, changed_at in (
+            ClaimsChange.objects.filter(
+                id__gt=self.last_change_id, changed_at__gt=valid_since
+            )
+            .order_by("id")
+            .values_list("id", "user_id", "changed_at")
+        ):
+            self.changed[user_id] = changed_at.timestamp()
+            self.last_change_id = pk
+
+    def add(self, jti, expires_at):
+        """Учитывает отзыв в этом процессе, не дожидаясь проверки
+        таблицы."""
+        self.expires[jti] = expires_at
+
+    def claims_changed(self, user_id, changed_at):
+        self.changed[user_id] = max(changed_at, self.changed.get(user_id, 0))
+
+
+revoked_tokens = RevocationList()
+
+
+def record_claims_change(user_id):
+    """
+    Сохраняет изменение claims пользователя: токены, выданные раньше,
+    во всех процессах перестают доверять своим claims. Возвращает
+    метку времени изменения.
+    """
+    return record_claims_changes([user_id])
+
+
+def record_claims_changes(user_ids):
+    """Сохраняет изменение claims нескольких пользователей одним INSERT."""
+    changes = ClaimsChange.objects.bulk_create(
+        [ClaimsChange(user_id=user_id) for user_id in user_ids]
+    )
+    changed_at = max(change.changed_at for change in changes)
+    ClaimsChange.objects.filter(
+        changed_at__lte=changed_at - api_settings.ACCESS_TOKEN_LIFETIME
+    ).delete()
+    changed_at = changed_at.timestamp()
+
+    def apply():
+        for user_id in user_ids:
+            revoked_tokens.claims_changed(user_id, changed_at)
+
+    transaction.on_commit(apply)
+    return changed_at
+
+
+def revoke_token(token, user_id):
+    """Отзывает токен до истечения его срока действия."""
+    expires_at = datetime_from_epoch(token["exp"])
+    RevokedToken.objects.filter(expires_at__lte=timezone.now()).delete()
+    RevokedToken.objects.get_or_create(
+        jti=token[api_settings.JTI_CLAIM],
+        defaults={"user_id": user_id, "expires_at": expires_at},
+    )
@@ -1,8 +1,18 @@
 from django.contrib.auth import get_user_model
+from django.db.models import Q
 from django.shortcuts import get_object_or_404
 from rest_framework import serializers
 
-from reviews.models import Category, Comment, Genre, Review, Title
+from reviews.models import (
+    Category,
+    Comment,
+    Genre,
+    LeaderboardEntry,
+    Review,
+    SimilarTitle,
+    Title,
+    TitleStats,
+)
 from reviews.validators import validate_username
 
 
@@ -45,14 +55,20 @@ class SignupSerializer(serializers.Serializer):
     )
 
     def validate(self, data):
-        if User.objects.filter(username=data["username"]).exists():
-            email = User.objects.get(username=data["username"]).email
-            if email != data["email"]:
-                raise serializers.ValidationError("Неправильный email")
-        if User.objects.filter(email=data["email"]).exists():
-            username = User.objects.get(email=data["email"]).username
-            if username != data["username"]:
-                raise serializers.ValidationError("Неправильный username")
+        users = User.objects.filter(
+            Q(username=data["username"]) | Q(email=data["email"])
+        ).order_by()[:2]
+        by_username = by_email = None
+        for user in users:
+            if user.username == data["username"]:
+                by_username = user
+            if user.email == data["email"]:
+                by_email = user
+        if by_username is not None and by_username.email != data["email"]:
+            raise serializers.ValidationError("Неправильный email")
+        if by_email is not None and by_email.username != data["username"]:
+            raise serializers.ValidationError("Неправильный username")
+        data["user"] = by_username
         return data
 
 
@@ -93,18 +109,34 @@ class TitleWriteSerializer(serializers.ModelSerializer):
     )
 
     class Meta:
-        fields = "__all__"
+        exclude = (
+            "review_count",
+            "score_sum",
+            "reviews_version",
+            "updated_at",
+        )
         model = Title
 
 
+def score_histogram(title):
+    """Распределение оценок произведения, загруженное с ним через
+    select_related("stats")."""
+    try:
+        stats = title.stats
+    except TitleStats.DoesNotExist:
+        stats = TitleStats()
+    return {str(score): count for score, count in stats.histogram.items()}
+
+
 class TitleSerializer(serializers.ModelSerializer):
-    genre = GenreSerializer(many=True)
-    category = CategorySerializer()
-    rating = serializers.FloatField()
+    """
+    Произведение. Если в контексте передан `include_stats`, в ответ
+    добавляется распределение оценок `scores`.
+    """
 
-    class Meta:
-        fields = "__all__"
-        model = Title
+    genre = GenreSerializer(many=True, read_only=True)
+    category = CategorySerializer(read_only=True)
+    rating = serializers.FloatField(read_only=True)
 
     class Meta:
         model = Title
@@ -120,12 +152,70 @@ class TitleSerializer(serializers.ModelSerializer):
 
     def to_representation(self, instance):
         data = super().to_representation(instance)
-        data["genre"] = GenreSerializer(instance.genre.all(), many=True).data
-        data["category"] = CategorySerializer(instance.category).data
-        data["rating"] = instance.rating
+        if self.context.get("include_stats"):
+            data["scores"] = score_histogram(instance)
         return data
 
 
+class TitleStatsSerializer(serializers.ModelSerializer):
+    """Рейтинг и распределение оценок произведения."""
+
+    rating = serializers.FloatField(read_only=True)
+    scores = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Title
+        fields = ("id", "rating", "review_count", "scores")
+
+    def get_scores(self, title):
+        return score_histogram(title)
+
+
+class LeaderboardEntrySerializer(serializers.ModelSerializer):
+    """Место в рейтинге лучших с основными данными произведения."""
+
+    id = serializers.IntegerField(source="title_id")
+    name = serializers.CharField(source="title.name")
+    year = serializers.IntegerField(source="title.year")
+    rating = serializers.FloatField(source="title.rating")
+    review_count = serializers.IntegerField(source="title.review_count")
+
+    class Meta:
+        model = LeaderboardEntry
+        fields = (
+            "position",
+            "score",
+            "id",
+            "name",
+            "year",
+            "rating",
+            "review_count",
+        )
+
+
+class SimilarTitleSerializer(serializers.ModelSerializer):
+    """Похожее произведение и его близость к исходному."""
+
+    id = serializers.IntegerField(source="similar_id")
+    name = serializers.CharField(source="similar.name")
+    year = serializers.IntegerField(source="similar.year")
+    rating = serializers.FloatField(source="similar.rating")
+
+    class Meta:
+        model = SimilarTitle
+        fields = ("id", "name", "year", "rating", "score")
+
+
+class RecommendedTitleSerializer(serializers.ModelSerializer):
+    """Рекомендованное произведение и его оценка для пользователя."""
+
+    score = serializers.FloatField(source="recommendation_score")
+
+    class Meta:
+        model = Title
+        fields = ("id", "name", "year", "rating", "score")
+
+
 class ReviewSerializer(serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
         default=serializers.CurrentUserDefault(),
@@ -139,8 +229,8 @@ class ReviewSerializer(serializers.ModelSerializer):
                 "title_id"
             ]
             title = get_object_or_404(Title, pk=title_id)
-            author = self.context["request"].user
-            if title.reviews.select_related("title").filter(author=author):
+            author_id = self.context["request"].user.pk
+            if title.reviews.filter(author_id=author_id).exists():
                 raise serializers.ValidationError(
                     "Публиковать более одного обзора на одно и то же "
                     "произведение нельзя! "
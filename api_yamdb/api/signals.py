@@ -0,0 +1,176 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from api.authentication import CLAIMS, cache_user_claims
+from api.cache import ALL_NAMESPACES, bump_namespaces
+from api.recommendations import (
+    forget_all_recommendations,
+    forget_recommendations,
+)
+from api.revocation import (
+    record_claims_change,
+    record_claims_changes,
+    revoked_tokens,
+)
+from api.suggest import CATEGORY, GENRE, TITLE, suggest_index
+from reviews.models import (
+    Category,
+    Comment,
+    Genre,
+    GenreTitle,
+    Review,
+    RevokedToken,
+    Title,
+)
+from reviews.signals import (
+    bulk_data_changed,
+    similar_titles_changed,
+    users_bulk_updated,
+)
+
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+def user_saved(
+    sender, instance, created, raw=False, update_fields=None, **kwargs
+):
+    """
+    Отмечает изменение claims, чтобы выданные раньше токены больше
+    не доверяли своим claims, и кладет новые данные в кеш.
+    """
+    if raw:
+        return
+    if created:
+        changed_at = revoked_tokens.claims_changed_at(instance.pk)
+    elif update_fields is None or set(update_fields) & set(CLAIMS):
+        changed_at = record_claims_change(instance.pk)
+    else:
+        return
+    transaction.on_commit(lambda: cache_user_claims(instance, changed_at))
+    if not created and (update_fields is None or "username" in update_fields):
+        # Имя автора выводится в отзывах и комментариях.
+        bump_namespaces("users")
+
+
+@receiver(users_bulk_updated)
+def users_updated_in_bulk(sender, changes, **kwargs):
+    """То же для пользователей, измененных через bulk_update."""
+    user_ids = [
+        user.pk
+        for stored, user in changes
+        if any(
+            getattr(stored, claim) != getattr(user, claim) for claim in CLAIMS
+        )
+    ]
+    if user_ids:
+        record_claims_changes(user_ids)
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    """Токены удаленного пользователя больше не принимаются."""
+    record_claims_change(instance.pk)
+
+
+@receiver(post_save, sender=RevokedToken)
+def token_revoked(sender, instance, created, raw=False, **kwargs):
+    """Добавляет токен в список отозванных, в том числе из админки."""
+    if created and not raw:
+        revoked_tokens.add(instance.jti, instance.expires_at)
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+@receiver(post_save, sender=GenreTitle)
+@receiver(post_delete, sender=GenreTitle)
+@receiver(m2m_changed, sender=Title.genre.through)
+def title_changed(sender, **kwargs):
+    bump_namespaces("titles")
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+def genre_changed(sender, **kwargs):
+    bump_namespaces("genres", "titles")
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def category_changed(sender, **kwargs):
+    bump_namespaces("categories", "titles")
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def review_changed(sender, instance, **kwargs):
+    """
+    Отзыв меняет список отзывов, рейтинг произведения и подборку
+    рекомендаций автора.
+    """
+    bump_namespaces(f"reviews:{instance.title_id}", "titles")
+    forget_recommendations(instance.author_id)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_changed(sender, instance, **kwargs):
+    bump_namespaces(f"comments:{instance.review_id}")
+
+
+@receiver(bulk_data_changed)
+def data_changed_in_bulk(sender, **kwargs):
+    bump_namespaces(ALL_NAMESPACES)
+    suggest_index.reset()
+
+
+@receiver(similar_titles_changed)
+def similar_titles_rebuilt(sender, **kwargs):
+    forget_all_recommendations()
+
+
+SUGGEST_KINDS = {Title: TITLE, Genre: GENRE, Category: CATEGORY}
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_save, sender=Genre)
+@receiver(post_save, sender=Category)
+def suggestion_saved(sender, instance, raw=False, **kwargs):
+    """Обновляет название в индексе подсказок после фиксации записи."""
+    if raw:
+        return
+    slug = getattr(instance, "slug", None)
+    transaction.on_commit(
+        lambda: suggest_index.update(
+            SUGGEST_KINDS[sender], instance.pk, instance.name, slug=slug
+        )
+    )
+
+
+@receiver(post_delete, sender=Title)
+@receiver(post_delete, sender=Genre)
+@receiver(post_delete, sender=Category)
+def suggestion_deleted(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(
+        lambda: suggest_index.remove(SUGGEST_KINDS[sender], pk)
+    )
+
+
+@receiver(post_save, sender=Review)
+def review_added(sender, instance, created, raw=False, **kwargs):
+    """Популярность произведения в подсказках - количество отзывов."""
+    if created and not raw:
+        transaction.on_commit(
+            lambda: suggest_index.add_popularity(TITLE, instance.title_id, 1)
+        )
+
+
+@receiver(post_delete, sender=Review)
+def review_removed(sender, instance, **kwargs):
+    transaction.on_commit(
+        lambda: suggest_index.add_popularity(TITLE, instance.title_id, -1)
+    )
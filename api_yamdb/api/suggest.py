@@ -0,0 +1,265 @@
+import bisect
+import heapq
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Sum
+
+from reviews.models import Category, Genre, Title
+from reviews.search import TOKEN_PATTERN, normalize
+
+
+TITLE = "title"
+GENRE = "genre"
+CATEGORY = "category"
+MAX_WORDS = 5
+# Для префиксов до этой длины лучшие записи посчитаны заранее: их участки
+# в списке ключей охватывают большую часть каталога.
+TOP_PREFIX_LENGTH = 3
+# Сколько ключей просматривается для более длинных префиксов.
+MAX_SCAN_KEYS = 10000
+
+
+def index_keys(name):
+    """
+    Ключи для поиска по началу названия и по началу каждого следующего
+    слова: «Научная фантастика» находится и по «нау», и по «фан».
+    """
+    value = normalize(" ".join(name.split()))
+    keys = [value]
+    for match in TOKEN_PATTERN.finditer(value):
+        start = match.start()
+        if start and len(keys) < MAX_WORDS:
+            keys.append(value[start:])
+    return keys
+
+
+def short_prefixes(keys):
+    return {
+        key[:length]
+        for key in keys
+        for length in range(1, min(len(key), TOP_PREFIX_LENGTH) + 1)
+    }
+
+
+def rank(item):
+    return (-item["popularity"], item["data"]["name"])
+
+
+class SuggestIndex:
+    """
+    Подсказки по названиям произведений, жанров и категорий в памяти
+    процесса.
+
+    Ключи хранятся в отсортированном списке кортежей
+    (ключ, тип, идентификатор), подсказки по префиксу - непрерывный
+    участок списка, который находится двоичным поиском. Из него
+    отбираются самые популярные записи: у произведений это количество
+    отзывов, у жанров и категорий - сумма отзывов их произведений.
+
+    Участок для префикса из одной-трех букв охватывает большую часть
+    каталога, поэтому для таких префиксов лучшие SUGGEST_RESULTS записей
+    хранятся готовыми в `top` и поддерживаются при изменениях. Если
+    запись покидает такой список (удаление, снижение популярности),
+    он пересчитывается при следующем запросе. Для длинных префиксов
+    просматривается не больше MAX_SCAN_KEYS ключей.
+
+    Сигналы моделей обновляют индекс сразу в этом процессе. Другие
+    процессы и популярность жанров и категорий догоняют изменения
+    полной перестройкой раз в SUGGEST_INDEX_MAX_AGE секунд. Перестройка
+    идет в отдельном потоке, одна на процесс, а запросы тем временем
+    получают подсказки из прежнего индекса; в запросе индекс строится
+    только при первом обращении.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.build_lock = threading.Lock()
+        self.rebuild_thread = None
+        self.reset()
+
+    def reset(self):
+        self.keys = []
+        self.items = {}
+        self.top = {}
+        self.top_size = 0
+        self.built_at = None
+
+    def is_stale(self):
+        return (
+            self.built_at is None
+            or time.monotonic() - self.built_at
+            >= settings.SUGGEST_INDEX_MAX_AGE
+        )
+
+    def build(self):
+        items = {}
+        for pk, name, review_count in Title.objects.values_list(
+            "pk", "name", "review_count"
+        ):
+            items[TITLE, pk] = self.make_item(TITLE, pk, name, review_count)
+        for kind, model, popularity in (
+            (GENRE, Genre, Sum("titles__title__review_count")),
+            (CATEGORY, Category, Sum("titles__review_count")),
+        ):
+            for pk, name, slug, total in (
+                model.objects.order_by()
+                .annotate(popularity=popularity)
+                .values_list("pk", "name", "slug", "popularity")
+            ):
+                items[kind, pk] = self.make_item(
+                    kind, pk, name, total or 0, slug=slug
+                )
+        keys = sorted(
+            (key, kind, pk)
+            for (kind, pk), item in items.items()
+            for key in item["keys"]
+        )
+        top_size = settings.SUGGEST_RESULTS
+        top = {}
+        for item_key, item in sorted(
+            items.items(), key=lambda pair: rank(pair[1])
+        ):
+            for prefix in short_prefixes(item["keys"]):
+                best = top.setdefault(prefix, [])
+                if len(best) < top_size:
+                    best.append(item_key)
+        with self.lock:
+            self.items = items
+            self.keys = keys
+            self.top = top
+            self.top_size = top_size
+            self.built_at = time.monotonic()
+
+    def rebuild_in_background(self):
+        """Запускает перестройку, если она еще не идет."""
+        if not self.build_lock.acquire(blocking=False):
+            return
+
+        def rebuild():
+            try:
+                self.build()
+            finally:
+                self.build_lock.release()
+                connection.close()
+
+        self.rebuild_thread = threading.Thread(target=rebuild, daemon=True)
+        self.rebuild_thread.start()
+
+    def make_item(self, kind, pk, name, popularity, slug=None):
+        data = {"type": kind, "name": name}
+        if kind == TITLE:
+            data["id"] = pk
+        else:
+            data["slug"] = slug
+        return {
+            "keys": index_keys(name),
+            "popularity": popularity,
+            "data": data,
+        }
+
+    def scan(self, prefix, limit, max_keys=None):
+        """Лучшие записи участка ключей, начинающихся с `prefix`."""
+        found = set()
+        index = bisect.bisect_left(self.keys, (prefix,))
+        end = len(self.keys)
+        if max_keys is not None:
+            end = min(end, index + max_keys)
+        while index < end:
+            key, kind, pk = self.keys[index]
+            if not key.startswith(prefix):
+                break
+            found.add((kind, pk))
+            index += 1
+        return heapq.nsmallest(
+            limit, found, key=lambda item_key: rank(self.items[item_key])
+        )
+
+    def search(self, query, limit):
+        prefix = normalize(" ".join(query.split()))
+        if not prefix:
+            return []
+        if self.built_at is None:
+            with self.build_lock:
+                if self.built_at is None:
+                    self.build()
+        elif self.is_stale():
+            self.rebuild_in_background()
+        with self.lock:
+            if len(prefix) > TOP_PREFIX_LENGTH or limit > self.top_size:
+                best = self.scan(prefix, limit, MAX_SCAN_KEYS)
+            else:
+                best = self.top.get(prefix)
+                if best is None:
+                    best = self.scan(prefix, self.top_size)
+                    if best:
+                        self.top[prefix] = best
+            return [self.items[item_key]["data"] for item_key in best[:limit]]
+
+    def offer(self, item_key, item):
+        """Ставит запись в готовые списки лучших, если она туда проходит."""
+        for prefix in short_prefixes(item["keys"]):
+            best = self.top.get(prefix)
+            if best is None:
+                # Список посчитается при первом запросе уже с записью.
+                continue
+            if item_key not in best:
+                if len(best) >= self.top_size:
+                    if rank(item) >= rank(self.items[best[-1]]):
+                        continue
+                    best.pop()
+                best.append(item_key)
+            best.sort(key=lambda key: rank(self.items[key]))
+
+    def forget(self, item_key, item):
+        """Сбрасывает готовые списки лучших, в которых есть запись."""
+        for prefix in short_prefixes(item["keys"]):
+            if item_key in self.top.get(prefix, ()):
+                del self.top[prefix]
+
+    def remove(self, kind, pk):
+        with self.lock:
+            self.remove_item(kind, pk)
+
+    def remove_item(self, kind, pk):
+        item = self.items.pop((kind, pk), None)
+        if item is None:
+            return None
+        self.forget((kind, pk), item)
+        for key in item["keys"]:
+            index = bisect.bisect_left(self.keys, (key, kind, pk))
+            if index < len(self.keys) and self.keys[index] == (key, kind, pk):
+                del self.keys[index]
+        return item
+
+    def update(self, kind, pk, name, popularity=None, slug=None):
+        """Добавляет запись или обновляет ее название."""
+        with self.lock:
+            if self.built_at is None:
+                # Индекс еще не построен: запись попадет в него при сборке.
+                return
+            old = self.remove_item(kind, pk)
+            if popularity is None:
+                popularity = old["popularity"] if old else 0
+            item = self.make_item(kind, pk, name, popularity, slug=slug)
+            self.items[kind, pk] = item
+            for key in item["keys"]:
+                bisect.insort(self.keys, (key, kind, pk))
+            self.offer((kind, pk), item)
+
+    def add_popularity(self, kind, pk, delta):
+        with self.lock:
+            item = self.items.get((kind, pk))
+            if item is None:
+                return
+            item["popularity"] = max(item["popularity"] + delta, 0)
+            if delta >= 0:
+                self.offer((kind, pk), item)
+            else:
+                # Запись может уступить место той, которой нет в списке.
+                self.forget((kind, pk), item)
+
+
+suggest_index = SuggestIndex()
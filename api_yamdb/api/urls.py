@@ -9,7 +9,9 @@ from api.views import (
     TitleViewSet,
     UserViewSet,
     get_token,
+    revoke_token,
     signup,
+    suggest,
 )
 
 
@@ -28,9 +30,14 @@ v1_router.register(
 )
 v1_router.register("users", UserViewSet, basename="users")
 
-auth_path = [path("auth/signup/", signup), path("auth/token/", get_token)]
+auth_path = [
+    path("auth/signup/", signup),
+    path("auth/token/", get_token),
+    path("auth/revoke/", revoke_token),
+]
 
 urlpatterns = [
     path("v1/", include(v1_router.urls)),
+    path("v1/suggest/", suggest),
     path("v1/", include(auth_path)),
 ]
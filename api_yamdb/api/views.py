@@ -2,35 +2,59 @@ import django_filters
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
-from django.db.models import Avg
+from django.db import IntegrityError, connection
+from django.db.models import Q
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import filters, mixins, serializers, status, viewsets
+from rest_framework import mixins, serializers, status, viewsets
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import AccessToken
-
-from reviews.models import Category, Genre, Review, Title
 
+from reviews.models import (
+    Category,
+    Comment,
+    Genre,
+    GenreTitle,
+    LeaderboardEntry,
+    OutgoingEmail,
+    Review,
+    SimilarTitle,
+    Title,
+)
+from reviews.search import build_match_query
+
+from . import revocation
+from .authentication import RoleAccessToken
+from .cache import (
+    CachedListMixin,
+    CachedResponseMixin,
+    ConditionalGetMixin,
+)
+from .filters import PrefixSearchFilter, StableOrderingFilter
+from .pagination import FeedbackPagination, TitlePagination
 from .permissions import (
     IsAdmin,
     IsAdminOrReadOnly,
     IsOwnerAdminModeratorOrReadOnly,
 )
+from .recommendations import user_recommendations
 from .serializers import (
     CategorySerializer,
     CommentSerializer,
     GenreSerializer,
+    LeaderboardEntrySerializer,
     ReviewSerializer,
     SignupSerializer,
+    SimilarTitleSerializer,
     TitleSerializer,
+    TitleStatsSerializer,
     TitleWriteSerializer,
     TokenSerializer,
     UserSerializer,
 )
+from .suggest import suggest_index
 
 
 User = get_user_model()
@@ -44,23 +68,70 @@ CONFIRMATION_CODE_LENGTH = 6
 
 
 class TitleFilter(django_filters.FilterSet):
-    genre = django_filters.CharFilter(field_name="genre__slug")
+    genre = django_filters.CharFilter(method="filter_genre")
     category = django_filters.CharFilter(field_name="category__slug")
+    search = django_filters.CharFilter(method="filter_search")
+    rating_min = django_filters.NumberFilter(
+        field_name="rating", lookup_expr="gte"
+    )
+    rating_max = django_filters.NumberFilter(
+        field_name="rating", lookup_expr="lte"
+    )
+    year_min = django_filters.NumberFilter(
+        field_name="year", lookup_expr="gte"
+    )
+    year_max = django_filters.NumberFilter(
+        field_name="year", lookup_expr="lte"
+    )
 
     class Meta:
         model = Title
         fields = ["genre", "category", "name", "year"]
 
+    def filter_genre(self, queryset, name, value):
+        """
+        Подзапрос вместо JOIN: индекс (genre, title) отдает произведения
+        жанра уже в порядке id, и список не приходится сортировать.
+        """
+        return queryset.filter(
+            id__in=GenreTitle.objects.filter(genre__slug=value).values(
+                "title_id"
+            )
+        )
+
+    def filter_search(self, queryset, name, value):
+        """
+        Полнотекстовый поиск по названию и описанию, самые релевантные
+        произведения первыми. Без FTS5 (не SQLite) - поиск подстроки.
+        """
+        if connection.vendor != "sqlite":
+            return queryset.filter(
+                Q(name__icontains=value) | Q(description__icontains=value)
+            )
+        match_query = build_match_query(value)
+        if match_query is None:
+            return queryset.none()
+        return queryset.filter(search__document__match=match_query).order_by(
+            "search__rank", "id"
+        )
+
 
 class UserViewSet(viewsets.ModelViewSet):
-    queryset = User.objects.all()
+    # Тот же индекс, что и у поиска: страницы не сортируются заново.
+    queryset = User.objects.order_by("normalized_username", "id")
     serializer_class = UserSerializer
     permission_classes = (IsAdmin,)
-    filter_backends = (filters.SearchFilter,)
-    search_fields = ("username",)
+    filter_backends = (PrefixSearchFilter,)
+    prefix_search_field = "normalized_username"
     lookup_field = "username"
     http_method_names = ("get", "post", "patch", "delete")
     pagination_class = PageNumberPagination
+    query_budget = {
+        "list": 2,
+        "retrieve": 1,
+        "user_owner": 1,
+        "recommendations": 3,
+    }
 
     @action(
         methods=("get", "patch"),
@@ -69,7 +140,8 @@ class UserViewSet(viewsets.ModelViewSet):
         permission_classes=(IsAuthenticated,),
     )
     def user_owner(self, request):
-        user = request.user
+        # request.user собран из токена, профиль берется из БД.
+        user = get_object_or_404(User, pk=request.user.pk)
         if request.method == "GET":
             return Response(
                 self.get_serializer(user).data, status=status.HTTP_200_OK
@@ -79,24 +151,44 @@ class UserViewSet(viewsets.ModelViewSet):
         serializer.save(role=user.role, partial=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
+    @action(
+        methods=("get",),
+        detail=False,
+        url_path="me/recommendations",
+        permission_classes=(IsAuthenticated,),
+    )
+    def recommendations(self, request):
+        """
+        Произведения, похожие на понравившиеся пользователю. Подборка
+        берется из кеша, поэтому обычно ответ не требует запросов к БД.
+        """
+        return Response({"results": user_recommendations(request.user.pk)})
+
 
 @api_view(["POST"])
 @permission_classes((AllowAny,))
 def signup(request):
     serializer = SignupSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
-    username = serializer.validated_data["username"]
-    email = serializer.validated_data["email"]
-    user, _ = User.objects.get_or_create(username=username, email=email)
+    user = serializer.validated_data["user"]
+    if user is None:
+        try:
+            user = User.objects.create(
+                username=serializer.validated_data["username"],
+                email=serializer.validated_data["email"],
+            )
+        except IntegrityError:
+            # Пользователя с такими данными успел создать другой запрос.
+            raise serializers.ValidationError(USER_ERROR)
     confirmation_code = default_token_generator.make_token(user)
-    send_mail(
-        EMAIL_HEADER,
-        EMAIL_TEXT.format(confirmation_code=confirmation_code),
-        settings.SENDER_EMAIL,
-        [user.email],
+    # Письмо отправит команда send_emails, запрос не ждет почтовый сервер.
+    OutgoingEmail.objects.create(
+        subject=EMAIL_HEADER,
+        body=EMAIL_TEXT.format(confirmation_code=confirmation_code),
+        from_email=settings.SENDER_EMAIL,
+        to=user.email,
     )
-    user.confirmation_code = confirmation_code
-    user.save()
+    User.objects.filter(pk=user.pk).update(confirmation_code=confirmation_code)
     return Response(serializer.data, status=status.HTTP_200_OK)
 
 
@@ -115,15 +207,42 @@ def get_token(request):
         and user.confirmation_code == serializer.data["confirmation_code"]
     ):
         return Response(
-            {"token": str(AccessToken.for_user(user))},
+            {"token": str(RoleAccessToken.for_user(user))},
             status=status.HTTP_201_CREATED,
         )
     user.confirmation_code = "-" * CONFIRMATION_CODE_LENGTH
-    user.save()
+    user.save(update_fields=("confirmation_code",))
     raise serializers.ValidationError(CODE_ERROR)
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+@api_view(["POST"])
+@permission_classes((IsAuthenticated,))
+def revoke_token(request):
+    """Отзывает токен, с которым выполнен запрос."""
+    revocation.revoke_token(request.auth, request.user.pk)
+    return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+@api_view(["GET"])
+@permission_classes((AllowAny,))
+def suggest(request):
+    """
+    Подсказки для поиска: самые популярные произведения, жанры
+    и категории, название которых или одно из слов названия начинается
+    с `q`. Отдаются из индекса в памяти без запросов к БД.
+    """
+    return Response(
+        {
+            "results": suggest_index.search(
+                request.query_params.get("q", ""), settings.SUGGEST_RESULTS
+            )
+        }
+    )
+
+
+class ReviewViewSet(
+    CachedResponseMixin, ConditionalGetMixin, viewsets.ModelViewSet
+):
     """
     Вьюсет для обработки эндпоинтов:
     GET DETAIL, GET LIST, POST, PATCH, DELETE
@@ -134,6 +253,11 @@ class ReviewViewSet(viewsets.ModelViewSet):
     serializer_class = ReviewSerializer
     http_method_names = ("get", "post", "patch", "delete")
     permission_classes = (IsOwnerAdminModeratorOrReadOnly,)
+    pagination_class = FeedbackPagination
+    # В списке есть запрос версии для ETag, повторы отдаются из кеша.
+    query_budget = {"list": 4, "retrieve": 2}
+    cache_namespaces = ("reviews:{title_id}", "users")
+    list_version_field = "reviews_version"
 
     def get_title(self):
         return get_object_or_404(
@@ -144,11 +268,19 @@ class ReviewViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         return self.get_title().reviews.select_related("title", "author")
 
+    def get_version_queryset(self):
+        return Review.objects.filter(title_id=self.kwargs.get("title_id"))
+
+    def get_list_version_queryset(self):
+        return Title.objects.filter(pk=self.kwargs.get("title_id"))
+
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user, title=self.get_title())
+        serializer.save(author_id=self.request.user.pk, title=self.get_title())
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(
+    CachedResponseMixin, ConditionalGetMixin, viewsets.ModelViewSet
+):
     """
     Вьюсет для обработки эндпоинтов:
     GET DETAIL, GET LIST, POST, PATCH, DELETE
@@ -159,6 +291,11 @@ class CommentViewSet(viewsets.ModelViewSet):
     serializer_class = CommentSerializer
     http_method_names = ("get", "post", "patch", "delete")
     permission_classes = (IsOwnerAdminModeratorOrReadOnly,)
+    pagination_class = FeedbackPagination
+    # В списке есть запрос версии для ETag, повторы отдаются из кеша.
+    query_budget = {"list": 4, "retrieve": 2}
+    cache_namespaces = ("comments:{review_id}", "users")
+    list_version_field = "comments_version"
 
     def get_review(self):
         return get_object_or_404(
@@ -169,27 +306,95 @@ class CommentViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         return self.get_review().comments.select_related("review", "author")
 
+    def get_version_queryset(self):
+        return Comment.objects.filter(review_id=self.kwargs.get("review_id"))
+
+    def get_list_version_queryset(self):
+        return Review.objects.filter(
+            pk=self.kwargs.get("review_id"),
+            title_id=self.kwargs.get("title_id"),
+        )
+
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user, review=self.get_review())
+        serializer.save(
+            author_id=self.request.user.pk, review=self.get_review()
+        )
 
 
-class TitleViewSet(viewsets.ModelViewSet):
-    queryset = Title.objects.annotate(rating=Avg("reviews__score")).order_by(
-        "id"
+class TitleViewSet(
+    CachedResponseMixin, ConditionalGetMixin, viewsets.ModelViewSet
+):
+    queryset = (
+        Title.objects.select_related("category")
+        .prefetch_related("genre")
+        .order_by("id")
     )
     serializer_class = TitleSerializer
-    filter_backends = (DjangoFilterBackend,)
+    filter_backends = (DjangoFilterBackend, StableOrderingFilter)
     filterset_class = TitleFilter
+    # Для каждого варианта есть индекс: rating, year, name и
+    # (-rating, year) для «лучшие, затем старые».
+    ordering_fields = ("rating", "year", "name", "id")
     permission_classes = (IsAdminOrReadOnly,)
+    pagination_class = TitlePagination
+    query_budget = {"list": 3, "retrieve": 2, "stats": 1, "similar": 2}
+    cache_namespaces = ("titles",)
+    # Фильтры и страницы списка произведений отдаются из кеша ответов.
+    conditional_list = False
+
+    def include_stats(self):
+        return self.request.query_params.get("include") == "stats"
+
+    def get_queryset(self):
+        if self.action == "stats":
+            return Title.objects.select_related("stats")
+        queryset = super().get_queryset()
+        if self.include_stats():
+            return queryset.select_related("stats")
+        return queryset
 
     def get_serializer_class(self):
         if self.action in ("list", "retrieve"):
             return TitleSerializer
+        if self.action == "stats":
+            return TitleStatsSerializer
 
         return TitleWriteSerializer
 
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["include_stats"] = self.include_stats()
+        return context
+
+    @action(detail=True, methods=("get",))
+    def stats(self, request, pk=None):
+        """
+        Рейтинг и распределение оценок 1-10 из счетчиков TitleStats,
+        без чтения отзывов. То же распределение можно получить в списке
+        и карточке произведения с параметром `?include=stats`.
+        """
+        return Response(self.get_serializer(self.get_object()).data)
+
+    @action(detail=True, methods=("get",))
+    def similar(self, request, pk=None):
+        """
+        Похожие произведения из таблицы, которую пересчитывает команда
+        build_similar_titles, одним запросом по индексу.
+        """
+        entries = list(
+            SimilarTitle.objects.filter(title_id=pk)
+            .select_related("similar")
+            .order_by("position")
+        )
+        if not entries:
+            get_object_or_404(Title, pk=pk)
+        return Response(
+            {"results": SimilarTitleSerializer(entries, many=True).data}
+        )
+
 
 class CategoryGenreBaseViewSet(
+    CachedListMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     mixins.DestroyModelMixin,
@@ -200,18 +405,51 @@ class CategoryGenreBaseViewSet(
     с поддержкой запросв GET LIST, POST, DELETE.
     """
 
-    filter_backends = (filters.SearchFilter,)
-    search_fields = ("name",)
+    filter_backends = (PrefixSearchFilter,)
+    # Querysets наследников упорядочены по этому же индексу, поэтому
+    # страницы с фильтром и без не сортируются заново.
+    prefix_search_field = "normalized_name"
     pagination_class = PageNumberPagination
     lookup_field = "slug"
     permission_classes = (IsAdminOrReadOnly,)
+    query_budget = {"list": 2, "top": 2}
+    # Поле LeaderboardEntry, по которому выбирается рейтинг лучших.
+    leaderboard_scope = None
+
+    @action(detail=True, methods=("get",))
+    def top(self, request, slug=None):
+        """
+        Лучшие произведения по взвешенному рейтингу из таблицы,
+        которую пересчитывает команда refresh_leaderboards. Места
+        удаленных после расчета произведений пропускаются, и остальные
+        нумеруются подряд.
+        """
+        entries = list(
+            LeaderboardEntry.objects.filter(
+                title__isnull=False,
+                **{f"{self.leaderboard_scope}__slug": slug},
+            )
+            .select_related("title")
+            .order_by("position")
+        )
+        if not entries:
+            get_object_or_404(self.get_queryset(), slug=slug)
+        for position, entry in enumerate(entries, start=1):
+            entry.position = position
+        return Response(
+            {"results": LeaderboardEntrySerializer(entries, many=True).data}
+        )
 
 
 class GenreViewSet(CategoryGenreBaseViewSet):
-    queryset = Genre.objects.all()
+    queryset = Genre.objects.order_by("normalized_name", "id")
     serializer_class = GenreSerializer
+    cache_namespaces = ("genres",)
+    leaderboard_scope = "genre"
 
 
 class CategoryViewSet(CategoryGenreBaseViewSet):
-    queryset = Category.objects.all()
+    queryset = Category.objects.order_by("normalized_name", "id")
     serializer_class = CategorySerializer
+    cache_namespaces = ("categories",)
+    leaderboard_scope = "category"
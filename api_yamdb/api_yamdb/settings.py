@@ -31,6 +31,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "api.middleware.QueryCountMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -115,7 +116,7 @@ REST_FRAMEWORK = {
         "rest_framework.permissions.IsAuthenticated",
     ],
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "api.authentication.RoleJWTAuthentication",
     ],
     "DEFAULT_FILTER_BACKENDS": [
         "django_filters.rest_framework.DjangoFilterBackend"
@@ -136,3 +137,45 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, "sent_emails")
 DOMAIN_NAME = "yamdb.fake"
 
 SENDER_EMAIL = f"admin@{DOMAIN_NAME}"
+
+# Заголовки X-DB-Query-Count/X-DB-Query-Time с количеством и временем
+# запросов к БД (см. api.middleware.QueryCountMiddleware).
+QUERY_COUNT_HEADERS = DEBUG
+
+# Время жизни в кеше данных пользователя для аутентификации по JWT
+# без запроса к БД (см. api.authentication.RoleJWTAuthentication).
+USER_CLAIMS_CACHE_TIMEOUT = 300
+
+# Как часто процесс проверяет, не отозвал ли токены другой процесс
+# (см. api.revocation.RevocationList), в секундах.
+TOKEN_REVOCATION_CHECK_INTERVAL = 1
+
+# Время жизни закешированных ответов на GET-запросы (см. api.cache),
+# устаревшие ответы сбрасываются сигналами моделей раньше.
+RESPONSE_CACHE_TIMEOUT = 60 * 5
+
+# Как часто процесс дочитывает сбросы кеша ответов из других процессов
+# и команд управления (см. api.cache.NamespaceVersions), в секундах.
+CACHE_INVALIDATION_CHECK_INTERVAL = 1
+
+# Индекс подсказок /api/v1/suggest/ в памяти процесса (см. api.suggest):
+# как часто он перестраивается целиком, в секундах, и сколько подсказок
+# отдается на запрос.
+SUGGEST_INDEX_MAX_AGE = 60
+SUGGEST_RESULTS = 10
+
+# Рейтинги лучших жанров и категорий (см. reviews.leaderboard): сколько
+# мест хранится, сколько «средних» отзывов добавляется каждому
+# произведению при расчете взвешенного рейтинга и на сколько может
+# сдвинуться средняя оценка по сайту, прежде чем все рейтинги будут
+# пересчитаны заново.
+LEADERBOARD_SIZE = 100
+LEADERBOARD_MIN_REVIEWS = 10
+LEADERBOARD_MEAN_DRIFT = 0.05
+
+# Подборка /api/v1/users/me/recommendations/ (см. api.recommendations):
+# сколько произведений в ней, от какой оценки произведение считается
+# понравившимся и сколько секунд подборка хранится в кеше.
+RECOMMENDATIONS_SIZE = 20
+RECOMMENDATIONS_MIN_SCORE = 7
+RECOMMENDATIONS_CACHE_TIMEOUT = 60 * 60
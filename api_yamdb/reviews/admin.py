@@ -1,6 +1,15 @@
 from django.contrib import admin
 
-from reviews.models import Category, Comment, Genre, Review, Title, User
+from reviews.models import (
+    Category,
+    Comment,
+    Genre,
+    OutgoingEmail,
+    Review,
+    RevokedToken,
+    Title,
+    User,
+)
 
 
 admin.site.register(Title)
@@ -26,3 +35,23 @@ class UserAdmin(admin.ModelAdmin):
     )
     list_filter = ("username",)
     empty_value_display = "-пусто-"
+
+
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = (
+        "to",
+        "subject",
+        "status",
+        "attempts",
+        "send_after",
+        "sent_at",
+    )
+    list_filter = ("status",)
+    search_fields = ("to",)
+
+
+@admin.register(RevokedToken)
+class RevokedTokenAdmin(admin.ModelAdmin):
+    list_display = ("jti", "user", "expires_at", "revoked_at")
+    search_fields = ("jti", "user__username")
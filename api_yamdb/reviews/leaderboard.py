@@ -0,0 +1,137 @@
+"""Рейтинги лучших произведений жанров и категорий.
+
+Произведения ранжируются по байесовскому взвешенному рейтингу
+
+    WR = (score_sum + m * C) / (review_count + m),
+
+где C - средняя оценка по всем отзывам, m - LEADERBOARD_MIN_REVIEWS.
+Рейтинг произведения с парой отзывов близок к среднему, и оно
+не обгоняет произведения с тысячами отзывов. Лучшие LEADERBOARD_SIZE
+мест каждого жанра и категории хранятся в таблице LeaderboardEntry,
+поэтому чтение рейтинга не агрегирует отзывы.
+
+Вместе с местами хранится C, с которой они посчитаны. Частичный расчет
+берет ее же, чтобы рейтинги разных жанров оставались сравнимы, а когда
+средняя по сайту уходит от нее дальше LEADERBOARD_MEAN_DRIFT, все
+рейтинги пересчитываются заново.
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max, Q, Sum
+from django.utils import timezone
+
+from reviews.models import GenreTitle, LeaderboardEntry, Title
+
+
+def mean_score():
+    """Средняя оценка по всем отзывам, по счетчикам произведений."""
+    totals = Title.objects.aggregate(
+        score_sum=Sum("score_sum"), review_count=Sum("review_count")
+    )
+    if not totals["review_count"]:
+        return 0
+    return totals["score_sum"] / totals["review_count"]
+
+
+def changed_scopes(since):
+    """
+    Жанры и категории, рейтинг которых мог измениться после `since`:
+    у их произведений изменились отзывы, жанры или категория. Учитываются
+    и рейтинги, в которых эти произведения стояли до изменения, и те,
+    из которых с тех пор удалены произведения.
+    """
+    titles = Title.objects.filter(updated_at__gt=since).values("pk")
+    genres = set(
+        GenreTitle.objects.filter(title__in=titles).values_list(
+            "genre_id", flat=True
+        )
+    )
+    categories = set(
+        Title.objects.filter(
+            pk__in=titles, category__isnull=False
+        ).values_list("category_id", flat=True)
+    )
+    for genre_id, category_id in LeaderboardEntry.objects.filter(
+        Q(title__in=titles) | Q(title__isnull=True)
+    ).values_list("genre_id", "category_id"):
+        if genre_id is None:
+            categories.add(category_id)
+        else:
+            genres.add(genre_id)
+    return genres, categories
+
+
+def refresh_leaderboards(full=False):
+    """
+    Пересчитывает рейтинги лучших: жанры и категории, произведения
+    которых изменились после прошлого расчета, а с `full=True` или при
+    пустой таблице или сдвиге средней оценки - все. Возвращает
+    количество пересчитанных рейтингов.
+    """
+    refreshed_at = timezone.now()
+    mean = mean_score()
+    since = None
+    if not full:
+        last = LeaderboardEntry.objects.aggregate(
+            since=Max("refreshed_at"), mean=Max("mean")
+        )
+        if (
+            last["since"] is not None
+            and abs(mean - last["mean"]) <= settings.LEADERBOARD_MEAN_DRIFT
+        ):
+            since, mean = last["since"], last["mean"]
+    titles = Title.objects.filter(review_count__gt=0)
+    links = GenreTitle.objects.filter(title__in=titles.values("pk"))
+    stale = LeaderboardEntry.objects.all()
+    if since is not None:
+        genres, categories = changed_scopes(since)
+        if not genres and not categories:
+            return 0
+        links = links.filter(genre_id__in=genres)
+        titles = titles.filter(
+            Q(category_id__in=categories) | Q(pk__in=links.values("title_id"))
+        )
+        stale = stale.filter(
+            Q(genre_id__in=genres) | Q(category_id__in=categories)
+        )
+
+    prior = settings.LEADERBOARD_MIN_REVIEWS
+    scores = {}
+    review_counts = {}
+    scopes = defaultdict(list)
+    for pk, category_id, score_sum, review_count in titles.values_list(
+        "pk", "category_id", "score_sum", "review_count"
+    ):
+        scores[pk] = (score_sum + prior * mean) / (review_count + prior)
+        review_counts[pk] = review_count
+        if category_id is not None and (
+            since is None or category_id in categories
+        ):
+            scopes["category_id", category_id].append(pk)
+    for genre_id, title_id in links.values_list("genre_id", "title_id"):
+        scopes["genre_id", genre_id].append(title_id)
+
+    entries = []
+    for (scope_field, scope_id), title_ids in scopes.items():
+        title_ids.sort(key=lambda pk: (-scores[pk], -review_counts[pk], pk))
+        for position, title_id in enumerate(
+            title_ids[: settings.LEADERBOARD_SIZE], start=1
+        ):
+            entries.append(
+                LeaderboardEntry(
+                    title_id=title_id,
+                    position=position,
+                    score=scores[title_id],
+                    mean=mean,
+                    refreshed_at=refreshed_at,
+                    **{scope_field: scope_id},
+                )
+            )
+    with transaction.atomic():
+        stale.delete()
+        LeaderboardEntry.objects.bulk_create(entries, batch_size=1000)
+    if since is None:
+        return len(scopes)
+    return len(genres) + len(categories)
@@ -9,24 +9,34 @@ from reviews.models import (
 )
 
 
-def category_create(row):
-    Category.objects.create(
+# Поля, которые берутся из csv и сверяются при импорте в режиме --upsert.
+CATEGORY_FIELDS = ("name", "slug")
+GENRE_FIELDS = ("name", "slug")
+TITLE_FIELDS = ("name", "year", "category_id")
+GENRE_TITLE_FIELDS = ("title_id", "genre_id")
+USER_FIELDS = ("username", "email", "role", "bio", "first_name", "last_name")
+REVIEW_FIELDS = ("title_id", "text", "author_id", "score")
+COMMENT_FIELDS = ("review_id", "text", "author_id")
+
+
+def category_build(row):
+    return Category(
         id=row[0],
         name=row[1],
         slug=row[2],
     )
 
 
-def genre_create(row):
-    Genre.objects.create(
+def genre_build(row):
+    return Genre(
         id=row[0],
         name=row[1],
         slug=row[2],
     )
 
 
-def title_create(row):
-    Title.objects.create(
+def title_build(row):
+    return Title(
         id=row[0],
         name=row[1],
         year=row[2],
@@ -34,16 +44,16 @@ def title_create(row):
     )
 
 
-def genre_title_create(row):
-    GenreTitle.objects.create(
+def genre_title_build(row):
+    return GenreTitle(
         id=row[0],
         title_id=row[1],
         genre_id=row[2],
     )
 
 
-def user_create(row):
-    User.objects.create(
+def user_build(row):
+    return User(
         id=row[0],
         username=row[1],
         email=row[2],
@@ -54,8 +64,8 @@ def user_create(row):
     )
 
 
-def review_create(row):
-    Review.objects.create(
+def review_build(row):
+    return Review(
         id=row[0],
         title_id=row[1],
         text=row[2],
@@ -65,8 +75,8 @@ def review_create(row):
     )
 
 
-def comment_create(row):
-    Comment.objects.create(
+def comment_build(row):
+    return Comment(
         id=row[0],
         review_id=row[1],
         text=row[2],
@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand
+
+from reviews.signals import similar_titles_changed
+from reviews.similarity import build_similar_titles
+
+
+TOP_K = 10
+MIN_COMMON = 2
+MAX_USER_REVIEWS = 100
+BUILT = "Похожие произведения найдены для {} произведений."
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересчет похожих произведений по оценкам пользователей. "
+        "Запускается периодически, например из cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--top-k",
+            type=int,
+            default=TOP_K,
+            help="Сколько похожих произведений хранить для каждого.",
+        )
+        parser.add_argument(
+            "--min-common",
+            type=int,
+            default=MIN_COMMON,
+            help=(
+                "Сколько пользователей должны оценить оба произведения, "
+                "чтобы учитывать их близость."
+            ),
+        )
+        parser.add_argument(
+            "--max-user-reviews",
+            type=int,
+            default=MAX_USER_REVIEWS,
+            help=(
+                "Сколько последних отзывов пользователя учитывать: время "
+                "расчета растет как квадрат числа отзывов пользователя."
+            ),
+        )
+
+    def handle(self, *args, **options):
+        built = build_similar_titles(
+            options["top_k"],
+            options["min_common"],
+            options["max_user_reviews"],
+        )
+        similar_titles_changed.send(sender=self.__class__)
+        self.stdout.write(self.style.SUCCESS(BUILT.format(built)))
@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand
+
+from reviews.models import Title
+from reviews.rating import find_rating_drift, recalculate_rating
+from reviews.signals import bulk_data_changed
+
+
+DRIFT_FOUND = (
+    "Произведение {id}: отзывов {review_count} (по факту {actual_count}), "
+    "сумма оценок {score_sum} (по факту {actual_sum}), рейтинг {rating}"
+)
+NO_DRIFT = "Рейтинги произведений согласованы с отзывами."
+DRIFT_TOTAL = "Найдено произведений с расхождениями: {}."
+DRIFT_FIXED = "Рейтинги пересчитаны для {} произведений."
+
+
+class Command(BaseCommand):
+    help = "Проверка и восстановление рейтингов произведений"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--fix",
+            action="store_true",
+            help="Пересчитать рейтинг произведений с расхождениями.",
+        )
+
+    def handle(self, *args, **options):
+        drift = list(find_rating_drift())
+        if not drift:
+            self.stdout.write(self.style.SUCCESS(NO_DRIFT))
+            return
+        for title in drift:
+            self.stdout.write(
+                DRIFT_FOUND.format(
+                    id=title.id,
+                    review_count=title.review_count,
+                    actual_count=title.actual_count,
+                    score_sum=title.score_sum,
+                    actual_sum=title.actual_sum,
+                    rating=title.rating,
+                )
+            )
+        self.stdout.write(self.style.WARNING(DRIFT_TOTAL.format(len(drift))))
+        if options["fix"]:
+            recalculate_rating(
+                Title.objects.filter(id__in=[title.id for title in drift])
+            )
+            bulk_data_changed.send(sender=self.__class__)
+            self.stdout.write(
+                self.style.SUCCESS(DRIFT_FIXED.format(len(drift)))
+            )
@@ -0,0 +1,247 @@
+import random
+import time
+from collections import Counter
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from reviews.models import (
+    Category,
+    Comment,
+    Genre,
+    GenreTitle,
+    Review,
+    Title,
+    User,
+)
+from reviews.rating import recalculate_rating
+from reviews.signals import bulk_data_changed
+
+
+SUCCESS_GENERATE = (
+    "{model}: создано {rows} записей, {seconds:.2f} с, {speed:.0f} строк/с."
+)
+RATING_RECALCULATED = "Рейтинги произведений пересчитаны."
+BATCH_SIZE = 1000
+WORDS = (
+    "тайна",
+    "дорога",
+    "город",
+    "ночь",
+    "море",
+    "звезда",
+    "сад",
+    "зима",
+    "огонь",
+    "тень",
+    "песня",
+    "остров",
+    "ветер",
+    "час",
+    "письмо",
+    "мост",
+)
+TEXT = "Сгенерированный текст для нагрузочного тестирования."
+# Распределение оценок смещено к высоким, как у реальных отзывов.
+SCORE_WEIGHTS = (1, 1, 2, 3, 5, 8, 12, 14, 10, 6)
+GENRES_PER_TITLE = (1, 3)
+FIRST_YEAR = 1900
+
+
+def next_id(model):
+    return (model.objects.aggregate(max_id=Max("id"))["max_id"] or 0) + 1
+
+
+def zipf_weights(count, exponent):
+    """Веса по закону Ципфа: несколько популярных произведений получают
+    большую часть отзывов, остальные - длинный хвост."""
+    return [1 / rank**exponent for rank in range(1, count + 1)]
+
+
+class Command(BaseCommand):
+    help = "Генерация синтетических данных для нагрузочного тестирования"
+
+    def add_arguments(self, parser):
+        for name, default in (
+            ("users", 1000),
+            ("categories", 5),
+            ("genres", 20),
+            ("titles", 1000),
+            ("reviews", 10000),
+            ("comments", 10000),
+        ):
+            parser.add_argument(
+                f"--{name}",
+                type=int,
+                default=default,
+                help=f"Количество создаваемых записей ({default}).",
+            )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            help="Зерно генератора для воспроизводимых данных.",
+        )
+        parser.add_argument(
+            "--skew",
+            type=float,
+            default=1.1,
+            help="Показатель распределения Ципфа для отзывов.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=BATCH_SIZE,
+            help="Количество строк в одном INSERT.",
+        )
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        users = self.generate(User, self.users, options["users"])
+        categories = self.generate(
+            Category, self.categories, options["categories"]
+        )
+        genres = self.generate(Genre, self.genres, options["genres"])
+        titles = self.generate(
+            Title, self.titles, options["titles"], categories
+        )
+        self.generate(GenreTitle, self.genre_titles, None, titles, genres)
+        reviews = self.generate(
+            Review,
+            self.reviews,
+            options["reviews"],
+            titles,
+            users,
+            options["skew"],
+        )
+        self.generate(
+            Comment, self.comments, options["comments"], reviews, users
+        )
+        # Отзывы созданы через bulk_create в обход сигналов.
+        recalculate_rating(
+            Title.objects.filter(id__gte=titles.start, id__lt=titles.stop)
+        )
+        bulk_data_changed.send(sender=self.__class__)
+        self.stdout.write(self.style.SUCCESS(RATING_RECALCULATED))
+
+    def generate(self, model, factory, count, *args):
+        """
+        Создает записи пачками и возвращает диапазон их id.
+        Фабрика получает первый свободный id и выдает объекты по одному,
+        поэтому в памяти одновременно находится не больше одной пачки.
+        """
+        started = time.perf_counter()
+        first_id = next_id(model)
+        objects = iter(factory(first_id, count, *args))
+        rows = 0
+        with transaction.atomic():
+            while True:
+                batch = list(islice(objects, self.batch_size))
+                if not batch:
+                    break
+                model.objects.bulk_create(batch, batch_size=self.batch_size)
+                rows += len(batch)
+        seconds = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                SUCCESS_GENERATE.format(
+                    model=model.__name__,
+                    rows=rows,
+                    seconds=seconds,
+                    speed=rows / seconds if seconds else rows,
+                )
+            )
+        )
+        return range(first_id, first_id + rows)
+
+    def users(self, first_id, count):
+        for user_id in range(first_id, first_id + count):
+            user = User(
+                id=user_id,
+                username=f"user{user_id}",
+                email=f"user{user_id}@yamdb.fake",
+                role=User.USER,
+            )
+            user.set_unusable_password()
+            yield user
+
+    def categories(self, first_id, count):
+        for category_id in range(first_id, first_id + count):
+            yield Category(
+                id=category_id,
+                name=f"Категория {category_id}",
+                slug=f"category-{category_id}",
+            )
+
+    def genres(self, first_id, count):
+        for genre_id in range(first_id, first_id + count):
+            yield Genre(
+                id=genre_id,
+                name=f"Жанр {genre_id}",
+                slug=f"genre-{genre_id}",
+            )
+
+    def titles(self, first_id, count, categories):
+        current_year = timezone.now().year
+        for title_id in range(first_id, first_id + count):
+            words = self.rng.sample(WORDS, self.rng.randint(1, 3))
+            yield Title(
+                id=title_id,
+                name=" ".join(words).capitalize() + f" {title_id}",
+                year=self.rng.randint(FIRST_YEAR, current_year),
+                description=TEXT,
+                category_id=(
+                    self.rng.choice(categories) if categories else None
+                ),
+            )
+
+    def genre_titles(self, first_id, count, titles, genres):
+        if not genres:
+            return
+        for title_id in titles:
+            for genre_id in self.rng.sample(
+                genres, min(len(genres), self.rng.randint(*GENRES_PER_TITLE))
+            ):
+                yield GenreTitle(
+                    id=first_id, title_id=title_id, genre_id=genre_id
+                )
+                first_id += 1
+
+    def reviews(self, first_id, count, titles, users, skew):
+        if not titles or not users:
+            return
+        ranked = list(titles)
+        self.rng.shuffle(ranked)
+        per_title = Counter(
+            self.rng.choices(
+                ranked, weights=zipf_weights(len(ranked), skew), k=count
+            )
+        )
+        scores = range(1, len(SCORE_WEIGHTS) + 1)
+        for title_id in titles:
+            # Автор может оставить только один отзыв на произведение.
+            reviews_count = min(per_title[title_id], len(users))
+            for author_id in self.rng.sample(users, reviews_count):
+                yield Review(
+                    id=first_id,
+                    title_id=title_id,
+                    author_id=author_id,
+                    text=TEXT,
+                    score=self.rng.choices(scores, SCORE_WEIGHTS)[0],
+                )
+                first_id += 1
+
+    def comments(self, first_id, count, reviews, users):
+        if not reviews or not users:
+            return
+        for comment_id in range(first_id, first_id + count):
+            yield Comment(
+                id=comment_id,
+                review_id=self.rng.choice(reviews),
+                author_id=self.rng.choice(users),
+                text=TEXT,
+            )
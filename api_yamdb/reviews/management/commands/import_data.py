@@ -1,43 +1,459 @@
 import csv
+import multiprocessing
 import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager, nullcontext
+from itertools import islice
 
+import django
+from django.apps import apps
 from django.conf import settings
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, transaction
 
 from reviews.management.commands._orm_func_for_import import (
-    category_create,
-    comment_create,
-    genre_create,
-    genre_title_create,
-    review_create,
-    title_create,
-    user_create,
+    CATEGORY_FIELDS,
+    COMMENT_FIELDS,
+    GENRE_FIELDS,
+    GENRE_TITLE_FIELDS,
+    REVIEW_FIELDS,
+    TITLE_FIELDS,
+    USER_FIELDS,
+    category_build,
+    comment_build,
+    genre_build,
+    genre_title_build,
+    review_build,
+    title_build,
+    user_build,
 )
+from reviews.models import (
+    Category,
+    Comment,
+    Genre,
+    GenreTitle,
+    ImportCheckpoint,
+    Review,
+    Title,
+    User,
+)
+from reviews.rating import recalculate_rating
+from reviews.search import NormalizedField
+from reviews.signals import bulk_data_changed, users_bulk_updated
 
 
-SUCCESS_IMPORT = "Импорт файла {} завершен успешно!"
+SUCCESS_IMPORT = (
+    "Импорт файла {filename} завершен успешно! "
+    "Строк: {rows}, {seconds:.2f} с, {speed:.0f} строк/с."
+)
+PAUSED_IMPORT = (
+    "Импорт файла {filename} приостановлен на строке {offset}. "
+    "Строк: {rows}, {seconds:.2f} с, {speed:.0f} строк/с. "
+    "Для продолжения запустите команду с флагом --resume."
+)
+SKIPPED_IMPORT = "Файл {filename} уже импортирован, пропускаем."
+RESUMED_IMPORT = "Продолжаем импорт файла {filename} со строки {offset}."
+RATING_RECALCULATED = "Рейтинги произведений пересчитаны."
+NOTHING_CHANGED = "Данные не изменились, рейтинги не пересчитываются."
+PARALLEL_IMPORT = "Параллельный импорт файлов: {}."
+MAX_ROWS_WITH_WORKERS = "Параметр --max-rows нельзя совмещать с --workers > 1."
+CYCLIC_DEPENDENCIES = "Циклические зависимости между файлами: {}."
+SERIALIZED_WRITES = (
+    "SQLite допускает только одну пишущую транзакцию: процессы "
+    "фиксируют каждую пачку отдельно и записывают по очереди."
+)
+UPSERT_STATS = (
+    "Файл {filename}: создано {created}, обновлено {updated}, "
+    "без изменений {unchanged}."
+)
 CSV_PATH = os.path.join(settings.BASE_DIR, "static/data/")
+BATCH_SIZE = 1000
 FILE_AND_MODEL = {
-    "category.csv": category_create,
-    "genre.csv": genre_create,
-    "titles.csv": title_create,
-    "genre_title.csv": genre_title_create,
-    "users.csv": user_create,
-    "review.csv": review_create,
-    "comments.csv": comment_create,
+    "category.csv": (Category, category_build, CATEGORY_FIELDS),
+    "genre.csv": (Genre, genre_build, GENRE_FIELDS),
+    "titles.csv": (Title, title_build, TITLE_FIELDS),
+    "genre_title.csv": (GenreTitle, genre_title_build, GENRE_TITLE_FIELDS),
+    "users.csv": (User, user_build, USER_FIELDS),
+    "review.csv": (Review, review_build, REVIEW_FIELDS),
+    "comments.csv": (Comment, comment_build, COMMENT_FIELDS),
 }
 
 
+def read_batches(reader, build, batch_size):
+    """Лениво собирает объекты из строк csv пачками по batch_size."""
+    while True:
+        batch = [build(row) for row in islice(reader, batch_size)]
+        if not batch:
+            return
+        yield batch
+
+
+def upsert_batch(model, batch, fields, batch_size):
+    """
+    Сверяет пачку объектов с уже сохраненными записями по первичному
+    ключу: новые записи добавляет, измененные обновляет, остальные
+    не трогает. Возвращает список созданных объектов и список пар
+    (сохраненная запись, новый объект) для обновленных.
+    """
+    pk_field = model._meta.pk
+    model_fields = [model._meta.get_field(name) for name in fields]
+    for obj in batch:
+        obj.pk = pk_field.to_python(obj.pk)
+        for field in model_fields:
+            setattr(
+                obj,
+                field.attname,
+                field.to_python(getattr(obj, field.attname)),
+            )
+    existing = model.objects.in_bulk([obj.pk for obj in batch])
+    created = []
+    changed = []
+    for obj in batch:
+        current = existing.get(obj.pk)
+        if current is None:
+            created.append(obj)
+        elif any(
+            getattr(obj, field.attname) != getattr(current, field.attname)
+            for field in model_fields
+        ):
+            changed.append((current, obj))
+    if created:
+        model.objects.bulk_create(created, batch_size=batch_size)
+    if changed:
+        # bulk_update, в отличие от bulk_create, не вычисляет значения
+        # полей auto_now и нормализованных полей.
+        computed_fields = [
+            field
+            for field in model._meta.concrete_fields
+            if getattr(field, "auto_now", False)
+            or isinstance(field, NormalizedField)
+        ]
+        for _, obj in changed:
+            for field in computed_fields:
+                field.pre_save(obj, add=False)
+        model.objects.bulk_update(
+            [obj for _, obj in changed],
+            [field.name for field in model_fields + computed_fields],
+            batch_size=batch_size,
+        )
+    return created, changed
+
+
+def dependency_levels(files=FILE_AND_MODEL):
+    """
+    Раскладывает файлы по уровням графа зависимостей, построенного
+    по внешним ключам моделей: файлы одного уровня не ссылаются друг
+    на друга и могут загружаться одновременно, каждый следующий уровень
+    зависит только от предыдущих.
+    """
+    model_files = {model: filename for filename, (model, *_) in files.items()}
+    dependencies = {
+        filename: {
+            model_files[field.related_model]
+            for field in model._meta.concrete_fields
+            if field.many_to_one
+            and field.related_model in model_files
+            and field.related_model is not model
+        }
+        for filename, (model, *_) in files.items()
+    }
+    levels = []
+    done = set()
+    while len(done) < len(dependencies):
+        level = [
+            filename
+            for filename, depends_on in dependencies.items()
+            if filename not in done and depends_on <= done
+        ]
+        if not level:
+            raise CommandError(
+                CYCLIC_DEPENDENCIES.format(
+                    ", ".join(sorted(set(dependencies) - done))
+                )
+            )
+        levels.append(level)
+        done.update(level)
+    return levels
+
+
+# Блокировка записи, общая для процессов параллельного импорта.
+write_lock = nullcontext()
+
+
+def init_worker(lock=None):
+    """Готовит процесс-обработчик: при запуске через spawn настраивает
+    Django, соединение с БД каждый процесс открывает свое."""
+    global write_lock
+    if lock is not None:
+        write_lock = lock
+    if not apps.ready:
+        django.setup()
+
+
+@contextmanager
+def atomic_write():
+    """Транзакция, которая пишет в БД только под блокировкой записи."""
+    with write_lock, transaction.atomic():
+        yield
+
+
+def import_in_worker(filename, options):
+    command = Command()
+    command.reset_changes()
+    command.import_one(filename, options)
+    return command.changed_rows, command.touched_titles
+
+
 class Command(BaseCommand):
     help = "Импорт данных из csv файлов в БД"
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=BATCH_SIZE,
+            help="Количество строк в одном INSERT.",
+        )
+        parser.add_argument(
+            "--checkpoint",
+            action="store_true",
+            help=(
+                "Фиксировать каждую пачку в отдельной транзакции вместе "
+                "с позицией в файле."
+            ),
+        )
+        parser.add_argument(
+            "--resume",
+            action="store_true",
+            help=(
+                "Продолжить импорт с последних контрольных точек "
+                "(включает --checkpoint)."
+            ),
+        )
+        parser.add_argument(
+            "--max-rows",
+            type=int,
+            default=None,
+            help="Остановиться после импорта указанного количества строк.",
+        )
+        parser.add_argument(
+            "--upsert",
+            action="store_true",
+            help=(
+                "Сверять строки с уже сохраненными по id и записывать "
+                "только новые и измененные."
+            ),
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help=(
+                "Количество процессов для одновременной загрузки "
+                "независимых файлов. В SQLite процессы одновременно "
+                "только читают и разбирают csv, а пачки записывают "
+                "по очереди, каждую в своей транзакции (--checkpoint)."
+            ),
+        )
+
     def handle(self, *args, **options):
-        for filename, model in FILE_AND_MODEL.items():
-            with open(CSV_PATH + filename, "r", encoding="utf-8") as csvfile:
-                reader = csv.reader(csvfile)
-                next(reader)
-                for row in reader:
-                    model(row)
+        self.reset_changes()
+        if options["resume"]:
+            options["checkpoint"] = True
+        if options["workers"] > 1:
+            if options["max_rows"] is not None:
+                raise CommandError(MAX_ROWS_WITH_WORKERS)
+            self.import_parallel(options)
+        else:
+            budget = options["max_rows"]
+            for filename in FILE_AND_MODEL:
+                if budget is not None and budget <= 0:
+                    break
+                rows = self.import_one(filename, options, budget)
+                if budget is not None:
+                    budget -= rows
+        if not self.changed_rows:
+            self.stdout.write(NOTHING_CHANGED)
+            return
+        # bulk_create не отправляет сигналы, поэтому рейтинг, обновляемый
+        # при сохранении отзывов, пересчитываем: после обычного импорта
+        # целиком, после --upsert - только у затронутых произведений.
+        if options["upsert"]:
+            touched = sorted(self.touched_titles)
+            while touched:
+                chunk, touched = touched[:BATCH_SIZE], touched[BATCH_SIZE:]
+                recalculate_rating(Title.objects.filter(pk__in=chunk))
+        else:
+            recalculate_rating()
+        bulk_data_changed.send(sender=self.__class__)
+        self.stdout.write(self.style.SUCCESS(RATING_RECALCULATED))
+
+    def reset_changes(self):
+        self.changed_rows = 0
+        self.touched_titles = set()
+
+    def import_parallel(self, options):
+        """Загружает файлы по уровням графа зависимостей в пуле процессов."""
+        lock = None
+        if connection.vendor == "sqlite":
+            # Одна долгая транзакция на файл держала бы блокировку SQLite
+            # до конца файла, и остальные процессы падали бы с
+            # "database is locked", поэтому пачки фиксируются по одной
+            # и под общей блокировкой.
+            self.stdout.write(SERIALIZED_WRITES)
+            options["checkpoint"] = True
+            lock = multiprocessing.Lock()
+        # Процессы не должны наследовать открытые соединения родителя.
+        connections.close_all()
+        with ProcessPoolExecutor(
+            max_workers=options["workers"],
+            initializer=init_worker,
+            initargs=(lock,),
+        ) as executor:
+            for level in dependency_levels():
+                self.stdout.write(PARALLEL_IMPORT.format(", ".join(level)))
+                futures = [
+                    executor.submit(import_in_worker, filename, options)
+                    for filename in level
+                ]
+                for future in futures:
+                    changed_rows, touched_titles = future.result()
+                    self.changed_rows += changed_rows
+                    self.touched_titles |= touched_titles
+
+    def import_one(self, filename, options, budget=None):
+        model, build, fields = FILE_AND_MODEL[filename]
+        self.stats = Counter()
+        if options["checkpoint"]:
+            rows = self.import_with_checkpoints(
+                filename, model, build, fields, options, budget
+            )
+        else:
+            rows = self.import_file(filename, model, build, fields, options)
+        if options["upsert"]:
+            self.stdout.write(
+                UPSERT_STATS.format(
+                    filename=filename,
+                    created=self.stats["created"],
+                    updated=self.stats["updated"],
+                    unchanged=rows
+                    - self.stats["created"]
+                    - self.stats["updated"],
+                )
+            )
+        return rows
+
+    def save_batch(self, model, batch, fields, options):
+        if not options["upsert"]:
+            model.objects.bulk_create(batch, batch_size=options["batch_size"])
+            self.stats["created"] += len(batch)
+            self.changed_rows += len(batch)
+            return
+        created, changed = upsert_batch(
+            model, batch, fields, options["batch_size"]
+        )
+        self.stats["created"] += len(created)
+        self.stats["updated"] += len(changed)
+        self.changed_rows += len(created) + len(changed)
+        if model is User and changed:
+            users_bulk_updated.send(sender=self.__class__, changes=changed)
+        if model is Review:
+            self.touched_titles.update(obj.title_id for obj in created)
+            for current, obj in changed:
+                self.touched_titles.update((current.title_id, obj.title_id))
+
+    def report(self, message, filename, rows, started, **kwargs):
+        seconds = time.perf_counter() - started
+        return message.format(
+            filename=filename,
+            rows=rows,
+            seconds=seconds,
+            speed=rows / seconds if seconds else rows,
+            **kwargs,
+        )
+
+    def import_file(self, filename, model, build, fields, options):
+        """Импортирует файл целиком в одной транзакции."""
+        started = time.perf_counter()
+        rows = 0
+        batch_size = options["batch_size"]
+        with open(
+            CSV_PATH + filename, "r", encoding="utf-8"
+        ) as csvfile, transaction.atomic():
+            reader = csv.reader(csvfile)
+            next(reader)
+            for batch in read_batches(reader, build, batch_size):
+                self.save_batch(model, batch, fields, options)
+                rows += len(batch)
+        self.stdout.write(
+            self.style.SUCCESS(
+                self.report(SUCCESS_IMPORT, filename, rows, started)
+            )
+        )
+        return rows
+
+    def import_with_checkpoints(
+        self, filename, model, build, fields, options, budget
+    ):
+        """
+        Импортирует файл пачками, фиксируя каждую пачку в отдельной
+        транзакции вместе с количеством уже загруженных строк.
+        После сбоя импорт продолжается с последней зафиксированной пачки.
+        """
+        with atomic_write():
+            checkpoint, _ = ImportCheckpoint.objects.get_or_create(
+                filename=filename
+            )
+            if not options["resume"]:
+                checkpoint.offset = 0
+                checkpoint.completed = False
+                checkpoint.save()
+        if options["resume"] and checkpoint.completed:
+            self.stdout.write(SKIPPED_IMPORT.format(filename=filename))
+            return 0
+        if options["resume"] and checkpoint.offset:
             self.stdout.write(
-                self.style.SUCCESS(SUCCESS_IMPORT.format(filename))
+                RESUMED_IMPORT.format(
+                    filename=filename, offset=checkpoint.offset
+                )
+            )
+        started = time.perf_counter()
+        rows = 0
+        batch_size = options["batch_size"]
+        with open(CSV_PATH + filename, "r", encoding="utf-8") as csvfile:
+            reader = csv.reader(csvfile)
+            next(reader)
+            # Пропускаем уже загруженные строки, не накапливая их в памяти.
+            next(islice(reader, checkpoint.offset, checkpoint.offset), None)
+            while budget is None or rows < budget:
+                size = batch_size
+                if budget is not None:
+                    size = min(size, budget - rows)
+                batch = [build(row) for row in islice(reader, size)]
+                with atomic_write():
+                    if batch:
+                        self.save_batch(model, batch, fields, options)
+                    checkpoint.offset += len(batch)
+                    checkpoint.completed = len(batch) < size
+                    checkpoint.save()
+                rows += len(batch)
+                if checkpoint.completed:
+                    break
+        if checkpoint.completed:
+            message = self.style.SUCCESS(
+                self.report(SUCCESS_IMPORT, filename, rows, started)
+            )
+        else:
+            message = self.style.WARNING(
+                self.report(
+                    PAUSED_IMPORT,
+                    filename,
+                    rows,
+                    started,
+                    offset=checkpoint.offset,
+                )
             )
+        self.stdout.write(message)
+        return rows
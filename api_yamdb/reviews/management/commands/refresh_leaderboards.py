@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from reviews.leaderboard import refresh_leaderboards
+
+
+REFRESHED = "Пересчитано рейтингов жанров и категорий: {}."
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересчет рейтингов лучших произведений жанров и категорий. "
+        "Запускается периодически, например из cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help=(
+                "Пересчитать все рейтинги, а не только затронутые "
+                "изменениями после прошлого расчета."
+            ),
+        )
+
+    def handle(self, *args, **options):
+        refreshed = refresh_leaderboards(full=options["full"])
+        self.stdout.write(self.style.SUCCESS(REFRESHED.format(refreshed)))
@@ -0,0 +1,146 @@
+import time
+import uuid
+from datetime import timedelta
+
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from reviews.models import OutgoingEmail
+
+
+BATCH_SIZE = 100
+MAX_ATTEMPTS = 5
+RETRY_DELAY = 60
+POLL_INTERVAL = 5
+# Сколько секунд взятые обработчиком письма недоступны остальным. Если
+# обработчик упадет, не сохранив результат, письма отправятся повторно.
+CLAIM_TIMEOUT = 10 * 60
+BATCH_SENT = "Отправлено писем: {sent}, ошибок: {failed}."
+
+
+class Command(BaseCommand):
+    help = "Отправка писем из очереди исходящих писем"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=BATCH_SIZE,
+            help="Количество писем, отправляемых через одно соединение.",
+        )
+        parser.add_argument(
+            "--max-attempts",
+            type=int,
+            default=MAX_ATTEMPTS,
+            help="Количество попыток, после которого письмо не отправляется.",
+        )
+        parser.add_argument(
+            "--retry-delay",
+            type=int,
+            default=RETRY_DELAY,
+            help=(
+                "Задержка перед повторной отправкой в секундах, "
+                "удваивается с каждой попыткой."
+            ),
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Не завершаться, а ждать новые письма.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=POLL_INTERVAL,
+            help="Пауза в секундах, если в очереди нет писем.",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            processed = self.send_batch(options)
+            if processed == options["batch_size"]:
+                continue
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
+
+    def claim(self, batch_size):
+        """
+        Забирает пачку писем одним UPDATE: помечает их меткой обработчика
+        и откладывает на CLAIM_TIMEOUT. Условие на статус и время
+        проверяется в том же UPDATE, поэтому письмо достается только
+        одному обработчику, в том числе в SQLite без SELECT FOR UPDATE.
+        """
+        token = uuid.uuid4()
+        now = timezone.now()
+        pending = OutgoingEmail.objects.filter(
+            status=OutgoingEmail.PENDING, send_after__lte=now
+        )
+        batch = pending.order_by("send_after", "id").values("pk")
+        pending.filter(pk__in=batch[:batch_size]).update(
+            claim=token, send_after=now + timedelta(seconds=CLAIM_TIMEOUT)
+        )
+        return list(OutgoingEmail.objects.filter(claim=token))
+
+    def send_batch(self, options):
+        """Отправляет пачку писем через одно соединение с почтовым
+        сервером и возвращает количество обработанных писем."""
+        emails = self.claim(options["batch_size"])
+        if not emails:
+            return 0
+        sent = []
+        failed = []
+        mail_connection = get_connection()
+        try:
+            mail_connection.open()
+        except Exception as error:
+            # Почтовый сервер недоступен: откладываем всю пачку.
+            for email in emails:
+                self.schedule_retry(email, error, options)
+            failed = emails
+        else:
+            try:
+                for email in emails:
+                    message = EmailMessage(
+                        email.subject,
+                        email.body,
+                        email.from_email,
+                        [email.to],
+                        connection=mail_connection,
+                    )
+                    try:
+                        message.send()
+                    except Exception as error:
+                        self.schedule_retry(email, error, options)
+                        failed.append(email)
+                    else:
+                        email.status = OutgoingEmail.SENT
+                        email.sent_at = timezone.now()
+                        sent.append(email)
+            finally:
+                try:
+                    mail_connection.close()
+                except Exception:
+                    # Письма уже отправлены, ошибка при закрытии
+                    # соединения не должна привести к повторной отправке.
+                    pass
+        OutgoingEmail.objects.bulk_update(
+            emails,
+            ("status", "sent_at", "attempts", "send_after", "last_error"),
+        )
+        self.stdout.write(
+            BATCH_SENT.format(sent=len(sent), failed=len(failed))
+        )
+        return len(emails)
+
+    def schedule_retry(self, email, error, options):
+        """Откладывает письмо с экспоненциально растущей задержкой."""
+        email.attempts += 1
+        email.last_error = repr(error)
+        if email.attempts >= options["max_attempts"]:
+            email.status = OutgoingEmail.FAILED
+            return
+        email.send_after = timezone.now() + timedelta(
+            seconds=options["retry_delay"] * 2 ** (email.attempts - 1)
+        )
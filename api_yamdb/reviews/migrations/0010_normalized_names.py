@@ -0,0 +1,54 @@
+# Generated by Django 3.2 on 2026-10-18 19:17
+
+from django.db import migrations
+import reviews.search
+
+BATCH_SIZE = 1000
+
+
+def fill_normalized(apps, schema_editor):
+    for model_name, source, target in (
+        ('Category', 'name', 'normalized_name'),
+        ('Genre', 'name', 'normalized_name'),
+        ('User', 'username', 'normalized_username'),
+    ):
+        model = apps.get_model('reviews', model_name)
+        max_length = model._meta.get_field(target).max_length
+        batch = []
+        for obj in model.objects.only('pk', source).iterator():
+            setattr(
+                obj,
+                target,
+                reviews.search.normalize(getattr(obj, source))[:max_length],
+            )
+            batch.append(obj)
+            if len(batch) == BATCH_SIZE:
+                model.objects.bulk_update(batch, (target,))
+                batch = []
+        model.objects.bulk_update(batch, (target,))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0009_title_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='normalized_name',
+            field=reviews.search.NormalizedField(db_index=True, default='', editable=False, max_length=256, source='name', verbose_name='Название категории для поиска'),
+        ),
+        migrations.AddField(
+            model_name='genre',
+            name='normalized_name',
+            field=reviews.search.NormalizedField(db_index=True, default='', editable=False, max_length=256, source='name', verbose_name='Название жанра для поиска'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='normalized_username',
+            field=reviews.search.NormalizedField(db_index=True, default='', editable=False, max_length=150, source='username', verbose_name='Имя пользователя для поиска'),
+        ),
+        migrations.RunPython(fill_normalized, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 3.2 on 2026-10-18 19:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0016_claimschange'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CacheInvalidation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('namespace', models.CharField(max_length=255, verbose_name='Пространство имен')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Дата сброса')),
+            ],
+            options={
+                'verbose_name': 'Сброс кеша',
+                'verbose_name_plural': 'Сбросы кеша',
+                'ordering': ('id',),
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2 on 2026-10-18 20:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0017_cacheinvalidation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outgoingemail',
+            name='claim',
+            field=models.UUIDField(blank=True, db_index=True, editable=False, null=True, verbose_name='Метка обработчика'),
+        ),
+    ]
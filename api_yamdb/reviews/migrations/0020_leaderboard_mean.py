@@ -0,0 +1,25 @@
+# Generated by Django 3.2 on 2026-10-18 21:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0019_list_versions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='leaderboardentry',
+            name='mean',
+            field=models.FloatField(default=0, verbose_name='Средняя оценка по сайту при расчете'),
+            preserve_default=False,
+        ),
+        migrations.AlterField(
+            model_name='leaderboardentry',
+            name='title',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='leaderboard_entries', to='reviews.title', verbose_name='Произведение'),
+        ),
+    ]
@@ -1,7 +1,9 @@
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.utils import timezone
 
+from reviews.search import FTS_TABLE, NormalizedField, SearchDocumentField
 from reviews.validators import validate_username, validate_year
 
 
@@ -31,6 +33,11 @@ class User(AbstractUser):
         max_length=USERNAME_MAX_LENGTH,
         unique=True,
     )
+    normalized_username = NormalizedField(
+        verbose_name="Имя пользователя для поиска",
+        max_length=USERNAME_MAX_LENGTH,
+        source="username",
+    )
     email = models.EmailField(
         verbose_name="Электронная почта",
         max_length=EMAIL_MAX_LENGTH,
@@ -58,6 +65,14 @@ class User(AbstractUser):
         default="-" * CONFIRMATION_CODE_LENGTH,
     )
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Запоминаем загруженное имя: оно выводится в отзывах
+        # и комментариях, и его смена меняет их версии.
+        instance._loaded_username = instance.__dict__.get("username")
+        return instance
+
     @property
     def is_user(self):
         """Обычный пользователь."""
@@ -89,6 +104,11 @@ class Category(models.Model):
     name = models.CharField(
         verbose_name="Название категории", max_length=NAME_MAX_LENGTH
     )
+    normalized_name = NormalizedField(
+        verbose_name="Название категории для поиска",
+        max_length=NAME_MAX_LENGTH,
+        source="name",
+    )
     slug = models.SlugField(
         verbose_name="Слаг категории", max_length=SLUG_MAX_LENGTH, unique=True
     )
@@ -109,6 +129,11 @@ class Genre(models.Model):
     name = models.CharField(
         verbose_name="Название жанра", max_length=NAME_MAX_LENGTH
     )
+    normalized_name = NormalizedField(
+        verbose_name="Название жанра для поиска",
+        max_length=NAME_MAX_LENGTH,
+        source="name",
+    )
     slug = models.SlugField(
         verbose_name="Слаг жанра", max_length=SLUG_MAX_LENGTH, unique=True
     )
@@ -148,16 +173,67 @@ class Title(models.Model):
         null=True,
         on_delete=models.SET_NULL,
     )
+    rating = models.FloatField(
+        verbose_name="Рейтинг",
+        null=True,
+        blank=True,
+        db_index=True,
+        editable=False,
+    )
+    review_count = models.PositiveIntegerField(
+        verbose_name="Количество отзывов", default=0, editable=False
+    )
+    score_sum = models.PositiveIntegerField(
+        verbose_name="Сумма оценок", default=0, editable=False
+    )
+    reviews_version = models.PositiveIntegerField(
+        verbose_name="Версия списка отзывов", default=0, editable=False
+    )
+    updated_at = models.DateTimeField(
+        verbose_name="Дата изменения", auto_now=True, db_index=True
+    )
 
     class Meta:
         verbose_name = "Произведение"
         verbose_name_plural = "Произведения"
         ordering = ["name"]
+        # Индекс задан в Meta, а не через db_index: изменение поля
+        # пересоздает таблицу в SQLite вместе с триггерами поиска.
+        indexes = (
+            models.Index(fields=("name",), name="title_name_idx"),
+            models.Index(
+                fields=("-rating", "year"), name="title_rating_year_idx"
+            ),
+        )
 
     def __str__(self):
         return self.name
 
 
+class TitleSearch(models.Model):
+    """
+    Полнотекстовый индекс произведений (виртуальная таблица FTS5).
+    Таблица создается миграцией только в SQLite и заполняется триггерами,
+    через ORM в нее не пишут.
+    """
+
+    title = models.OneToOneField(
+        Title,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column="rowid",
+        related_name="search",
+    )
+    name = models.TextField()
+    description = models.TextField(null=True)
+    document = SearchDocumentField(db_column=FTS_TABLE)
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = FTS_TABLE
+
+
 class GenreTitle(models.Model):
     title = models.ForeignKey(
         Title,
@@ -170,12 +246,19 @@ class GenreTitle(models.Model):
         verbose_name="Жанр",
         related_name="titles",
         on_delete=models.CASCADE,
+        # Поиск по жанру идет по индексу уникальности (genre, title).
+        db_index=False,
     )
 
     class Meta:
         verbose_name = "Произведение"
         verbose_name_plural = "Произведения"
         ordering = ["title"]
+        constraints = (
+            models.UniqueConstraint(
+                fields=("genre", "title"), name="unique_genre_title"
+            ),
+        )
 
     def __str__(self):
         return f"{self.title} - {self.genre}"
@@ -199,10 +282,14 @@ class FeedbackModel(models.Model):
         verbose_name="Текст",
     )
     pub_date = models.DateTimeField("Дата публикации", auto_now_add=True)
+    updated_at = models.DateTimeField(
+        "Дата изменения", auto_now=True, db_index=True
+    )
 
     class Meta:
         abstract = True
-        ordering = ("-pub_date",)
+        # Совпадает с индексами (родитель, -pub_date, -id) у наследников.
+        ordering = ("-pub_date", "-id")
         default_related_name = "%(class)ss"
 
     def __str__(self):
@@ -239,21 +326,190 @@ class Review(FeedbackModel):
             MaxValueValidator(MAX_SCORE, ERROR_SCORE_MIN_MAX),
         ],
     )
+    comments_version = models.PositiveIntegerField(
+        verbose_name="Версия списка комментариев", default=0, editable=False
+    )
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Запоминаем загруженную оценку, чтобы при сохранении
+        # пересчитать рейтинг произведения по разнице оценок.
+        instance._loaded_score = instance.__dict__.get("score")
+        return instance
 
     class Meta(FeedbackModel.Meta):
         verbose_name = "Отзыв"
         verbose_name_plural = "Отзывы"
-        ordering = ("title",)
         constraints = (
             models.UniqueConstraint(
                 fields=["author", "title"], name="unique_title"
             ),
         )
+        indexes = (
+            models.Index(
+                fields=("title", "-pub_date", "-id"),
+                name="review_title_pub_date_idx",
+            ),
+        )
 
     def __str__(self):
         return f"{self.title} - оценка: {self.score}"
 
 
+class TitleStats(models.Model):
+    """
+    Распределение оценок произведения: сколько отзывов с каждой оценкой.
+    Счетчики сдвигаются сигналами при записи отзывов. Строка заводится
+    с первым отзывом, у произведения без строки все счетчики нулевые.
+    """
+
+    SCORES = range(Review.MIN_SCORE, Review.MAX_SCORE + 1)
+
+    title = models.OneToOneField(
+        Title,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="stats",
+        verbose_name="Произведение",
+    )
+    score_1 = models.PositiveIntegerField("Оценок 1", default=0)
+    score_2 = models.PositiveIntegerField("Оценок 2", default=0)
+    score_3 = models.PositiveIntegerField("Оценок 3", default=0)
+    score_4 = models.PositiveIntegerField("Оценок 4", default=0)
+    score_5 = models.PositiveIntegerField("Оценок 5", default=0)
+    score_6 = models.PositiveIntegerField("Оценок 6", default=0)
+    score_7 = models.PositiveIntegerField("Оценок 7", default=0)
+    score_8 = models.PositiveIntegerField("Оценок 8", default=0)
+    score_9 = models.PositiveIntegerField("Оценок 9", default=0)
+    score_10 = models.PositiveIntegerField("Оценок 10", default=0)
+
+    class Meta:
+        verbose_name = "Распределение оценок"
+        verbose_name_plural = "Распределения оценок"
+
+    def __str__(self):
+        return f"{self.title_id}: {self.histogram}"
+
+    @staticmethod
+    def score_field(score):
+        return f"score_{score}"
+
+    @property
+    def histogram(self):
+        return {
+            score: getattr(self, self.score_field(score))
+            for score in self.SCORES
+        }
+
+
+class LeaderboardEntry(models.Model):
+    """
+    Место произведения в рейтинге лучших жанра или категории.
+    Таблица - материализованный результат команды
+    refresh_leaderboards, в запросах ее только читают. Места удаленных
+    произведений остаются с пустым произведением до следующего расчета,
+    чтобы он пересчитал их рейтинги.
+    """
+
+    genre = models.ForeignKey(
+        Genre,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="leaderboard",
+        # Места читаются по индексам уникальности (genre, position)
+        # и (category, position), отдельные индексы по FK не нужны.
+        db_index=False,
+        verbose_name="Жанр",
+    )
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="leaderboard",
+        db_index=False,
+        verbose_name="Категория",
+    )
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name="leaderboard_entries",
+        verbose_name="Произведение",
+    )
+    position = models.PositiveIntegerField(verbose_name="Место")
+    score = models.FloatField(verbose_name="Взвешенный рейтинг")
+    mean = models.FloatField(
+        verbose_name="Средняя оценка по сайту при расчете"
+    )
+    refreshed_at = models.DateTimeField(
+        verbose_name="Дата расчета", db_index=True
+    )
+
+    class Meta:
+        verbose_name = "Место в рейтинге"
+        verbose_name_plural = "Рейтинги лучших"
+        ordering = ("position",)
+        constraints = (
+            models.CheckConstraint(
+                check=models.Q(genre__isnull=False, category__isnull=True)
+                | models.Q(genre__isnull=True, category__isnull=False),
+                name="leaderboard_single_scope",
+            ),
+            models.UniqueConstraint(
+                fields=("genre", "position"), name="unique_genre_position"
+            ),
+            models.UniqueConstraint(
+                fields=("category", "position"),
+                name="unique_category_position",
+            ),
+        )
+
+    def __str__(self):
+        scope = self.genre_id or self.category_id
+        return f"{scope}: {self.position}. {self.title_id}"
+
+
+class SimilarTitle(models.Model):
+    """
+    Похожее произведение: косинусная близость оценок, центрированных
+    по средней оценке пользователя. Таблицу заполняет команда
+    build_similar_titles, в запросах ее только читают.
+    """
+
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name="similar_titles",
+        # Похожие читаются по индексу уникальности (title, position).
+        db_index=False,
+        verbose_name="Произведение",
+    )
+    similar = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name="+",
+        verbose_name="Похожее произведение",
+    )
+    position = models.PositiveIntegerField(verbose_name="Место")
+    score = models.FloatField(verbose_name="Близость")
+
+    class Meta:
+        verbose_name = "Похожее произведение"
+        verbose_name_plural = "Похожие произведения"
+        ordering = ("title", "position")
+        constraints = (
+            models.UniqueConstraint(
+                fields=("title", "position"), name="unique_similar_position"
+            ),
+        )
+
+    def __str__(self):
+        return f"{self.title_id} ~ {self.similar_id}: {self.score:.3f}"
+
+
 class Comment(FeedbackModel):
     """Комментарии пользователей."""
 
@@ -266,6 +522,187 @@ class Comment(FeedbackModel):
     class Meta(FeedbackModel.Meta):
         verbose_name = "Комментарий"
         verbose_name_plural = "Комментарии"
+        indexes = (
+            models.Index(
+                fields=("review", "-pub_date", "-id"),
+                name="comment_review_pub_date_idx",
+            ),
+        )
 
     def __str__(self):
         return self.review[: Comment.REVIEW_MAX_OUTPUT_LENGTH]
+
+
+class ImportCheckpoint(models.Model):
+    """Позиция последней зафиксированной строки при импорте csv файла."""
+
+    FILENAME_MAX_LENGTH = 255
+
+    filename = models.CharField(
+        verbose_name="Файл", max_length=FILENAME_MAX_LENGTH, unique=True
+    )
+    offset = models.PositiveBigIntegerField(
+        verbose_name="Импортировано строк", default=0
+    )
+    completed = models.BooleanField(verbose_name="Завершен", default=False)
+    updated_at = models.DateTimeField(
+        verbose_name="Дата обновления", auto_now=True
+    )
+
+    class Meta:
+        verbose_name = "Контрольная точка импорта"
+        verbose_name_plural = "Контрольные точки импорта"
+        ordering = ("filename",)
+
+    def __str__(self):
+        return f"{self.filename}: {self.offset}"
+
+
+class OutgoingEmail(models.Model):
+    """Письмо в очереди на отправку."""
+
+    PENDING = "pending"
+    SENT = "sent"
+    FAILED = "failed"
+
+    STATUS_CHOICES = (
+        (PENDING, "Ожидает отправки"),
+        (SENT, "Отправлено"),
+        (FAILED, "Не отправлено"),
+    )
+
+    SUBJECT_MAX_LENGTH = 255
+    EMAIL_MAX_LENGTH = 254
+
+    subject = models.CharField(
+        verbose_name="Тема", max_length=SUBJECT_MAX_LENGTH
+    )
+    body = models.TextField(verbose_name="Текст")
+    from_email = models.EmailField(
+        verbose_name="Отправитель", max_length=EMAIL_MAX_LENGTH
+    )
+    to = models.EmailField(
+        verbose_name="Получатель", max_length=EMAIL_MAX_LENGTH
+    )
+    status = models.CharField(
+        verbose_name="Статус",
+        max_length=max(len(status) for status, _ in STATUS_CHOICES),
+        choices=STATUS_CHOICES,
+        default=PENDING,
+    )
+    attempts = models.PositiveSmallIntegerField(
+        verbose_name="Попыток отправки", default=0
+    )
+    send_after = models.DateTimeField(
+        verbose_name="Отправить после", default=timezone.now
+    )
+    last_error = models.TextField(verbose_name="Последняя ошибка", blank=True)
+    created_at = models.DateTimeField(
+        verbose_name="Дата создания", auto_now_add=True
+    )
+    sent_at = models.DateTimeField(
+        verbose_name="Дата отправки", null=True, blank=True
+    )
+    claim = models.UUIDField(
+        verbose_name="Метка обработчика",
+        null=True,
+        blank=True,
+        editable=False,
+        db_index=True,
+    )
+
+    class Meta:
+        verbose_name = "Исходящее письмо"
+        verbose_name_plural = "Исходящие письма"
+        ordering = ("send_after", "id")
+        indexes = (
+            models.Index(
+                fields=("status", "send_after"),
+                name="outgoing_email_queue_idx",
+            ),
+        )
+
+    def __str__(self):
+        return f"{self.to}: {self.subject}"
+
+
+class RevokedToken(models.Model):
+    """Отозванный до истечения срока токен доступа."""
+
+    JTI_MAX_LENGTH = 255
+
+    jti = models.CharField(
+        verbose_name="Идентификатор токена",
+        max_length=JTI_MAX_LENGTH,
+        unique=True,
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="revoked_tokens",
+        verbose_name="Пользователь",
+    )
+    expires_at = models.DateTimeField(
+        verbose_name="Срок действия токена", db_index=True
+    )
+    revoked_at = models.DateTimeField(
+        verbose_name="Дата отзыва", auto_now_add=True
+    )
+
+    class Meta:
+        verbose_name = "Отозванный токен"
+        verbose_name_plural = "Отозванные токены"
+        ordering = ("id",)
+
+    def __str__(self):
+        return self.jti
+
+
+class ClaimsChange(models.Model):
+    """
+    Изменение роли или статуса пользователя: токены, выданные раньше,
+    больше не доверяют своим claims.
+    """
+
+    # Без ограничения в БД: запись об удалении пользователя должна
+    # пережить его удаление.
+    user = models.ForeignKey(
+        User,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        db_index=False,
+        related_name="+",
+        verbose_name="Пользователь",
+    )
+    changed_at = models.DateTimeField(
+        verbose_name="Дата изменения", auto_now_add=True, db_index=True
+    )
+
+    class Meta:
+        verbose_name = "Изменение данных токенов"
+        verbose_name_plural = "Изменения данных токенов"
+        ordering = ("id",)
+
+    def __str__(self):
+        return f"{self.user_id}: {self.changed_at}"
+
+
+class CacheInvalidation(models.Model):
+    """Сброс пространства имен кеша ответов, общий для всех процессов."""
+
+    NAMESPACE_MAX_LENGTH = 255
+
+    namespace = models.CharField(
+        verbose_name="Пространство имен", max_length=NAMESPACE_MAX_LENGTH
+    )
+    created_at = models.DateTimeField(
+        verbose_name="Дата сброса", auto_now_add=True, db_index=True
+    )
+
+    class Meta:
+        verbose_name = "Сброс кеша"
+        verbose_name_plural = "Сбросы кеша"
+        ordering = ("id",)
+
+    def __str__(self):
+        return self.namespace
@@ -0,0 +1,134 @@
+"""Поддержка денормализованного рейтинга произведений.
+
+Рейтинг, количество отзывов и сумма оценок хранятся в самой таблице
+произведений, распределение оценок - в таблице TitleStats. Все они
+обновляются инкрементально при изменении отзывов.
+"""
+from django.db import transaction
+from django.db.models import (
+    Case,
+    Count,
+    F,
+    FloatField,
+    OuterRef,
+    Q,
+    Subquery,
+    Sum,
+    Value,
+    When,
+)
+from django.db.models.functions import Cast, Coalesce, Now
+
+from reviews.models import Review, Title, TitleStats
+
+
+RATING_EXPRESSION = Case(
+    When(review_count=0, then=Value(None)),
+    default=Cast(F("score_sum"), FloatField()) / F("review_count"),
+    output_field=FloatField(),
+)
+
+
+def _reviews_aggregate(aggregate):
+    return Coalesce(
+        Subquery(
+            Review.objects.filter(title=OuterRef("pk"))
+            .order_by()
+            .values("title")
+            .annotate(value=aggregate)
+            .values("value")
+        ),
+        0,
+    )
+
+
+def apply_review_delta(title_id, count_delta, score_delta):
+    """Атомарно сдвигает счетчики произведения и пересчитывает рейтинг."""
+    titles = Title.objects.filter(pk=title_id)
+    with transaction.atomic():
+        titles.update(
+            review_count=F("review_count") + count_delta,
+            score_sum=F("score_sum") + score_delta,
+        )
+        titles.update(rating=RATING_EXPRESSION, updated_at=Now())
+
+
+def apply_histogram_delta(title_id, old_score=None, new_score=None):
+    """Переносит отзыв между счетчиками распределения оценок."""
+    if old_score == new_score:
+        return
+    changes = {}
+    if old_score is not None:
+        field = TitleStats.score_field(old_score)
+        changes[field] = F(field) - 1
+    if new_score is not None:
+        field = TitleStats.score_field(new_score)
+        changes[field] = F(field) + 1
+    stats = TitleStats.objects.filter(title_id=title_id)
+    with transaction.atomic():
+        updated = stats.update(**changes)
+        # Строки нет только до первого отзыва, и ее может одновременно
+        # завести другой процесс: пустая строка вставляется без ошибки
+        # при конфликте, а сдвиг повторяется. При удалении отзыва вместе
+        # с произведением строку заводить нельзя.
+        if not updated and new_score is not None:
+            TitleStats.objects.bulk_create(
+                [TitleStats(title_id=title_id)], ignore_conflicts=True
+            )
+            stats.update(**changes)
+
+
+def find_rating_drift(queryset=None):
+    """Возвращает произведения, у которых рейтинг расходится с отзывами.
+
+    У найденных произведений доступны аннотации `actual_count` и
+    `actual_sum` со значениями, посчитанными по таблице отзывов.
+    """
+    if queryset is None:
+        queryset = Title.objects.all()
+    return (
+        queryset.annotate(
+            actual_count=_reviews_aggregate(Count("id")),
+            actual_sum=_reviews_aggregate(Sum("score")),
+        )
+        .filter(
+            ~Q(review_count=F("actual_count"))
+            | ~Q(score_sum=F("actual_sum"))
+            | Q(review_count=0, rating__isnull=False)
+            | Q(review_count__gt=0, rating__isnull=True)
+            | (Q(review_count__gt=0) & ~Q(rating=RATING_EXPRESSION))
+        )
+        .order_by("id")
+    )
+
+
+def recalculate_rating(queryset=None):
+    """Пересчитывает счетчики и рейтинг по таблице отзывов."""
+    if queryset is None:
+        queryset = Title.objects.all()
+    with transaction.atomic():
+        queryset.update(
+            review_count=_reviews_aggregate(Count("id")),
+            score_sum=_reviews_aggregate(Sum("score")),
+        )
+        queryset.update(rating=RATING_EXPRESSION, updated_at=Now())
+        recalculate_histogram(queryset)
+
+
+def recalculate_histogram(queryset=None):
+    """Пересчитывает распределение оценок по таблице отзывов."""
+    if queryset is None:
+        queryset = Title.objects.all()
+    stats = {}
+    for title_id, score, count in (
+        Review.objects.filter(title__in=queryset.values("pk"))
+        .order_by()
+        .values_list("title_id", "score")
+        .annotate(count=Count("id"))
+    ):
+        if title_id not in stats:
+            stats[title_id] = TitleStats(title_id=title_id)
+        setattr(stats[title_id], TitleStats.score_field(score), count)
+    with transaction.atomic():
+        TitleStats.objects.filter(title__in=queryset.values("pk")).delete()
+        TitleStats.objects.bulk_create(stats.values(), batch_size=1000)
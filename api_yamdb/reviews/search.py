@@ -0,0 +1,137 @@
+"""Поиск: полнотекстовый по произведениям и по префиксу по названиям.
+
+Полнотекстовый поиск работает на FTS5 (только SQLite). Индекс -
+виртуальная таблица reviews_title_fts с внешним содержимым
+(content=reviews_title), ее создает миграция 0009_title_search. Триггеры
+в БД обновляют индекс при любой записи в таблицу произведений, в том
+числе через bulk_create и update(). Ранжирование - bm25, совпадение
+в названии весит в 10 раз больше, чем в описании.
+
+SQLite выполняет AddField и AlterField, пересоздавая таблицу, и теряет
+ее триггеры, поэтому после каждого migrate триггеры восстанавливаются
+(`ensure_search_triggers`).
+"""
+import re
+import unicodedata
+
+from django.db import models
+
+
+FTS_TABLE = "reviews_title_fts"
+MAX_QUERY_TOKENS = 10
+TOKEN_PATTERN = re.compile(r"\w+")
+SEARCH_TRIGGERS = {
+    "reviews_title_fts_insert": """
+        CREATE TRIGGER IF NOT EXISTS reviews_title_fts_insert
+        AFTER INSERT ON reviews_title BEGIN
+            INSERT INTO reviews_title_fts(rowid, name, description)
+            VALUES (new.id, new.name, new.description);
+        END
+    """,
+    "reviews_title_fts_delete": """
+        CREATE TRIGGER IF NOT EXISTS reviews_title_fts_delete
+        AFTER DELETE ON reviews_title BEGIN
+            INSERT INTO reviews_title_fts(
+                reviews_title_fts, rowid, name, description
+            )
+            VALUES ('delete', old.id, old.name, old.description);
+        END
+    """,
+    "reviews_title_fts_update": """
+        CREATE TRIGGER IF NOT EXISTS reviews_title_fts_update
+        AFTER UPDATE OF name, description ON reviews_title BEGIN
+            INSERT INTO reviews_title_fts(
+                reviews_title_fts, rowid, name, description
+            )
+            VALUES ('delete', old.id, old.name, old.description);
+            INSERT INTO reviews_title_fts(rowid, name, description)
+            VALUES (new.id, new.name, new.description);
+        END
+    """,
+}
+
+
+def ensure_search_triggers(connection):
+    """
+    Создает недостающие триггеры индекса поиска. Если триггеров
+    не хватало, записи без них могли не попасть в индекс, поэтому
+    индекс перестраивается. Возвращает имена созданных триггеров.
+    """
+    if connection.vendor != "sqlite":
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE name IN (%s)"
+            % ", ".join(["%s"] * (len(SEARCH_TRIGGERS) + 1)),
+            [FTS_TABLE, *SEARCH_TRIGGERS],
+        )
+        existing = {name for name, in cursor.fetchall()}
+        if FTS_TABLE not in existing:
+            # Миграция с индексом еще не применена.
+            return []
+        missing = [name for name in SEARCH_TRIGGERS if name not in existing]
+        for name in missing:
+            cursor.execute(SEARCH_TRIGGERS[name])
+        if missing:
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"
+            )
+    return missing
+
+
+def build_match_query(value):
+    """
+    Превращает пользовательский ввод в запрос FTS5: каждое слово берется
+    в кавычки, чтобы операторы и спецсимволы FTS5 не влияли на запрос,
+    последнее слово ищется по префиксу. Возвращает None, если слов нет.
+    """
+    tokens = TOKEN_PATTERN.findall(value)[:MAX_QUERY_TOKENS]
+    if not tokens:
+        return None
+    return " ".join(f'"{token}"' for token in tokens) + "*"
+
+
+class SearchDocumentField(models.TextField):
+    """Скрытый столбец FTS5 с именем таблицы, к которому применяется
+    оператор MATCH."""
+
+
+@SearchDocumentField.register_lookup
+class Match(models.Lookup):
+    lookup_name = "match"
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs} MATCH {rhs}", lhs_params + rhs_params
+
+
+def normalize(value):
+    """Приводит строку к виду для поиска без учета регистра."""
+    return unicodedata.normalize("NFKC", value or "").casefold()
+
+
+class NormalizedField(models.CharField):
+    """
+    Индексированная нормализованная копия поля `source`. Значение
+    вычисляется при каждом сохранении, в том числе через bulk_create,
+    и позволяет искать по префиксу диапазонным запросом по индексу.
+    """
+
+    def __init__(self, *args, source=None, **kwargs):
+        self.source = source
+        kwargs.setdefault("editable", False)
+        kwargs.setdefault("db_index", True)
+        kwargs.setdefault("default", "")
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        kwargs["source"] = self.source
+        return name, path, args, kwargs
+
+    def pre_save(self, model_instance, add):
+        value = normalize(getattr(model_instance, self.source))
+        value = value[: self.max_length]
+        setattr(model_instance, self.attname, value)
+        return value
@@ -0,0 +1,160 @@
+from django.db import connections
+from django.db.models import F
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_migrate,
+    post_save,
+    pre_delete,
+)
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+
+from reviews.models import (
+    Category,
+    Comment,
+    Genre,
+    GenreTitle,
+    Review,
+    Title,
+    User,
+)
+from reviews.rating import (
+    apply_histogram_delta,
+    apply_review_delta,
+    recalculate_rating,
+)
+from reviews.search import ensure_search_triggers
+
+
+# Отправляется командами, которые меняют данные в обход сигналов моделей
+# (bulk_create, update), чтобы сбросить зависящие от данных кеши.
+bulk_data_changed = Signal()
+
+# Отправляется после bulk_update пользователей с парами (сохраненная
+# запись, новый объект) в `changes`: post_save при этом не срабатывает.
+users_bulk_updated = Signal()
+
+# Отправляется после пересчета таблицы похожих произведений, чтобы
+# сбросить построенные по ней подборки рекомендаций.
+similar_titles_changed = Signal()
+
+
+@receiver(post_save, sender=Review)
+def review_saved(sender, instance, created, raw=False, **kwargs):
+    """Учитывает новую оценку или изменение оценки в рейтинге."""
+    if raw:
+        return
+    if created:
+        apply_review_delta(instance.title_id, 1, instance.score)
+        apply_histogram_delta(instance.title_id, new_score=instance.score)
+    elif not hasattr(instance, "_loaded_score"):
+        # Прежняя оценка неизвестна: пересчитываем рейтинг целиком.
+        recalculate_rating(Title.objects.filter(pk=instance.title_id))
+    elif instance._loaded_score != instance.score:
+        apply_review_delta(
+            instance.title_id, 0, instance.score - instance._loaded_score
+        )
+        apply_histogram_delta(
+            instance.title_id, instance._loaded_score, instance.score
+        )
+    instance._loaded_score = instance.score
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def review_list_changed(sender, instance, raw=False, **kwargs):
+    """Меняет версию списка отзывов произведения для ETag."""
+    if not raw:
+        Title.objects.filter(pk=instance.title_id).update(
+            reviews_version=F("reviews_version") + 1
+        )
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_list_changed(sender, instance, raw=False, **kwargs):
+    """Меняет версию списка комментариев отзыва для ETag."""
+    if not raw:
+        Review.objects.filter(pk=instance.review_id).update(
+            comments_version=F("comments_version") + 1
+        )
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    """Исключает оценку удаленного отзыва из рейтинга.
+
+    Срабатывает и при каскадном удалении отзывов вместе с пользователем.
+    """
+    apply_review_delta(instance.title_id, -1, -instance.score)
+    apply_histogram_delta(instance.title_id, old_score=instance.score)
+
+
+def touch_titles(titles):
+    """Отмечает изменение произведений, в представлении которых выводятся
+    связанные данные: жанры, категория."""
+    titles.update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Genre)
+@receiver(pre_delete, sender=Genre)
+def genre_changed(sender, instance, created=False, raw=False, **kwargs):
+    if not created and not raw:
+        touch_titles(Title.objects.filter(genre=instance))
+
+
+@receiver(post_save, sender=Category)
+@receiver(pre_delete, sender=Category)
+def category_changed(sender, instance, created=False, raw=False, **kwargs):
+    if not created and not raw:
+        touch_titles(Title.objects.filter(category=instance))
+
+
+@receiver(post_save, sender=GenreTitle)
+@receiver(post_delete, sender=GenreTitle)
+def genre_title_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        touch_titles(Title.objects.filter(pk=instance.title_id))
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def title_genres_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+    if not reverse:
+        touch_titles(Title.objects.filter(pk=instance.pk))
+    elif action == "pre_clear":
+        touch_titles(Title.objects.filter(genre=instance))
+    else:
+        touch_titles(Title.objects.filter(pk__in=pk_set))
+
+
+@receiver(post_save, sender=User)
+def user_renamed(sender, instance, created, raw=False, **kwargs):
+    """
+    Отмечает изменение отзывов и комментариев пользователя при смене
+    имени: оно выводится в них, и прежние ETag становятся неверными.
+    """
+    if created or raw:
+        return
+    loaded_username = getattr(instance, "_loaded_username", None)
+    if loaded_username != instance.username:
+        now = timezone.now()
+        Review.objects.filter(author=instance).update(updated_at=now)
+        Comment.objects.filter(author=instance).update(updated_at=now)
+        Title.objects.filter(reviews__author=instance).update(
+            reviews_version=F("reviews_version") + 1
+        )
+        Review.objects.filter(comments__author=instance).update(
+            comments_version=F("comments_version") + 1
+        )
+    instance._loaded_username = instance.username
+
+
+@receiver(post_migrate)
+def search_triggers_restored(sender, app_config, using, **kwargs):
+    """Возвращает триггеры индекса поиска, которые SQLite удаляет при
+    пересоздании таблицы произведений в миграциях."""
+    if app_config.label == "reviews":
+        ensure_search_triggers(connections[using])
@@ -0,0 +1,143 @@
+"""Похожие произведения по оценкам пользователей (item-item).
+
+Оценки образуют разреженную матрицу пользователь x произведение.
+Оценки каждого пользователя центрируются по его средней оценке, и
+близость двух произведений - косинус между их столбцами:
+
+    sim(a, b) = sum(r_ua * r_ub) / (||r_a|| * ||r_b||).
+
+Скалярные произведения считаются по одному произведению за раз: для
+произведения перебираются его зрители и их остальные оценки, поэтому
+нулевые клетки матрицы не перебираются, а в памяти кроме самих оценок
+держатся только суммы для соседей текущего произведения и по `top_k`
+лучших соседей каждого. Каждая пара считается дважды, с обеих сторон;
+время расчета - сумма квадратов длин строк, поэтому длина строки
+ограничена последними `max_user_reviews` отзывами пользователя.
+"""
+import heapq
+import math
+from collections import defaultdict
+
+from django.db import transaction
+
+from reviews.models import Review, SimilarTitle
+
+
+def centered_ratings(max_user_reviews):
+    """
+    Строки матрицы: для каждого пользователя список пар
+    (произведение, оценка минус средняя оценка пользователя) по его
+    последним `max_user_reviews` отзывам.
+    """
+    ratings = defaultdict(list)
+    for author_id, title_id, score in (
+        Review.objects.order_by("author_id", "-pub_date", "-id")
+        .values_list("author_id", "title_id", "score")
+        .iterator()
+    ):
+        if len(ratings[author_id]) < max_user_reviews:
+            ratings[author_id].append((title_id, score))
+    rows = []
+    for user_ratings in ratings.values():
+        if len(user_ratings) < 2:
+            # Одна оценка после центрирования равна нулю.
+            continue
+        mean = sum(score for _, score in user_ratings) / len(user_ratings)
+        rows.append(
+            [
+                (title_id, score - mean)
+                for title_id, score in sorted(user_ratings)
+                if score != mean
+            ]
+        )
+    return rows
+
+
+def find_similar(rows, top_k, min_common):
+    """
+    Для каждого произведения - до `top_k` пар (близость, произведение)
+    с положительной близостью, по убыванию. Пары, которые оценили
+    меньше `min_common` пользователей, не учитываются: на одном-двух
+    общих зрителях косинус случаен.
+    """
+    columns = defaultdict(list)
+    for row in rows:
+        for title_id, value in row:
+            columns[title_id].append((row, value))
+    norms = {
+        title_id: math.sqrt(sum(value * value for _, value in column))
+        for title_id, column in columns.items()
+    }
+    similar = {}
+    for title_a, column in columns.items():
+        pairs = defaultdict(lambda: [0.0, 0])
+        for row, value_a in column:
+            for title_b, value_b in row:
+                if title_b != title_a:
+                    pair = pairs[title_b]
+                    pair[0] += value_a * value_b
+                    pair[1] += 1
+        candidates = heapq.nlargest(
+            top_k,
+            (
+                (dot / (norms[title_a] * norms[title_b]), title_b)
+                for title_b, (dot, common) in pairs.items()
+                if common >= min_common and dot > 0
+            ),
+        )
+        if candidates:
+            similar[title_a] = candidates
+    return similar
+
+
+def build_similar_titles(top_k, min_common, max_user_reviews):
+    """Пересчитывает таблицу похожих произведений целиком.
+    Возвращает количество произведений, для которых нашлись похожие."""
+    similar = find_similar(
+        centered_ratings(max_user_reviews), top_k, min_common
+    )
+    entries = [
+        SimilarTitle(
+            title_id=title_id,
+            similar_id=similar_id,
+            position=position,
+            score=score,
+        )
+        for title_id, candidates in similar.items()
+        for position, (score, similar_id) in enumerate(candidates, start=1)
+    ]
+    with transaction.atomic():
+        SimilarTitle.objects.all().delete()
+        SimilarTitle.objects.bulk_create(entries, batch_size=1000)
+    return len(similar)
+
+
+def recommend_titles(user_id, limit, min_score):
+    """
+    До `limit` пар (оценка, произведение) для пользователя: похожие на
+    произведения, которые он оценил не ниже `min_score`. Оценка - сумма
+    близостей к ним, умноженных на оценки пользователя, поэтому выше
+    стоят похожие сразу на несколько любимых. Произведения, на которые
+    пользователь уже написал отзыв, не предлагаются.
+    """
+    reviewed = dict(
+        Review.objects.filter(author_id=user_id).values_list(
+            "title_id", "score"
+        )
+    )
+    liked = {
+        title_id: score
+        for title_id, score in reviewed.items()
+        if score >= min_score
+    }
+    if not liked:
+        return []
+    candidates = defaultdict(float)
+    for title_id, similar_id, similarity in SimilarTitle.objects.filter(
+        title_id__in=liked
+    ).values_list("title_id", "similar_id", "score"):
+        if similar_id not in reviewed:
+            candidates[similar_id] += similarity * liked[title_id]
+    return heapq.nlargest(
+        limit, ((score, title_id) for title_id, score in candidates.items())
+    )
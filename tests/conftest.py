@@ -1,6 +1,8 @@
 import os
 import sys
 
+import pytest
+from django.core.cache import cache
 from django.utils.version import get_version
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -33,3 +35,23 @@ assert get_version() < '4.0.0', 'Пожалуйста, используйте в
 pytest_plugins = [
     'tests.fixtures.fixture_user',
 ]
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Закешированные ответы API и индекс подсказок в памяти не должны
+    переживать очистку БД между тестами."""
+    from api.cache import cache_versions
+    from api.suggest import suggest_index
+
+    cache.clear()
+    cache_versions.reset()
+    suggest_index.reset()
+
+
+@pytest.fixture(autouse=True)
+def check_intervals(settings):
+    """Процесс перечитывает общие таблицы только в начале теста: иначе
+    количество запросов к БД зависело бы от длительности теста."""
+    settings.TOKEN_REVOCATION_CHECK_INTERVAL = 60 * 60
+    settings.CACHE_INVALIDATION_CHECK_INTERVAL = 60 * 60
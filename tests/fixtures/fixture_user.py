@@ -2,6 +2,8 @@ import pytest
 from rest_framework.test import APIClient
 from rest_framework_simplejwt.tokens import AccessToken
 
+from api.revocation import revoked_tokens
+
 
 @pytest.fixture
 def user_superuser(django_user_model):
@@ -109,3 +111,12 @@ def user_client(token_user):
     client = APIClient()
     client.credentials(HTTP_AUTHORIZATION=f'Bearer {token_user["access"]}')
     return client
+
+
+@pytest.fixture
+def revocation_list(transactional_db):
+    """Список отозванных токенов, прочитанный из чистой БД заранее,
+    чтобы его загрузка не попадала в подсчет запросов."""
+    revoked_tokens.reset()
+    revoked_tokens.check()
+    return revoked_tokens
@@ -0,0 +1,99 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from reviews.models import Title
+from tests.utils import create_reviews
+
+
+@pytest.mark.django_db(transaction=True)
+class Test08Rating:
+
+    def get_title(self, title_id):
+        return Title.objects.get(pk=title_id)
+
+    def test_01_rating_follows_reviews(self, admin_client, admin, user,
+                                       user_client, moderator,
+                                       moderator_client):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        reviews, titles = create_reviews(admin_client, author_map)
+        title = self.get_title(titles[0]['id'])
+        assert (title.review_count, title.score_sum, title.rating) == (
+            3, 15, 5
+        ), (
+            'Проверьте, что при создании отзыва у произведения обновляются '
+            'поля `review_count`, `score_sum` и `rating`.'
+        )
+
+        user_client.patch(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[1]["id"]}/',
+            data={'score': 8}
+        )
+        title = self.get_title(titles[0]['id'])
+        assert (title.review_count, title.score_sum, title.rating) == (
+            3, 18, 6
+        ), (
+            'Проверьте, что при изменении оценки отзыва рейтинг '
+            'произведения пересчитывается.'
+        )
+
+        admin_client.delete(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/'
+        )
+        title = self.get_title(titles[0]['id'])
+        assert (title.review_count, title.score_sum, title.rating) == (
+            2, 13, 6.5
+        ), (
+            'Проверьте, что при удалении отзыва рейтинг произведения '
+            'пересчитывается.'
+        )
+
+        user.delete()
+        moderator.delete()
+        title = self.get_title(titles[0]['id'])
+        assert (title.review_count, title.score_sum, title.rating) == (
+            0, 0, None
+        ), (
+            'Проверьте, что при каскадном удалении отзывов вместе с '
+            'пользователем рейтинг произведения сбрасывается.'
+        )
+
+    def test_02_check_rating_command(self, admin_client, admin, user,
+                                     user_client):
+        author_map = {admin: admin_client, user: user_client}
+        _, titles = create_reviews(admin_client, author_map)
+        Title.objects.filter(pk=titles[0]['id']).update(
+            review_count=7, rating=1
+        )
+        Title.objects.filter(pk=titles[1]['id']).update(rating=3)
+
+        out = StringIO()
+        call_command('check_rating', stdout=out)
+        assert 'Найдено произведений с расхождениями: 2.' in out.getvalue(), (
+            'Проверьте, что команда `check_rating` находит произведения с '
+            'рассогласованным рейтингом.'
+        )
+        assert self.get_title(titles[0]['id']).review_count == 7, (
+            'Проверьте, что без флага `--fix` команда `check_rating` не '
+            'изменяет данные.'
+        )
+
+        call_command('check_rating', '--fix', stdout=StringIO())
+        first, second = (
+            self.get_title(titles[0]['id']), self.get_title(titles[1]['id'])
+        )
+        assert (first.review_count, first.score_sum, first.rating) == (
+            2, 10, 5
+        ), (
+            'Проверьте, что команда `check_rating --fix` пересчитывает '
+            'рейтинг произведений по отзывам.'
+        )
+        assert second.rating is None, (
+            'Проверьте, что у произведения без отзывов после '
+            '`check_rating --fix` рейтинг равен `None`.'
+        )
@@ -0,0 +1,36 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_catalog
+
+
+TITLE_LIST_QUERIES = 3
+TITLE_DETAIL_QUERIES = 2
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09TitleQueries:
+
+    @pytest.mark.parametrize('titles_count', (1, 5))
+    def test_01_title_list_queries(self, client, django_assert_num_queries,
+                                   titles_count):
+        create_catalog(titles_count)
+        with django_assert_num_queries(TITLE_LIST_QUERIES):
+            response = client.get('/api/v1/titles/')
+        assert response.status_code == HTTPStatus.OK
+        assert len(response.json()['results']) == titles_count
+        assert all(
+            len(title['genre']) == 2 and title['category']['slug'] == 'films'
+            for title in response.json()['results']
+        ), (
+            'Проверьте, что ответ на GET-запрос к `/api/v1/titles/` '
+            'содержит жанры и категорию произведений.'
+        )
+
+    def test_02_title_detail_queries(self, client, django_assert_num_queries):
+        title = create_catalog(1)[0]
+        with django_assert_num_queries(TITLE_DETAIL_QUERIES):
+            response = client.get(f'/api/v1/titles/{title.id}/')
+        assert response.status_code == HTTPStatus.OK
+        assert len(response.json()['genre']) == 2
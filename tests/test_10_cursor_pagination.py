@@ -0,0 +1,121 @@
+from http import HTTPStatus
+
+import pytest
+
+from reviews.models import Comment, Review, Title
+
+
+def walk_cursor_pages(client, url):
+    response = client.get(url, {'cursor': ''})
+    pages = []
+    while True:
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{url}` с параметром `cursor` '
+            'возвращает ответ со статусом 200.'
+        )
+        data = response.json()
+        assert 'count' not in data, (
+            f'Проверьте, что курсорная пагинация `{url}` не считает '
+            'общее количество объектов.'
+        )
+        pages.append([obj['id'] for obj in data['results']])
+        if not data['next']:
+            return pages
+        response = client.get(data['next'])
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10CursorPagination:
+
+    def test_01_titles_cursor(self, client):
+        titles = [
+            Title.objects.create(name=f'Произведение {idx}', year=2000)
+            for idx in range(12)
+        ]
+        pages = walk_cursor_pages(client, '/api/v1/titles/')
+        assert [len(page) for page in pages] == [5, 5, 2]
+        assert sum(pages, []) == [title.id for title in titles], (
+            'Проверьте, что курсорная пагинация `/api/v1/titles/` выдает '
+            'все произведения по возрастанию `id` без повторов.'
+        )
+
+        response = client.get('/api/v1/titles/')
+        assert response.json()['count'] == 12, (
+            'Проверьте, что без параметра `cursor` эндпоинт '
+            '`/api/v1/titles/` использует постраничную пагинацию.'
+        )
+
+    def test_02_reviews_and_comments_cursor(self, client, django_user_model):
+        title = Title.objects.create(name='Произведение', year=2000)
+        reviews = []
+        for idx in range(7):
+            author = django_user_model.objects.create_user(
+                username=f'author{idx}', email=f'author{idx}@yamdb.fake'
+            )
+            reviews.append(Review.objects.create(
+                title=title, author=author, text='Отзыв', score=5
+            ))
+        Review.objects.filter(pk__in=[reviews[0].pk, reviews[1].pk]).update(
+            pub_date=reviews[2].pub_date
+        )
+        expected = [
+            review.id for review in Review.objects.order_by(
+                '-pub_date', '-id'
+            )
+        ]
+        pages = walk_cursor_pages(
+            client, f'/api/v1/titles/{title.id}/reviews/'
+        )
+        assert sum(pages, []) == expected, (
+            'Проверьте, что курсорная пагинация отзывов выдает их от новых к '
+            'старым без пропусков и повторов, в том числе при совпадении '
+            '`pub_date`.'
+        )
+
+        comments = [
+            Comment.objects.create(
+                review=reviews[0], author=reviews[0].author, text='Ответ'
+            )
+            for _ in range(6)
+        ]
+        pages = walk_cursor_pages(
+            client,
+            f'/api/v1/titles/{title.id}/reviews/{reviews[0].id}/comments/'
+        )
+        assert sorted(sum(pages, [])) == [comment.id for comment in comments]
+        assert [len(page) for page in pages] == [5, 1]
+
+    def test_03_previous_pages_with_ties(self, client, django_user_model):
+        title = Title.objects.create(name='Произведение', year=2000)
+        reviews = [
+            Review.objects.create(
+                title=title, text='Отзыв', score=5,
+                author=django_user_model.objects.create_user(
+                    username=f'author{idx}', email=f'author{idx}@yamdb.fake'
+                )
+            )
+            for idx in range(12)
+        ]
+        Review.objects.update(pub_date=reviews[0].pub_date)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        pages = walk_cursor_pages(client, url)
+        expected = [review.id for review in reversed(reviews)]
+        assert sum(pages, []) == expected, (
+            'Проверьте, что курсорная пагинация не теряет и не повторяет '
+            'отзывы с одинаковым `pub_date` на границах страниц.'
+        )
+
+        data = client.get(url, {'cursor': ''}).json()
+        while data['next']:
+            data = client.get(data['next']).json()
+        backward = [[obj['id'] for obj in data['results']]]
+        while data['previous']:
+            data = client.get(data['previous']).json()
+            backward.append([obj['id'] for obj in data['results']])
+        assert backward[::-1] == pages, (
+            'Проверьте, что ссылки `previous` курсорной пагинации '
+            'возвращают те же страницы в обратном порядке.'
+        )
+        assert client.get(url, {'cursor': 'cD0lNUIxJTVE'}).status_code == (
+            HTTPStatus.NOT_FOUND
+        )
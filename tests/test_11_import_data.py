@@ -0,0 +1,214 @@
+import csv
+import os
+import sqlite3
+import subprocess
+import sys
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from reviews.management.commands.import_data import dependency_levels
+from reviews.models import (Comment, GenreTitle, ImportCheckpoint, Review,
+                            Title, User)
+from tests.conftest import MANAGE_PATH
+
+DATA_PATH = os.path.join(MANAGE_PATH, 'static', 'data')
+
+
+def csv_rows_count(filename):
+    with open(os.path.join(DATA_PATH, filename), encoding='utf-8') as f:
+        return sum(1 for _ in csv.reader(f)) - 1
+
+
+@pytest.mark.django_db(transaction=True)
+class Test11ImportData:
+
+    def test_01_import_data(self):
+        out = StringIO()
+        call_command('import_data', '--batch-size', '10', stdout=out)
+        for model, filename in (
+            (Title, 'titles.csv'),
+            (GenreTitle, 'genre_title.csv'),
+            (User, 'users.csv'),
+            (Review, 'review.csv'),
+            (Comment, 'comments.csv'),
+        ):
+            assert model.objects.count() == csv_rows_count(filename), (
+                f'Проверьте, что команда `import_data` загружает все строки '
+                f'файла `{filename}`.'
+            )
+            assert filename in out.getvalue()
+        assert 'строк/с' in out.getvalue(), (
+            'Проверьте, что команда `import_data` сообщает скорость '
+            'импорта каждого файла.'
+        )
+        title = Title.objects.filter(review_count__gt=0).first()
+        scores = list(title.reviews.values_list('score', flat=True))
+        assert title.rating == sum(scores) / len(scores), (
+            'Проверьте, что после импорта рейтинг произведений '
+            'пересчитывается по загруженным отзывам.'
+        )
+
+    def test_02_import_data_resume(self):
+        total = sum(
+            csv_rows_count(filename) for filename in (
+                'category.csv', 'genre.csv', 'titles.csv', 'genre_title.csv',
+                'users.csv', 'review.csv', 'comments.csv'
+            )
+        )
+        call_command(
+            'import_data', '--checkpoint', '--batch-size', '7',
+            '--max-rows', '60', stdout=StringIO()
+        )
+        checkpoint = ImportCheckpoint.objects.get(filename='genre_title.csv')
+        assert (checkpoint.offset, checkpoint.completed) == (
+            60 - sum(
+                csv_rows_count(filename)
+                for filename in ('category.csv', 'genre.csv', 'titles.csv')
+            ),
+            False
+        ), (
+            'Проверьте, что команда `import_data --checkpoint` сохраняет '
+            'количество импортированных строк незавершенного файла.'
+        )
+        assert GenreTitle.objects.count() == checkpoint.offset
+
+        for _ in range(total // 50 + 1):
+            call_command(
+                'import_data', '--resume', '--batch-size', '7',
+                '--max-rows', '50', stdout=StringIO()
+            )
+        assert sum(
+            checkpoint.offset for checkpoint in ImportCheckpoint.objects.all()
+        ) == total
+        assert not ImportCheckpoint.objects.filter(completed=False).exists()
+        assert Review.objects.count() == csv_rows_count('review.csv'), (
+            'Проверьте, что команда `import_data --resume` продолжает '
+            'импорт с последней контрольной точки без пропусков и повторов.'
+        )
+
+    def test_03_dependency_levels(self):
+        levels = dependency_levels()
+        position = {
+            filename: idx
+            for idx, level in enumerate(levels) for filename in level
+        }
+        assert set(levels[0]) == {'category.csv', 'genre.csv', 'users.csv'}, (
+            'Проверьте, что файлы без внешних ключей загружаются '
+            'одновременно на первом уровне.'
+        )
+        for filename, depends_on in (
+            ('titles.csv', ('category.csv',)),
+            ('genre_title.csv', ('titles.csv', 'genre.csv')),
+            ('review.csv', ('titles.csv', 'users.csv')),
+            ('comments.csv', ('review.csv', 'users.csv')),
+        ):
+            for dependency in depends_on:
+                assert position[dependency] < position[filename], (
+                    f'Проверьте, что `{filename}` загружается после '
+                    f'`{dependency}`.'
+                )
+        assert {'genre_title.csv', 'review.csv'} <= set(levels[2])
+
+    def test_04_import_data_upsert(self):
+        call_command('import_data', stdout=StringIO())
+        title = Title.objects.order_by('id').first()
+        original_name = title.name
+        Title.objects.filter(pk=title.pk).update(name='Переименовано')
+        review = Review.objects.order_by('id').last()
+        review.delete()
+
+        out = StringIO()
+        call_command('import_data', '--upsert', stdout=out)
+        assert (
+            f'Файл titles.csv: создано 0, обновлено 1, без изменений '
+            f'{csv_rows_count("titles.csv") - 1}.'
+        ) in out.getvalue(), (
+            'Проверьте, что команда `import_data --upsert` обновляет только '
+            'измененные строки.'
+        )
+        assert (
+            f'Файл review.csv: создано 1, обновлено 0, без изменений '
+            f'{csv_rows_count("review.csv") - 1}.'
+        ) in out.getvalue(), (
+            'Проверьте, что команда `import_data --upsert` добавляет '
+            'отсутствующие строки.'
+        )
+        assert Title.objects.get(pk=title.pk).name == original_name
+        assert Review.objects.count() == csv_rows_count('review.csv')
+        assert Title.objects.get(pk=review.title_id).review_count == (
+            Review.objects.filter(title_id=review.title_id).count()
+        )
+
+    def test_05_import_data_workers(self, tmp_path):
+        # Процессы пула не видят тестовую БД в памяти, поэтому команда
+        # запускается отдельно на временном файле БД.
+        (tmp_path / 'workers_settings.py').write_text(
+            'from api_yamdb.settings import *\n'
+            'DATABASES["default"]["NAME"] = '
+            f'{str(tmp_path / "db.sqlite3")!r}\n'
+        )
+        env = {
+            **os.environ,
+            'DJANGO_SETTINGS_MODULE': 'workers_settings',
+            'PYTHONPATH': os.pathsep.join((str(tmp_path), MANAGE_PATH)),
+        }
+        manage = [sys.executable, os.path.join(MANAGE_PATH, 'manage.py')]
+        subprocess.run(
+            [*manage, 'migrate', '--noinput'], env=env, check=True,
+            capture_output=True
+        )
+        result = subprocess.run(
+            [*manage, 'import_data', '--workers', '3', '--batch-size', '5'],
+            env=env, capture_output=True, text=True
+        )
+        assert result.returncode == 0, (
+            'Проверьте, что команда `import_data --workers 3` завершается '
+            f'без ошибок на SQLite: {result.stderr}'
+        )
+        assert 'по очереди' in result.stdout
+        db = sqlite3.connect(tmp_path / 'db.sqlite3')
+        try:
+            for table, filename in (
+                ('reviews_title', 'titles.csv'),
+                ('reviews_genretitle', 'genre_title.csv'),
+                ('reviews_review', 'review.csv'),
+                ('reviews_comment', 'comments.csv'),
+            ):
+                count, = db.execute(f'SELECT COUNT(*) FROM {table}').fetchone()
+                assert count == csv_rows_count(filename), (
+                    'Проверьте, что параллельный импорт загружает все '
+                    f'строки файла `{filename}`.'
+                )
+        finally:
+            db.close()
+
+    def test_06_upsert_recalculates_touched_titles(self):
+        call_command('import_data', stdout=StringIO())
+        review = Review.objects.order_by('id').first()
+        other = Title.objects.exclude(pk=review.title_id).filter(
+            review_count__gt=0
+        ).first()
+        Title.objects.filter(pk=other.pk).update(rating=1)
+
+        out = StringIO()
+        call_command('import_data', '--upsert', stdout=out)
+        assert 'не изменились' in out.getvalue(), (
+            'Проверьте, что `import_data --upsert` без изменений в данных '
+            'не пересчитывает рейтинги.'
+        )
+        assert Title.objects.get(pk=other.pk).rating == 1
+
+        Review.objects.filter(pk=review.pk).update(score=review.score % 10 + 1)
+        call_command('import_data', '--upsert', stdout=StringIO())
+        title = Title.objects.get(pk=review.title_id)
+        scores = list(title.reviews.values_list('score', flat=True))
+        assert title.rating == sum(scores) / len(scores), (
+            'Проверьте, что `import_data --upsert` пересчитывает рейтинг '
+            'произведений, отзывы которых изменились.'
+        )
+        assert Title.objects.get(pk=other.pk).rating == 1, (
+            'Проверьте, что `import_data --upsert` не пересчитывает рейтинг '
+            'произведений, отзывы которых не менялись.'
+        )
@@ -0,0 +1,61 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from reviews.models import Comment, Genre, GenreTitle, Review, Title, User
+
+
+def generate(seed=0):
+    call_command(
+        'generate_data', '--users', '30', '--categories', '2', '--genres',
+        '4', '--titles', '20', '--reviews', '200', '--comments', '50',
+        '--seed', str(seed), '--batch-size', '17', stdout=StringIO()
+    )
+
+
+def snapshot():
+    return (
+        list(Title.objects.order_by('id').values_list(
+            'name', 'year', 'category__slug', 'rating'
+        )),
+        list(Review.objects.order_by('id').values_list(
+            'title__name', 'author__username', 'score'
+        )),
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12GenerateData:
+
+    def test_01_generate_data(self):
+        generate()
+        assert User.objects.count() == 30
+        assert Genre.objects.count() == 4
+        assert Title.objects.count() == 20
+        assert Comment.objects.count() == 50
+        assert GenreTitle.objects.count() >= 20
+        reviews_count = Review.objects.count()
+        assert 0 < reviews_count <= 200
+        counts = sorted(
+            Title.objects.values_list('review_count', flat=True),
+            reverse=True
+        )
+        assert sum(counts) == reviews_count, (
+            'Проверьте, что команда `generate_data` пересчитывает рейтинг '
+            'созданных произведений.'
+        )
+        assert counts[0] > 3 * counts[len(counts) // 2], (
+            'Проверьте, что команда `generate_data` распределяет отзывы '
+            'неравномерно: у популярных произведений отзывов больше.'
+        )
+
+    def test_02_generate_data_seed(self):
+        generate(seed=7)
+        first = snapshot()
+        call_command('flush', '--no-input')
+        generate(seed=7)
+        assert snapshot() == first, (
+            'Проверьте, что команда `generate_data` с одинаковым `--seed` '
+            'создает одинаковые данные.'
+        )
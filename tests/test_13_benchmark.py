@@ -0,0 +1,59 @@
+import json
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+
+def run_benchmark(output, *args):
+    call_command(
+        'benchmark_api', '--in-place', '--output', str(output),
+        '--requests', '3', '--users', '10', '--titles', '5', '--reviews',
+        '20', '--comments', '10', *args, stdout=StringIO()
+    )
+    with open(output, encoding='utf-8') as f:
+        return json.load(f)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test13Benchmark:
+
+    def test_01_benchmark_results(self, tmp_path):
+        results = run_benchmark(tmp_path / 'first.json')
+        assert results['meta']['dataset']['titles'] == 5
+        assert {
+            'title-list', 'title-detail', 'title-stats', 'title-similar',
+            'genre-list', 'genre-top', 'categories-list', 'categories-top',
+            'review-list', 'review-detail', 'comment-list', 'comment-detail',
+            'users-list', 'users-detail', 'users-user-owner',
+            'users-recommendations', 'suggest', 'auth-signup', 'auth-token',
+            'auth-revoke',
+        } <= set(results['routes']), (
+            'Проверьте, что команда `benchmark_api` замеряет все эндпоинты '
+            'API из URL-резолвера.'
+        )
+        for name, route in results['routes'].items():
+            assert route['status'] in (
+                HTTPStatus.OK, HTTPStatus.CREATED, HTTPStatus.NO_CONTENT
+            ), f'Эндпоинт `{name}` ответил статусом {route["status"]}.'
+            assert set(route['latency_ms']) == {
+                'p50', 'p90', 'p95', 'p99', 'mean'
+            }
+            assert route['memory_kb'] > 0
+        assert results['routes']['users-list']['role'] == 'admin'
+        assert results['routes']['title-list']['role'] is None
+        assert results['routes']['title-list']['queries'] >= 1
+
+    def test_02_benchmark_compare(self, tmp_path):
+        previous = run_benchmark(tmp_path / 'first.json')
+        previous['routes']['title-list']['queries'] = 1
+        with open(tmp_path / 'previous.json', 'w', encoding='utf-8') as f:
+            json.dump(previous, f)
+        with pytest.raises(CommandError, match='title-list'):
+            run_benchmark(
+                tmp_path / 'second.json',
+                '--compare', str(tmp_path / 'previous.json'),
+                '--tolerance', '1000',
+            )
@@ -0,0 +1,100 @@
+import pytest
+
+from reviews.models import Category, Comment, Genre, Review, Title
+from tests.utils import create_catalog
+
+QUERY_COUNT_HEADER = 'X-DB-Query-Count'
+QUERY_BUDGET_HEADER = 'X-DB-Query-Budget'
+
+
+@pytest.fixture
+def query_headers(settings):
+    settings.QUERY_COUNT_HEADERS = True
+
+
+def create_feedback(titles, authors):
+    reviews = [
+        Review.objects.create(
+            title=titles[0], author=author, text='Отзыв', score=7
+        )
+        for author in authors
+    ]
+    for author in authors:
+        Comment.objects.create(
+            review=reviews[0], author=author, text='Комментарий'
+        )
+    return reviews
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.usefixtures('query_headers', 'revocation_list')
+class Test14QueryBudget:
+
+    def get_urls(self, titles, reviews):
+        comment = reviews[0].comments.first()
+        reviews_url = f'/api/v1/titles/{titles[0].id}/reviews/'
+        comments_url = f'{reviews_url}{reviews[0].id}/comments/'
+        return (
+            '/api/v1/titles/',
+            '/api/v1/titles/?genre=horror&category=films',
+            f'/api/v1/titles/{titles[0].id}/',
+            reviews_url,
+            f'{reviews_url}{reviews[0].id}/',
+            comments_url,
+            f'{comments_url}{comment.id}/',
+            '/api/v1/genres/',
+            '/api/v1/categories/',
+        )
+
+    def test_01_budgets_are_respected(self, client, admin_client, admin,
+                                      user, moderator):
+        titles = create_catalog(5)
+        reviews = create_feedback(titles, (admin, user, moderator))
+        for url in self.get_urls(titles, reviews):
+            for api_client in (client, admin_client):
+                response = api_client.get(url)
+                assert QUERY_BUDGET_HEADER in response, (
+                    f'Проверьте, что для эндпоинта `{url}` объявлен бюджет '
+                    'запросов к БД.'
+                )
+                count = int(response[QUERY_COUNT_HEADER])
+                budget = int(response[QUERY_BUDGET_HEADER])
+                assert count <= budget, (
+                    f'GET-запрос к `{url}` выполнил {count} запросов к БД '
+                    f'при бюджете {budget}.'
+                )
+
+    def test_02_users_budget(self, admin_client, user_client, user):
+        for api_client, url in (
+            (admin_client, '/api/v1/users/'),
+            (admin_client, f'/api/v1/users/{user.username}/'),
+            (user_client, '/api/v1/users/me/'),
+        ):
+            response = api_client.get(url)
+            assert int(response[QUERY_COUNT_HEADER]) <= int(
+                response[QUERY_BUDGET_HEADER]
+            ), f'Превышен бюджет запросов к БД для `{url}`.'
+
+    def test_03_headers_disabled(self, client, settings):
+        settings.QUERY_COUNT_HEADERS = False
+        Category.objects.create(name='Фильм', slug='films')
+        Genre.objects.create(name='Ужасы', slug='horror')
+        Title.objects.create(name='Произведение', year=2000)
+        response = client.get('/api/v1/titles/')
+        assert QUERY_COUNT_HEADER not in response, (
+            'Проверьте, что заголовки с количеством запросов к БД '
+            'отдаются только при включенной настройке '
+            '`QUERY_COUNT_HEADERS`.'
+        )
+
+    def test_04_signup_queries(self, client, django_assert_num_queries):
+        data = {'username': 'new_user', 'email': 'new_user@yamdb.fake'}
+        # Проверка конфликтов, создание пользователя, письмо в очередь,
+        # сохранение кода подтверждения.
+        with django_assert_num_queries(4):
+            response = client.post('/api/v1/auth/signup/', data=data)
+        assert response.json() == data
+        # Для уже зарегистрированного пользователя создавать нечего.
+        with django_assert_num_queries(3):
+            response = client.post('/api/v1/auth/signup/', data=data)
+        assert response.json() == data
@@ -0,0 +1,119 @@
+from io import StringIO
+from smtplib import SMTPException
+from unittest import mock
+
+import pytest
+from django.core import mail
+from django.core.management import call_command
+from django.utils import timezone
+
+from reviews.management.commands.send_emails import Command
+from reviews.models import OutgoingEmail
+
+SIGNUP_URL = '/api/v1/auth/signup/'
+SEND_MESSAGES = (
+    'django.core.mail.backends.locmem.EmailBackend.send_messages'
+)
+OPEN = 'django.core.mail.backends.locmem.EmailBackend.open'
+SLEEP = 'reviews.management.commands.send_emails.time.sleep'
+
+
+class StopLoop(Exception):
+    pass
+
+
+def signup(client, idx):
+    return client.post(SIGNUP_URL, data={
+        'username': f'outbox_user_{idx}',
+        'email': f'outbox_user_{idx}@yamdb.fake',
+    })
+
+
+@pytest.mark.django_db(transaction=True)
+class Test15EmailOutbox:
+
+    def test_01_signup_enqueues_email(self, client):
+        outbox_before_count = len(mail.outbox)
+        for idx in range(3):
+            signup(client, idx)
+        assert len(mail.outbox) == outbox_before_count, (
+            f'Проверьте, что POST-запрос к `{SIGNUP_URL}` не отправляет '
+            'письмо сам, а ставит его в очередь.'
+        )
+        assert OutgoingEmail.objects.filter(
+            status=OutgoingEmail.PENDING
+        ).count() == 3
+
+        call_command('send_emails', '--batch-size', '2', stdout=StringIO())
+        assert len(mail.outbox) == outbox_before_count + 3, (
+            'Проверьте, что команда `send_emails` отправляет все письма '
+            'из очереди.'
+        )
+        assert not OutgoingEmail.objects.exclude(
+            status=OutgoingEmail.SENT
+        ).exists()
+        assert mail.outbox[-1].to == ['outbox_user_2@yamdb.fake']
+
+    def test_02_failed_email_retry(self, client):
+        signup(client, 0)
+        with mock.patch(SEND_MESSAGES, side_effect=SMTPException('down')):
+            call_command(
+                'send_emails', '--retry-delay', '60', stdout=StringIO()
+            )
+        email = OutgoingEmail.objects.get()
+        assert (email.status, email.attempts) == (OutgoingEmail.PENDING, 1), (
+            'Проверьте, что письмо, которое не удалось отправить, остается '
+            'в очереди для повторной попытки.'
+        )
+        assert email.send_after > timezone.now()
+        assert 'down' in email.last_error
+
+        outbox_before_count = len(mail.outbox)
+        call_command('send_emails', stdout=StringIO())
+        assert len(mail.outbox) == outbox_before_count, (
+            'Проверьте, что повторная отправка выполняется только после '
+            'задержки.'
+        )
+
+        OutgoingEmail.objects.update(send_after=timezone.now())
+        with mock.patch(SEND_MESSAGES, side_effect=SMTPException('down')):
+            call_command(
+                'send_emails', '--max-attempts', '2', stdout=StringIO()
+            )
+        email.refresh_from_db()
+        assert (email.status, email.attempts) == (OutgoingEmail.FAILED, 2), (
+            'Проверьте, что после исчерпания попыток письмо помечается '
+            'как неотправленное.'
+        )
+
+    def test_03_connection_failure(self, client):
+        for idx in range(3):
+            signup(client, idx)
+        with mock.patch(OPEN, side_effect=ConnectionRefusedError('refused')):
+            with mock.patch(SLEEP, side_effect=StopLoop):
+                with pytest.raises(StopLoop):
+                    call_command('send_emails', '--loop', stdout=StringIO())
+        assert list(
+            OutgoingEmail.objects.values_list('status', 'attempts')
+        ) == [(OutgoingEmail.PENDING, 1)] * 3, (
+            'Проверьте, что при недоступном почтовом сервере команда '
+            '`send_emails --loop` откладывает всю пачку писем и продолжает '
+            'работу.'
+        )
+        assert 'refused' in OutgoingEmail.objects.first().last_error
+
+    def test_04_claimed_emails(self, client):
+        for idx in range(3):
+            signup(client, idx)
+        first, second = Command(), Command()
+        claimed = first.claim(2)
+        assert len(claimed) == 2
+        assert len(second.claim(10)) == 1, (
+            'Проверьте, что письма, взятые одним обработчиком очереди, '
+            'не достаются другому.'
+        )
+        assert second.claim(10) == []
+        outbox_before_count = len(mail.outbox)
+        OutgoingEmail.objects.update(send_after=timezone.now())
+        call_command('send_emails', stdout=StringIO())
+        assert len(mail.outbox) == outbox_before_count + 3
@@ -0,0 +1,141 @@
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.authentication import CLAIMS_CACHE_KEY, RoleAccessToken
+from reviews.models import ClaimsChange, User
+
+USERS_URL = '/api/v1/users/'
+CATEGORIES_URL = '/api/v1/categories/'
+
+
+def token_client(token):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    return client
+
+
+def queries_count(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    return response, len(context.captured_queries)
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.usefixtures('revocation_list')
+class Test16StatelessAuth:
+
+    def test_01_token_claims(self, client, admin):
+        token = RoleAccessToken.for_user(admin)
+        assert (token['username'], token['role'], token['is_staff']) == (
+            admin.username, admin.role, admin.is_staff
+        ), 'Проверьте, что токен содержит имя, роль и статус пользователя.'
+        _, anonymous_count = queries_count(client, CATEGORIES_URL)
+        response, count = queries_count(token_client(token), CATEGORIES_URL)
+        assert response.status_code == HTTPStatus.OK
+        assert count == anonymous_count, (
+            'Проверьте, что для токена с ролью пользователь не '
+            'загружается из БД.'
+        )
+
+    def test_02_role_change(self, admin_client, user):
+        user_token = RoleAccessToken.for_user(user)
+        response = token_client(user_token).get(USERS_URL)
+        assert response.status_code == HTTPStatus.FORBIDDEN
+        admin_client.patch(
+            f'{USERS_URL}{user.username}/', data={'role': 'admin'}
+        )
+        response = token_client(user_token).get(USERS_URL)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что после смены роли токен, выданный раньше, '
+            'не использует роль из claims.'
+        )
+        user.refresh_from_db()
+        user.role = 'user'
+        user.save()
+        response = token_client(user_token).get(USERS_URL)
+        assert response.status_code == HTTPStatus.FORBIDDEN
+
+    def test_03_token_without_claims(self, user):
+        client = token_client(AccessToken.for_user(user))
+        cache.delete(CLAIMS_CACHE_KEY.format(user.pk))
+        _, first_count = queries_count(client, f'{USERS_URL}me/')
+        _, second_count = queries_count(client, f'{USERS_URL}me/')
+        assert first_count == second_count + 1, (
+            'Проверьте, что данные пользователя для токена без claims '
+            'кешируются после первого запроса к БД.'
+        )
+
+    def test_04_deleted_or_inactive_user(self, user, moderator):
+        user_client = token_client(RoleAccessToken.for_user(user))
+        user.delete()
+        response = user_client.get(f'{USERS_URL}me/')
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что токен удаленного пользователя не принимается.'
+        )
+        moderator_client = token_client(RoleAccessToken.for_user(moderator))
+        moderator.is_active = False
+        moderator.save()
+        response = moderator_client.get(f'{USERS_URL}me/')
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что токен неактивного пользователя не принимается.'
+        )
+
+    def test_05_role_change_survives_cache_eviction(self, client, user):
+        user.role = 'admin'
+        user.save()
+        admin_token = RoleAccessToken.for_user(user)
+        user.role = 'user'
+        user.save()
+        response = token_client(admin_token).get(USERS_URL)
+        assert response.status_code == HTTPStatus.FORBIDDEN
+        for idx in range(400):
+            client.get(f'{CATEGORIES_URL}?search=q{idx}')
+        response = token_client(admin_token).get(USERS_URL)
+        assert response.status_code == HTTPStatus.FORBIDDEN, (
+            'Проверьте, что вытеснение записей из кеша не возвращает '
+            'доверие к роли в токене, выданном до смены роли.'
+        )
+        cache.clear()
+        response = token_client(admin_token).get(USERS_URL)
+        assert response.status_code == HTTPStatus.FORBIDDEN
+
+    def test_06_role_changed_in_other_process(self, user, settings):
+        user.role = 'admin'
+        user.save()
+        admin_client = token_client(RoleAccessToken.for_user(user))
+        assert admin_client.get(USERS_URL).status_code == HTTPStatus.OK
+        # Другой процесс меняет роль без сигналов этого процесса.
+        User.objects.filter(pk=user.pk).update(role='user')
+        ClaimsChange.objects.bulk_create([ClaimsChange(user=user)])
+        settings.TOKEN_REVOCATION_CHECK_INTERVAL = 0
+        assert admin_client.get(USERS_URL).status_code == (
+            HTTPStatus.FORBIDDEN
+        ), (
+            'Проверьте, что смена роли в другом процессе учитывается '
+            'после проверки таблицы изменений.'
+        )
+
+    def test_07_role_changed_by_upsert(self):
+        call_command('import_data', stdout=StringIO())
+        # Роль выдана в обход сигналов, токен получен уже с ней.
+        User.objects.filter(username='bingobongo').update(role='admin')
+        admin_client = token_client(
+            RoleAccessToken.for_user(User.objects.get(username='bingobongo'))
+        )
+        assert admin_client.get(USERS_URL).status_code == HTTPStatus.OK
+        call_command('import_data', '--upsert', stdout=StringIO())
+        assert User.objects.get(username='bingobongo').role == 'user'
+        assert admin_client.get(USERS_URL).status_code == (
+            HTTPStatus.FORBIDDEN
+        ), (
+            'Проверьте, что смена роли командой `import_data --upsert` '
+            'отменяет доверие к роли в выданных раньше токенах.'
+        )
@@ -0,0 +1,88 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.authentication import RoleAccessToken
+from reviews.models import RevokedToken
+
+REVOKE_URL = '/api/v1/auth/revoke/'
+ME_URL = '/api/v1/users/me/'
+
+
+def token_client(token):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    return client
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.usefixtures('revocation_list')
+class Test17TokenRevocation:
+
+    def test_01_revoke_current_token(self, user):
+        revoked_client = token_client(RoleAccessToken.for_user(user))
+        other_client = token_client(RoleAccessToken.for_user(user))
+        assert revoked_client.get(ME_URL).status_code == HTTPStatus.OK
+        response = revoked_client.post(REVOKE_URL)
+        assert response.status_code == HTTPStatus.NO_CONTENT, (
+            f'Проверьте, что POST-запрос к `{REVOKE_URL}` отзывает токен '
+            'и возвращает статус 204.'
+        )
+        assert revoked_client.get(ME_URL).status_code == (
+            HTTPStatus.UNAUTHORIZED
+        ), 'Проверьте, что отозванный токен больше не принимается.'
+        assert other_client.get(ME_URL).status_code == HTTPStatus.OK, (
+            'Проверьте, что отзыв токена не затрагивает другие токены '
+            'пользователя.'
+        )
+        assert APIClient().post(REVOKE_URL).status_code == (
+            HTTPStatus.UNAUTHORIZED
+        )
+
+    def test_02_revoked_in_other_process(self, user, settings):
+        token = RoleAccessToken.for_user(user)
+        client = token_client(token)
+        with CaptureQueriesContext(connection) as context:
+            assert client.get(ME_URL).status_code == HTTPStatus.OK
+        assert not any(
+            RevokedToken._meta.db_table in query['sql']
+            for query in context.captured_queries
+        ), (
+            'Проверьте, что между проверками списка отозванных токенов '
+            'проверка токена не обращается к БД.'
+        )
+        # Другой процесс сохраняет отзыв без сигналов этого процесса.
+        RevokedToken.objects.bulk_create([RevokedToken(
+            jti=token['jti'],
+            user=user,
+            expires_at=timezone.now() + timedelta(days=1),
+        )])
+        settings.TOKEN_REVOCATION_CHECK_INTERVAL = 0
+        assert client.get(ME_URL).status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что токены, отозванные другим процессом, '
+            'перестают приниматься после проверки таблицы.'
+        )
+        cache.clear()
+        assert client.get(ME_URL).status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что список отозванных токенов не зависит от кеша.'
+        )
+
+    def test_03_expired_rows_are_pruned(self, user):
+        RevokedToken.objects.create(
+            jti='expired', user=user,
+            expires_at=timezone.now() - timedelta(seconds=1),
+        )
+        token_client(RoleAccessToken.for_user(user)).post(REVOKE_URL)
+        assert list(RevokedToken.objects.values_list('user', flat=True)) == [
+            user.pk
+        ]
+        assert not RevokedToken.objects.filter(jti='expired').exists(), (
+            'Проверьте, что при отзыве токена удаляются записи об '
+            'истекших токенах.'
+        )
@@ -0,0 +1,129 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from api.cache import ALL_NAMESPACES, INVALIDATION_RETENTION, cache_versions
+from reviews.models import CacheInvalidation, Comment, Genre, Review, Title
+from tests.utils import create_catalog
+
+TITLES_URL = '/api/v1/titles/'
+
+
+@pytest.mark.django_db(transaction=True)
+class Test18ResponseCache:
+
+    def test_01_repeated_reads(self, client, django_assert_num_queries):
+        titles = create_catalog(3)
+        for url in (
+            TITLES_URL,
+            f'{TITLES_URL}{titles[0].id}/',
+            f'{TITLES_URL}{titles[0].id}/reviews/',
+            '/api/v1/genres/',
+            '/api/v1/categories/',
+        ):
+            first = client.get(url)
+            with django_assert_num_queries(0):
+                second = client.get(url)
+            assert second.json() == first.json(), (
+                f'Проверьте, что повторный GET-запрос к `{url}` отдается '
+                'из кеша без запросов к БД.'
+            )
+
+    def test_02_query_params_order(self, client, django_assert_num_queries):
+        create_catalog(2)
+        client.get(f'{TITLES_URL}?genre=horror&category=films')
+        with django_assert_num_queries(0):
+            client.get(f'{TITLES_URL}?category=films&genre=horror')
+
+    def test_03_writes_invalidate(self, client, user_client, user,
+                                  django_assert_num_queries):
+        title = create_catalog(2)[0]
+        reviews_url = f'{TITLES_URL}{title.id}/reviews/'
+        assert client.get(TITLES_URL).json()['results'][0]['rating'] is None
+        assert client.get(reviews_url).json()['count'] == 0
+        user_client.post(reviews_url, data={'text': 'Отзыв', 'score': 8})
+        assert client.get(TITLES_URL).json()['results'][0]['rating'] == 8, (
+            'Проверьте, что новый отзыв сбрасывает кеш списка произведений.'
+        )
+        assert client.get(reviews_url).json()['count'] == 1, (
+            'Проверьте, что новый отзыв сбрасывает кеш списка отзывов.'
+        )
+
+        review = Review.objects.get()
+        comments_url = f'{reviews_url}{review.id}/comments/'
+        client.get(comments_url)
+        Comment.objects.create(review=review, author=user, text='Текст')
+        with django_assert_num_queries(0):
+            client.get(TITLES_URL)
+            client.get(reviews_url)
+        assert client.get(comments_url).json()['count'] == 1
+
+        Genre.objects.filter(slug='horror').get().delete()
+        assert all(
+            len(title['genre']) == 1
+            for title in client.get(TITLES_URL).json()['results']
+        ), 'Проверьте, что изменение жанров сбрасывает кеш произведений.'
+
+        user.username = 'renamed'
+        user.save()
+        assert client.get(reviews_url).json()['results'][0]['author'] == (
+            'renamed'
+        ), 'Проверьте, что смена имени автора сбрасывает кеш отзывов.'
+
+    def test_04_bulk_changes_invalidate(self, client):
+        create_catalog(1)
+        assert client.get(TITLES_URL).json()['count'] == 1
+        call_command(
+            'generate_data', '--users', '2', '--titles', '3', '--reviews',
+            '0', '--comments', '0', stdout=StringIO()
+        )
+        assert client.get(TITLES_URL).json()['count'] == (
+            Title.objects.count()
+        ), (
+            'Проверьте, что команды массовой загрузки данных сбрасывают '
+            'кеш ответов.'
+        )
+
+    def test_05_invalidated_in_other_process(self, client, settings):
+        create_catalog(1)
+        assert client.get(TITLES_URL).json()['count'] == 1
+        # Команда управления в другом процессе пишет данные и сброс кеша
+        # без сигналов этого процесса.
+        Title.objects.bulk_create([Title(name='Новое', year=2000)])
+        CacheInvalidation.objects.create(namespace=ALL_NAMESPACES)
+        settings.CACHE_INVALIDATION_CHECK_INTERVAL = 0
+        assert client.get(TITLES_URL).json()['count'] == 2, (
+            'Проверьте, что сбросы кеша из других процессов учитываются '
+            'после проверки таблицы сбросов.'
+        )
+
+    def test_06_cache_key_includes_host(self, client):
+        create_catalog(6)
+        client.get(TITLES_URL, HTTP_HOST='evil.example')
+        response = client.get(TITLES_URL)
+        assert response.json()['next'].startswith('http://testserver/'), (
+            'Проверьте, что ключ кеша ответов учитывает хост запроса: '
+            'ссылки пагинации из ответа на запрос с чужим заголовком '
+            '`Host` не должны попадать в ответы другим клиентам.'
+        )
+
+    def test_07_versions_pruned(self, settings):
+        settings.CACHE_INVALIDATION_CHECK_INTERVAL = 0
+        namespaces = ('reviews:1', 'reviews:2', 'titles')
+        retention = INVALIDATION_RETENTION.total_seconds()
+        cache_versions.bump(namespaces[:2])
+        before = cache_versions.get(namespaces)
+        for bumped in (('reviews:2',), ()):
+            cache_versions.pruned_at -= retention
+            cache_versions.bump(bumped)
+            after = cache_versions.get(namespaces)
+        assert set(cache_versions.versions) == set(), (
+            'Проверьте, что версии давно не сбрасывавшихся пространств '
+            'имен удаляются из памяти процесса.'
+        )
+        assert all(new >= old for new, old in zip(after, before)), (
+            'Проверьте, что после чистки версии пространств имен '
+            'не уменьшаются.'
+        )
+        assert after[1] > before[1]
@@ -0,0 +1,150 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.cache import cache
+
+from reviews.models import Genre, Review
+from tests.utils import create_catalog
+
+
+def conditional_get(client, url, response):
+    return client.get(
+        url,
+        HTTP_IF_NONE_MATCH=response['ETag'],
+        HTTP_IF_MODIFIED_SINCE=response.get('Last-Modified', ''),
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+class Test19ConditionalGet:
+
+    def test_01_title_not_modified(self, client, django_assert_num_queries):
+        title = create_catalog(1)[0]
+        url = f'/api/v1/titles/{title.id}/'
+        response = client.get(url)
+        assert 'ETag' in response and 'Last-Modified' in response, (
+            f'Проверьте, что ответ на GET-запрос к `{url}` содержит '
+            'заголовки ETag и Last-Modified.'
+        )
+        cache.clear()
+        with django_assert_num_queries(1):
+            not_modified = conditional_get(client, url, response)
+        assert not_modified.status_code == HTTPStatus.NOT_MODIFIED, (
+            f'Проверьте, что условный GET-запрос к `{url}` без изменений '
+            'произведения возвращает 304 после одного запроса к БД.'
+        )
+        client.get(url)
+        with django_assert_num_queries(0):
+            not_modified = conditional_get(client, url, response)
+        assert not_modified.status_code == HTTPStatus.NOT_MODIFIED, (
+            'Проверьте, что ответ из кеша тоже учитывает условные заголовки.'
+        )
+
+        response = client.get(url, HTTP_IF_MODIFIED_SINCE=(
+            response['Last-Modified']
+        ))
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+    def test_02_title_modified(self, client, user_client):
+        title = create_catalog(1)[0]
+        url = f'/api/v1/titles/{title.id}/'
+        response = client.get(url)
+        user_client.post(f'{url}reviews/', data={'text': 'Отзыв', 'score': 5})
+        changed = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        assert changed.status_code == HTTPStatus.OK, (
+            'Проверьте, что новый отзыв меняет версию произведения.'
+        )
+        assert changed['ETag'] != response['ETag']
+        assert changed.json()['rating'] == 5
+
+        genre = Genre.objects.get(slug='horror')
+        genre.name = 'Хоррор'
+        genre.save()
+        cache.clear()
+        renamed = client.get(url, HTTP_IF_NONE_MATCH=changed['ETag'])
+        assert renamed.status_code == HTTPStatus.OK, (
+            'Проверьте, что переименование жанра меняет версию '
+            'произведений этого жанра.'
+        )
+
+    def test_03_reviews_list(self, client, user_client, admin):
+        title = create_catalog(1)[0]
+        Review.objects.create(title=title, author=admin, text='Текст', score=3)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        response = client.get(url)
+        assert 'ETag' in response
+        assert conditional_get(client, url, response).status_code == (
+            HTTPStatus.NOT_MODIFIED
+        ), 'Проверьте, что список отзывов поддерживает условные запросы.'
+
+        user_client.post(url, data={'text': 'Отзыв', 'score': 5})
+        changed = conditional_get(client, url, response)
+        assert changed.status_code == HTTPStatus.OK
+        assert changed.json()['count'] == 2
+
+        Review.objects.filter(author=admin).get().delete()
+        deleted = conditional_get(client, url, changed)
+        assert deleted.status_code == HTTPStatus.OK, (
+            'Проверьте, что удаление отзыва меняет версию списка отзывов.'
+        )
+        assert deleted.json()['count'] == 1
+
+    def test_04_author_renamed(self, client, user_client, user):
+        title = create_catalog(1)[0]
+        reviews_url = f'/api/v1/titles/{title.id}/reviews/'
+        review_id = user_client.post(
+            reviews_url, data={'text': 'Отзыв', 'score': 5}
+        ).json()['id']
+        comments_url = f'{reviews_url}{review_id}/comments/'
+        comment_id = user_client.post(
+            comments_url, data={'text': 'Комментарий'}
+        ).json()['id']
+        urls = (
+            reviews_url,
+            f'{reviews_url}{review_id}/',
+            comments_url,
+            f'{comments_url}{comment_id}/',
+        )
+        responses = [client.get(url) for url in urls]
+        user_client.patch('/api/v1/users/me/', data={'username': 'renamed'})
+        for url, response in zip(urls, responses):
+            renamed = conditional_get(client, url, response)
+            assert renamed.status_code == HTTPStatus.OK, (
+                f'Проверьте, что смена имени автора меняет версию `{url}`.'
+            )
+            assert 'renamed' in renamed.content.decode()
+
+    def test_05_list_version_from_parent_row(self, client, user_client,
+                                             admin,
+                                             django_assert_num_queries):
+        title = create_catalog(1)[0]
+        review = Review.objects.create(
+            title=title, author=admin, text='Текст', score=3
+        )
+        for url in (
+            f'/api/v1/titles/{title.id}/reviews/',
+            f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/',
+        ):
+            response = client.get(url)
+            cache.clear()
+            with django_assert_num_queries(1):
+                not_modified = conditional_get(client, url, response)
+            assert not_modified.status_code == HTTPStatus.NOT_MODIFIED, (
+                f'Проверьте, что версия списка `{url}` читается одним '
+                'запросом из строки родительского объекта.'
+            )
+
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        response = client.get(url)
+        review.text = 'Новый текст'
+        review.save()
+        changed = conditional_get(client, url, response)
+        assert changed.status_code == HTTPStatus.OK, (
+            'Проверьте, что изменение отзыва меняет версию списка отзывов.'
+        )
+        # Сохранение произведения с устаревшим счетчиком не возвращает
+        # прежнюю версию списка.
+        title.save()
+        assert conditional_get(client, url, response).status_code == (
+            HTTPStatus.OK
+        )
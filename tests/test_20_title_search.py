@@ -0,0 +1,108 @@
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+
+from reviews.models import Title
+from reviews.search import SEARCH_TRIGGERS
+
+SEARCH_URL = '/api/v1/titles/?search={}'
+
+
+def search_names(client, query):
+    response = client.get(SEARCH_URL.format(query))
+    assert response.status_code == HTTPStatus.OK, (
+        f'Проверьте, что поиск `{query}` по произведениям возвращает '
+        'ответ со статусом 200.'
+    )
+    return [title['name'] for title in response.json()['results']]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test20TitleSearch:
+
+    def test_01_search_ranking(self, client):
+        Title.objects.create(
+            name='Обычный фильм', year=2000,
+            description='Фильм про далекий космос и звезды',
+        )
+        Title.objects.create(
+            name='Космос', year=2001, description='Документальный фильм',
+        )
+        Title.objects.create(name='Другое', year=2002, description='Драма')
+        assert search_names(client, 'космос') == ['Космос', 'Обычный фильм'], (
+            'Проверьте, что поиск находит произведения по названию и '
+            'описанию и ставит совпадения в названии выше.'
+        )
+        assert search_names(client, 'фильм кос') == [
+            'Космос', 'Обычный фильм'
+        ], 'Проверьте, что последнее слово запроса ищется по префиксу.'
+        assert search_names(client, 'фильм драма') == []
+
+    def test_02_index_follows_writes(self, client):
+        title = Title.objects.create(name='Старое название', year=2000)
+        assert search_names(client, 'старое') == ['Старое название']
+        title.name = 'Новое название'
+        title.save()
+        assert search_names(client, 'старое') == [], (
+            'Проверьте, что индекс поиска обновляется при изменении '
+            'произведения.'
+        )
+        assert search_names(client, 'новое') == ['Новое название']
+        title.delete()
+        assert search_names(client, 'новое') == []
+
+        call_command(
+            'generate_data', '--users', '0', '--titles', '5', '--reviews',
+            '0', '--comments', '0', stdout=StringIO()
+        )
+        name = Title.objects.order_by('id').last().name
+        assert name in search_names(client, name), (
+            'Проверьте, что произведения, созданные через bulk_create, '
+            'попадают в индекс поиска.'
+        )
+
+    @pytest.mark.parametrize('query', ('"', 'AND OR', 'a*) NOT (', '%', ''))
+    def test_03_search_syntax_is_escaped(self, client, query):
+        Title.objects.create(name='Фильм', year=2000)
+        search_names(client, query)
+
+    def test_04_search_uses_fts_index(self):
+        queryset = Title.objects.filter(
+            search__document__match='"фильм"*'
+        ).order_by('search__rank')
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+        assert 'VIRTUAL TABLE' in plan, plan
+        assert 'SCAN reviews_title ' not in f'{plan} ', (
+            'Проверьте, что поиск выполняется по индексу FTS5, '
+            'а не полным просмотром таблицы произведений.'
+        )
+
+    def test_05_triggers_restored_after_migrate(self, client):
+        with connection.cursor() as cursor:
+            # Так SQLite теряет триггеры при пересоздании таблицы
+            # в миграции с AddField или AlterField.
+            for name in SEARCH_TRIGGERS:
+                cursor.execute(f'DROP TRIGGER {name}')
+        Title.objects.create(name='Без индекса', year=2000)
+        call_command('migrate', verbosity=0)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'trigger'"
+            )
+            triggers = {name for name, in cursor.fetchall()}
+        assert set(SEARCH_TRIGGERS) <= triggers, (
+            'Проверьте, что после `migrate` триггеры индекса поиска '
+            'создаются заново, если их нет.'
+        )
+        assert search_names(client, 'индекса') == ['Без индекса'], (
+            'Проверьте, что после восстановления триггеров индекс поиска '
+            'перестраивается.'
+        )
+        Title.objects.create(name='С индексом', year=2000)
+        assert search_names(client, 'индексом') == ['С индексом']
@@ -0,0 +1,98 @@
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+
+from reviews.models import Category, Genre, User
+
+
+def search_values(client, url, query, field):
+    response = client.get(url, data={'search': query})
+    assert response.status_code == HTTPStatus.OK, (
+        f'Проверьте, что поиск `{query}` по `{url}` возвращает ответ '
+        'со статусом 200.'
+    )
+    return sorted(item[field] for item in response.json()['results'])
+
+
+@pytest.mark.django_db(transaction=True)
+class Test21PrefixSearch:
+
+    @pytest.mark.parametrize('url, model', (
+        ('/api/v1/genres/', Genre),
+        ('/api/v1/categories/', Category),
+    ))
+    def test_01_name_prefix(self, client, url, model):
+        model.objects.create(name='Фантастика', slug='sci-fi')
+        model.objects.create(name='Фэнтези', slug='fantasy')
+        model.objects.create(name='Научная ФАНТАСТИКА', slug='science')
+        assert search_values(client, url, 'фант', 'name') == [
+            'Фантастика'
+        ], (
+            f'Проверьте, что `?search=` на `{url}` ищет по началу названия '
+            'без учета регистра.'
+        )
+        assert search_values(client, url, 'Ф', 'name') == [
+            'Фантастика', 'Фэнтези'
+        ]
+        assert search_values(client, url, 'научная  фан', 'name') == [
+            'Научная ФАНТАСТИКА'
+        ]
+        assert len(search_values(client, url, '', 'name')) == 3
+
+    def test_02_username_prefix(self, admin_client, admin):
+        User.objects.create(username='NewUser', email='one@yamdb.fake')
+        User.objects.create(username='newbie', email='two@yamdb.fake')
+        User.objects.create(username='other', email='three@yamdb.fake')
+        assert search_values(
+            admin_client, '/api/v1/users/', 'NEW', 'username'
+        ) == ['NewUser', 'newbie'], (
+            'Проверьте, что `?search=` на `/api/v1/users/` ищет по началу '
+            'имени пользователя без учета регистра.'
+        )
+        user = User.objects.get(username='other')
+        user.username = 'renamed'
+        user.save()
+        assert search_values(
+            admin_client, '/api/v1/users/', 'ren', 'username'
+        ) == ['renamed'], (
+            'Проверьте, что нормализованное имя обновляется при сохранении.'
+        )
+
+    def test_03_bulk_create(self):
+        call_command(
+            'generate_data', '--users', '3', '--titles', '3', '--reviews',
+            '0', '--comments', '0', stdout=StringIO()
+        )
+        for model, source, target in (
+            (User, 'username', 'normalized_username'),
+            (Genre, 'name', 'normalized_name'),
+            (Category, 'name', 'normalized_name'),
+        ):
+            for value, normalized in model.objects.values_list(
+                source, target
+            ):
+                assert normalized == value.casefold(), (
+                    'Проверьте, что объекты, созданные через bulk_create, '
+                    'получают нормализованное значение для поиска.'
+                )
+
+    @pytest.mark.parametrize('model, field', (
+        (Genre, 'normalized_name'),
+        (Category, 'normalized_name'),
+        (User, 'normalized_username'),
+    ))
+    def test_04_search_uses_index(self, model, field):
+        queryset = model.objects.filter(
+            **{f'{field}__gte': 'фант', f'{field}__lt': 'фану'}
+        )
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+        assert 'USING INDEX' in plan and field in plan, (
+            'Проверьте, что поиск по префиксу использует индекс '
+            f'по столбцу `{field}`: {plan}'
+        )
@@ -0,0 +1,157 @@
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from api.suggest import suggest_index
+from reviews.models import Category, Genre, Review, Title
+
+SUGGEST_URL = '/api/v1/suggest/'
+
+
+def suggest(client, query):
+    response = client.get(SUGGEST_URL, data={'q': query})
+    assert response.status_code == HTTPStatus.OK, (
+        f'Проверьте, что GET-запрос к `{SUGGEST_URL}?q={query}` возвращает '
+        'ответ со статусом 200.'
+    )
+    return [
+        (item['type'], item['name'])
+        for item in response.json()['results']
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test22Suggest:
+
+    def test_01_prefix_and_popularity(self, client, user, admin):
+        category = Category.objects.create(name='Фильмы', slug='films')
+        Genre.objects.create(name='Научная фантастика', slug='sci-fi')
+        unpopular = Title.objects.create(
+            name='Фантомас', year=1964, category=category
+        )
+        popular = Title.objects.create(name='Фарго', year=1996)
+        Title.objects.create(name='Другое', year=2000)
+        for author in (user, admin):
+            Review.objects.create(
+                title=popular, author=author, text='Текст', score=8
+            )
+        Review.objects.create(
+            title=unpopular, author=user, text='Текст', score=5
+        )
+        assert suggest(client, 'Фа') == [
+            ('title', 'Фарго'),
+            ('title', 'Фантомас'),
+            ('genre', 'Научная фантастика'),
+        ], (
+            'Проверьте, что подсказки ищутся по началу названия или слова '
+            'в нем без учета регистра и упорядочены по количеству отзывов.'
+        )
+        assert suggest(client, 'фил') == [('category', 'Фильмы')]
+        assert suggest(client, '') == []
+        assert suggest(client, 'нет такого') == []
+
+    def test_02_no_queries(self, client, django_assert_num_queries):
+        Title.objects.create(name='Фарго', year=1996)
+        suggest(client, 'фар')
+        with django_assert_num_queries(0):
+            assert suggest(client, 'фар') == [('title', 'Фарго')], (
+                'Проверьте, что подсказки отдаются из индекса в памяти '
+                'без запросов к БД.'
+            )
+
+    def test_03_signals_update_index(self, client, user):
+        title = Title.objects.create(name='Старое название', year=2000)
+        other = Title.objects.create(name='Стакан', year=2000)
+        assert suggest(client, 'ста') == [
+            ('title', 'Стакан'), ('title', 'Старое название')
+        ]
+        Review.objects.create(title=title, author=user, text='Т', score=1)
+        assert suggest(client, 'ста')[0] == ('title', 'Старое название'), (
+            'Проверьте, что новый отзыв повышает популярность произведения '
+            'в подсказках.'
+        )
+        title.name = 'Новое название'
+        title.save()
+        assert suggest(client, 'нов') == [('title', 'Новое название')], (
+            'Проверьте, что подсказки обновляются при изменении названия.'
+        )
+        assert suggest(client, 'ста') == [('title', 'Стакан')]
+        other.delete()
+        Genre.objects.create(name='Стимпанк', slug='steampunk')
+        assert suggest(client, 'ст') == [('genre', 'Стимпанк')], (
+            'Проверьте, что подсказки учитывают удаление и создание '
+            'записей.'
+        )
+
+    def test_04_bulk_changes(self, client):
+        suggest(client, 'а')
+        call_command(
+            'generate_data', '--users', '0', '--titles', '3', '--reviews',
+            '0', '--comments', '0', stdout=StringIO()
+        )
+        name = Title.objects.order_by('id').last().name
+        assert ('title', name) in suggest(client, name), (
+            'Проверьте, что после массовой загрузки данных индекс '
+            'подсказок перестраивается.'
+        )
+
+    def test_05_short_prefix_lists_follow_changes(self, client,
+                                                 django_user_model):
+        titles = [
+            Title.objects.create(name=f'Фильм {idx:02}', year=2000)
+            for idx in range(14)
+        ]
+        suggest(client, 'ф')
+        authors = [
+            django_user_model.objects.create_user(
+                username=f'author{idx}', email=f'author{idx}@yamdb.fake'
+            )
+            for idx in range(3)
+        ]
+        for idx, title in enumerate(titles):
+            for author in authors[:idx % 4]:
+                Review.objects.create(
+                    title=title, author=author, text='Т', score=5
+                )
+
+        def expected(prefix):
+            return [
+                ('title', title.name) for title in Title.objects.order_by(
+                    '-review_count', 'name'
+                )
+                if title.name.casefold().startswith(prefix)
+            ][:10]
+
+        for step in range(3):
+            for prefix in ('ф', 'фи', 'фил', 'фильм 1'):
+                assert suggest(client, prefix) == expected(prefix), (
+                    'Проверьте, что подсказки по коротким префиксам '
+                    'совпадают с самыми популярными записями и после '
+                    'изменений.'
+                )
+            if step == 0:
+                Review.objects.filter(title=titles[3]).delete()
+            elif step == 1:
+                renamed = Title.objects.get(pk=titles[5].pk)
+                renamed.name = 'Филин'
+                renamed.save()
+                titles[7].delete()
+
+    def test_06_rebuild_in_background(self, client, settings,
+                                      django_assert_num_queries):
+        Title.objects.create(name='Фарго', year=1996)
+        suggest(client, 'фа')
+        Title.objects.bulk_create([Title(name='Фантомас', year=1964)])
+        settings.SUGGEST_INDEX_MAX_AGE = 0
+        with django_assert_num_queries(0):
+            assert suggest(client, 'фа') == [('title', 'Фарго')], (
+                'Проверьте, что устаревший индекс подсказок перестраивается '
+                'не в запросе, а запрос получает подсказки из прежнего.'
+            )
+        settings.SUGGEST_INDEX_MAX_AGE = 60
+        suggest_index.rebuild_thread.join()
+        assert suggest(client, 'фа') == [
+            ('title', 'Фантомас'), ('title', 'Фарго')
+        ]
@@ -0,0 +1,52 @@
+import pytest
+from django.db import IntegrityError
+
+from reviews.models import Comment, GenreTitle, Review
+from tests.utils import check_plans, create_catalog
+
+
+@pytest.mark.django_db(transaction=True)
+class Test23QueryPlans:
+
+    @pytest.mark.parametrize('query', (
+        '',
+        '?genre=horror',
+        '?category=films',
+        '?name=Произведение 1',
+        '?year=2000',
+        '?genre=horror&category=films&year=2000',
+        '?cursor=',
+        '?genre=horror&cursor=',
+    ))
+    def test_01_titles(self, client, query):
+        create_catalog(3)
+        check_plans(client, f'/api/v1/titles/{query}')
+
+    @pytest.mark.parametrize('query', ('', '?cursor='))
+    def test_02_reviews_and_comments(self, client, admin, query):
+        title = create_catalog(1)[0]
+        review = Review.objects.create(
+            title=title, author=admin, text='Текст', score=5
+        )
+        Comment.objects.create(review=review, author=admin, text='Текст')
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        check_plans(client, f'{url}{query}')
+        check_plans(client, f'{url}{review.id}/comments/{query}')
+
+    @pytest.mark.parametrize('url', (
+        '/api/v1/genres/',
+        '/api/v1/genres/?search=у',
+        '/api/v1/categories/',
+        '/api/v1/categories/?search=ф',
+        '/api/v1/users/',
+        '/api/v1/users/?search=test',
+    ))
+    def test_03_catalogs_and_users(self, admin_client, url):
+        create_catalog(1)
+        check_plans(admin_client, url)
+
+    def test_04_unique_genre_title(self):
+        title = create_catalog(1)[0]
+        genre = title.genre.first()
+        with pytest.raises(IntegrityError):
+            GenreTitle.objects.create(title=title, genre=genre)
@@ -0,0 +1,105 @@
+from http import HTTPStatus
+
+import pytest
+
+from reviews.models import Genre, Title
+from tests.utils import check_plans
+
+TITLES_URL = '/api/v1/titles/'
+
+
+def title_names(client, query):
+    response = client.get(f'{TITLES_URL}{query}')
+    assert response.status_code == HTTPStatus.OK, (
+        f'Проверьте, что GET-запрос к `{TITLES_URL}{query}` возвращает '
+        'ответ со статусом 200.'
+    )
+    return [title['name'] for title in response.json()['results']]
+
+
+def create_titles():
+    genre = Genre.objects.create(name='Фантастика', slug='sci-fi')
+    for name, year, rating in (
+        ('Дюна', 1965, 9.0),
+        ('Солярис', 1961, 9.0),
+        ('Матрица', 1999, 8.5),
+        ('Аватар', 2009, 7.0),
+        ('Интерстеллар', 2014, 8.8),
+        ('Без оценок', 2020, None),
+    ):
+        title = Title.objects.create(name=name, year=year)
+        Title.objects.filter(pk=title.pk).update(rating=rating)
+        if name != 'Дюна':
+            title.genre.add(genre)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test24TitleOrdering:
+
+    def test_01_ordering(self, client):
+        create_titles()
+        assert title_names(client, '?ordering=-rating,year') == [
+            'Солярис', 'Дюна', 'Интерстеллар', 'Матрица', 'Аватар'
+        ], (
+            'Проверьте, что `?ordering=-rating,year` сортирует произведения '
+            'по убыванию рейтинга, а при равном рейтинге - по году.'
+        )
+        assert title_names(client, '?ordering=year')[:2] == [
+            'Солярис', 'Дюна'
+        ]
+        assert title_names(client, '?ordering=-year')[0] == 'Без оценок'
+        assert title_names(client, '?ordering=-rating,year&page=2') == [
+            'Без оценок'
+        ], 'Проверьте, что произведения без оценок идут в конце.'
+        response = client.get(f'{TITLES_URL}?ordering=description')
+        assert response.status_code == HTTPStatus.OK
+
+    def test_02_range_filters(self, client):
+        create_titles()
+        assert sorted(title_names(client, '?rating_min=8.8')) == [
+            'Дюна', 'Интерстеллар', 'Солярис'
+        ], 'Проверьте фильтр `rating_min` списка произведений.'
+        assert sorted(title_names(
+            client, '?rating_min=7&rating_max=8.6'
+        )) == ['Аватар', 'Матрица'], (
+            'Проверьте фильтр `rating_max` списка произведений.'
+        )
+        assert sorted(title_names(client, '?year_min=1999&year_max=2009')) == [
+            'Аватар', 'Матрица'
+        ], 'Проверьте фильтры `year_min` и `year_max` списка произведений.'
+        assert title_names(
+            client, '?genre=sci-fi&year_min=1990&ordering=-rating'
+        ) == ['Интерстеллар', 'Матрица', 'Аватар', 'Без оценок'], (
+            'Проверьте, что фильтры и сортировка работают вместе.'
+        )
+
+    def test_03_cursor_keeps_id_order(self, client):
+        create_titles()
+        response = client.get(f'{TITLES_URL}?cursor=&ordering=-rating')
+        assert response.status_code == HTTPStatus.OK
+        ids = [title['id'] for title in response.json()['results']]
+        assert ids == sorted(ids), (
+            'Проверьте, что курсорная пагинация всегда идет в порядке id.'
+        )
+
+    @pytest.mark.parametrize('query', (
+        '?ordering=-rating,year',
+        '?ordering=rating,-year',
+        '?ordering=-rating',
+        '?ordering=rating',
+        '?ordering=-year',
+        '?ordering=name',
+    ))
+    def test_04_ordering_uses_indexes(self, client, query):
+        create_titles()
+        check_plans(client, f'{TITLES_URL}{query}')
+
+    @pytest.mark.parametrize('query', (
+        '?rating_min=8&rating_max=9',
+        '?year_min=2000&year_max=2010',
+        '?year_min=2000&ordering=-rating,year',
+    ))
+    def test_05_range_filters_use_indexes(self, client, query):
+        create_titles()
+        # Диапазон читается по индексу, сортируются только найденные.
+        check_plans(client, f'{TITLES_URL}{query}', allow_sort=True)
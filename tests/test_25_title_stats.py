@@ -0,0 +1,136 @@
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db.models import Count
+from django.db.models.query import QuerySet
+
+from reviews.models import Review, Title, TitleStats
+from reviews.rating import apply_histogram_delta
+from tests.utils import create_catalog
+
+
+def histogram(counts=None):
+    scores = {str(score): 0 for score in range(1, 11)}
+    for score, count in (counts or {}).items():
+        scores[str(score)] = count
+    return scores
+
+
+@pytest.mark.django_db(transaction=True)
+class Test25TitleStats:
+
+    def test_01_stats_follow_reviews(self, client, user_client, admin,
+                                     django_assert_num_queries,
+                                     revocation_list):
+        title = create_catalog(1)[0]
+        url = f'/api/v1/titles/{title.id}/stats/'
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{url}` возвращает ответ '
+            'со статусом 200.'
+        )
+        assert response.json() == {
+            'id': title.id, 'rating': None, 'review_count': 0,
+            'scores': histogram(),
+        }
+
+        review_url = f'/api/v1/titles/{title.id}/reviews/'
+        review_id = user_client.post(
+            review_url, data={'text': 'Отзыв', 'score': 7}
+        ).json()['id']
+        Review.objects.create(title=title, author=admin, text='Т', score=3)
+        with django_assert_num_queries(1):
+            response = client.get(url)
+        assert response.json()['scores'] == histogram({7: 1, 3: 1}), (
+            f'Проверьте, что `{url}` отдает распределение оценок одним '
+            'запросом к БД.'
+        )
+
+        user_client.patch(f'{review_url}{review_id}/', data={'score': 3})
+        assert client.get(url).json()['scores'] == histogram({3: 2}), (
+            'Проверьте, что изменение оценки переносит отзыв в другой '
+            'счетчик.'
+        )
+        user_client.delete(f'{review_url}{review_id}/')
+        assert client.get(url).json() == {
+            'id': title.id, 'rating': 3, 'review_count': 1,
+            'scores': histogram({3: 1}),
+        }, 'Проверьте, что удаление отзыва уменьшает счетчик.'
+        assert client.get('/api/v1/titles/0/stats/').status_code == (
+            HTTPStatus.NOT_FOUND
+        )
+
+    def test_02_embedded_stats(self, client, admin):
+        title = create_catalog(2)[0]
+        Review.objects.create(title=title, author=admin, text='Т', score=10)
+        response = client.get('/api/v1/titles/')
+        assert 'scores' not in response.json()['results'][0], (
+            'Проверьте, что распределение оценок добавляется в список '
+            'произведений только по запросу.'
+        )
+        results = client.get('/api/v1/titles/?include=stats').json()[
+            'results'
+        ]
+        assert [item['scores'] for item in results] == [
+            histogram({10: 1}), histogram()
+        ], 'Проверьте параметр `?include=stats` списка произведений.'
+        detail = client.get(f'/api/v1/titles/{title.id}/?include=stats')
+        assert detail.json()['scores'] == histogram({10: 1})
+
+    def test_03_bulk_data_and_cascades(self, user):
+        call_command(
+            'generate_data', '--users', '5', '--titles', '5', '--reviews',
+            '4', '--comments', '0', stdout=StringIO()
+        )
+        expected = {}
+        for title_id, score, count in (
+            Review.objects.order_by().values_list('title_id', 'score')
+            .annotate(count=Count('id'))
+        ):
+            expected.setdefault(title_id, {})[score] = count
+        for stats in TitleStats.objects.all():
+            assert {
+                score: count for score, count in stats.histogram.items()
+                if count
+            } == expected.pop(stats.title_id), (
+                'Проверьте, что массовая загрузка данных пересчитывает '
+                'распределение оценок.'
+            )
+        assert expected == {}
+
+        title = Title.objects.filter(reviews__isnull=False).first()
+        title_id = title.id
+        title.delete()
+        assert not TitleStats.objects.filter(title_id=title_id).exists()
+        title = create_catalog(1)[0]
+        Review.objects.create(title=title, author=user, text='Т', score=4)
+        user.delete()
+        assert TitleStats.objects.get(title=title).histogram[4] == 0, (
+            'Проверьте, что отзывы, удаленные вместе с автором, '
+            'исключаются из распределения оценок.'
+        )
+
+    def test_04_first_review_race(self, monkeypatch):
+        title = create_catalog(1)[0]
+        update = QuerySet.update
+        raced = []
+
+        def update_after_other_process(queryset, **kwargs):
+            if queryset.model is TitleStats and not raced:
+                # Другой процесс успел завести строку для своего отзыва,
+                # который еще не виден в этой транзакции.
+                raced.append(True)
+                TitleStats.objects.create(title=title, score_5=1)
+                return 0
+            return update(queryset, **kwargs)
+
+        monkeypatch.setattr(QuerySet, 'update', update_after_other_process)
+        apply_histogram_delta(title.id, new_score=7)
+        assert TitleStats.objects.get(title=title).histogram == {
+            **{score: 0 for score in range(1, 11)}, 5: 1, 7: 1
+        }, (
+            'Проверьте, что первый отзыв не теряет счетчики строки '
+            'распределения, которую одновременно завел другой процесс.'
+        )
@@ -0,0 +1,173 @@
+import re
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from reviews.models import Category, Genre, LeaderboardEntry, Review, Title
+
+
+def refresh(*args):
+    """Количество пересчитанных рейтингов из вывода команды."""
+    out = StringIO()
+    call_command('refresh_leaderboards', *args, stdout=out)
+    return int(re.search(r'\d+', out.getvalue()).group())
+
+
+def set_reviews(title, review_count, score_sum):
+    Title.objects.filter(pk=title.pk).update(
+        review_count=review_count,
+        score_sum=score_sum,
+        rating=score_sum / review_count,
+        updated_at=timezone.now(),
+    )
+
+
+def top_names(client, url):
+    response = client.get(url)
+    assert response.status_code == HTTPStatus.OK, (
+        f'Проверьте, что GET-запрос к `{url}` возвращает ответ '
+        'со статусом 200.'
+    )
+    return [entry['name'] for entry in response.json()['results']]
+
+
+def create_titles():
+    category = Category.objects.create(name='Фильм', slug='films')
+    genre = Genre.objects.create(name='Драма', slug='drama')
+    titles = {}
+    for name, review_count, score_sum in (
+        ('Один отзыв', 1, 10),
+        ('Классика', 500, 4500),
+        ('Середнячок', 40, 280),
+    ):
+        titles[name] = Title.objects.create(
+            name=name, year=2000, category=category
+        )
+        titles[name].genre.add(genre)
+        set_reviews(titles[name], review_count, score_sum)
+    Title.objects.create(name='Без отзывов', year=2000, category=category)
+    return titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test26Leaderboards:
+
+    def test_01_weighted_ranking(self, client, django_assert_num_queries):
+        create_titles()
+        Genre.objects.create(name='Пустой', slug='empty')
+        refresh()
+        for url in (
+            '/api/v1/genres/drama/top/', '/api/v1/categories/films/top/'
+        ):
+            with django_assert_num_queries(1):
+                names = top_names(client, url)
+            assert names == ['Классика', 'Один отзыв', 'Середнячок'], (
+                f'Проверьте, что `{url}` ранжирует произведения '
+                'по байесовскому взвешенному рейтингу и не выводит '
+                'произведения без отзывов.'
+            )
+        entry = client.get('/api/v1/genres/drama/top/').json()['results'][0]
+        assert entry['position'] == 1 and entry['review_count'] == 500
+        assert 8.9 < entry['score'] < 9, (
+            'Проверьте, что взвешенный рейтинг популярного произведения '
+            'близок к его среднему.'
+        )
+        assert top_names(client, '/api/v1/genres/empty/top/') == []
+        for url in (
+            '/api/v1/genres/none/top/', '/api/v1/categories/none/top/'
+        ):
+            assert client.get(url).status_code == HTTPStatus.NOT_FOUND
+
+    def test_02_incremental_refresh(self, client, user, settings):
+        # Изменения ниже заметно сдвигают среднюю оценку по сайту.
+        settings.LEADERBOARD_MEAN_DRIFT = 10
+        titles = create_titles()
+        other = Genre.objects.create(name='Комедия', slug='comedy')
+        other_title = Title.objects.create(name='Смешное', year=2000)
+        other_title.genre.add(other)
+        set_reviews(other_title, 10, 80)
+        assert refresh() == 3, (
+            'Проверьте, что первый расчет строит все рейтинги.'
+        )
+        assert refresh() == 0, (
+            'Проверьте, что без изменений рейтинги не пересчитываются.'
+        )
+
+        Review.objects.create(
+            title=titles['Середнячок'], author=user, text='Т', score=10
+        )
+        set_reviews(titles['Середнячок'], 1000, 10000)
+        assert refresh() == 2, (
+            'Проверьте, что пересчитываются только жанры и категории '
+            'измененных произведений.'
+        )
+        assert top_names(client, '/api/v1/genres/drama/top/')[0] == (
+            'Середнячок'
+        )
+        assert top_names(client, '/api/v1/genres/comedy/top/') == ['Смешное']
+
+        titles['Классика'].genre.clear()
+        refresh()
+        assert 'Классика' not in top_names(
+            client, '/api/v1/genres/drama/top/'
+        ), (
+            'Проверьте, что произведение, исключенное из жанра, исключается '
+            'и из рейтинга жанра.'
+        )
+        refresh('--full')
+        assert LeaderboardEntry.objects.filter(genre=other).count() == 1
+
+    def test_03_deleted_titles(self, client):
+        titles = create_titles()
+        refresh()
+        titles['Классика'].delete()
+        assert [
+            (entry['position'], entry['name']) for entry in client.get(
+                '/api/v1/categories/films/top/'
+            ).json()['results']
+        ] == [(1, 'Один отзыв'), (2, 'Середнячок')], (
+            'Проверьте, что места удаленных произведений не выводятся '
+            'и не оставляют пропусков в нумерации.'
+        )
+        assert refresh() == 2, (
+            'Проверьте, что рейтинги, из которых удалены произведения, '
+            'пересчитываются без `--full`.'
+        )
+        assert list(
+            LeaderboardEntry.objects.filter(genre__slug='drama')
+            .values_list('position', 'title__name')
+        ) == [(1, 'Один отзыв'), (2, 'Середнячок')]
+
+    def test_04_mean_drift(self, settings):
+        titles = create_titles()
+        other = Genre.objects.create(name='Комедия', slug='comedy')
+        other_title = Title.objects.create(name='Смешное', year=2000)
+        other_title.genre.add(other)
+        set_reviews(other_title, 10, 80)
+        refresh()
+        mean = LeaderboardEntry.objects.values_list('mean', flat=True)[0]
+
+        set_reviews(titles['Один отзыв'], 2, 20)
+        assert refresh() == 2
+        assert set(
+            LeaderboardEntry.objects.values_list('mean', flat=True)
+        ) == {mean}, (
+            'Проверьте, что частичный расчет использует среднюю оценку '
+            'прошлого расчета, пока она почти не сдвинулась.'
+        )
+
+        set_reviews(titles['Классика'], 500, 1000)
+        assert refresh() == 3, (
+            'Проверьте, что сдвиг средней оценки по сайту больше '
+            '`LEADERBOARD_MEAN_DRIFT` пересчитывает все рейтинги.'
+        )
+        new_mean = LeaderboardEntry.objects.values_list(
+            'mean', flat=True
+        )[0]
+        assert new_mean < mean - settings.LEADERBOARD_MEAN_DRIFT
+        assert set(
+            LeaderboardEntry.objects.values_list('mean', flat=True)
+        ) == {new_mean}
@@ -0,0 +1,144 @@
+import math
+import random
+import re
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from reviews.models import Review, SimilarTitle, Title
+from reviews.similarity import find_similar
+from tests.utils import check_plans
+
+
+def build(*args):
+    """Количество произведений с похожими из вывода команды."""
+    out = StringIO()
+    call_command('build_similar_titles', *args, stdout=out)
+    return int(re.search(r'\d+', out.getvalue()).group())
+
+
+def similar(client, title):
+    url = f'/api/v1/titles/{title.id}/similar/'
+    response = client.get(url)
+    assert response.status_code == HTTPStatus.OK, (
+        f'Проверьте, что GET-запрос к `{url}` возвращает ответ '
+        'со статусом 200.'
+    )
+    return response.json()['results']
+
+
+def create_ratings(django_user_model):
+    """
+    Зрители одинаково оценивают «Первое», «Второе» и «Четвертое»
+    и наоборот - «Третье».
+    """
+    titles = [
+        Title.objects.create(name=name, year=2000)
+        for name in ('Первое', 'Второе', 'Третье', 'Четвертое')
+    ]
+    for idx, scores in enumerate((
+        (10, 9, 2, 10),
+        (3, 2, 9, 1),
+        (8, 9, 1, 7),
+    )):
+        author = django_user_model.objects.create_user(
+            username=f'viewer{idx}', email=f'viewer{idx}@yamdb.fake'
+        )
+        for title, score in zip(titles, scores):
+            Review.objects.create(
+                title=title, author=author, text='Т', score=score
+            )
+    return titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test27SimilarTitles:
+
+    def test_01_similar_titles(self, client, django_user_model,
+                               django_assert_num_queries):
+        first, second, third, fourth = create_ratings(django_user_model)
+        assert build() == 3, (
+            'Проверьте, что команда `build_similar_titles` находит похожие '
+            'для произведений с общими зрителями.'
+        )
+        with django_assert_num_queries(1):
+            results = similar(client, first)
+        assert [item['name'] for item in results] == ['Второе', 'Четвертое'], (
+            'Проверьте, что похожие произведения упорядочены по убыванию '
+            'близости оценок.'
+        )
+        assert 0 < results[1]['score'] < results[0]['score'] <= 1
+        assert results[0]['id'] == second.id
+        assert similar(client, third) == [], (
+            'Проверьте, что произведения, которые зрители оценивают '
+            'противоположно, не считаются похожими.'
+        )
+        assert client.get('/api/v1/titles/0/similar/').status_code == (
+            HTTPStatus.NOT_FOUND
+        )
+        check_plans(client, f'/api/v1/titles/{first.id}/similar/')
+
+    def test_02_rebuild(self, client, django_user_model):
+        first = create_ratings(django_user_model)[0]
+        build('--top-k', '1')
+        assert len(similar(client, first)) == 1, (
+            'Проверьте параметр `--top-k` команды `build_similar_titles`.'
+        )
+        assert build('--min-common', '4') == 0, (
+            'Проверьте, что пары с малым числом общих зрителей '
+            'не учитываются.'
+        )
+        assert not SimilarTitle.objects.exists(), (
+            'Проверьте, что пересчет заменяет прежние похожие произведения.'
+        )
+        build()
+        first_id = first.id
+        first.delete()
+        assert not SimilarTitle.objects.filter(similar_id=first_id).exists()
+
+    def test_03_matches_pairwise_cosine(self):
+        generator = random.Random(27)
+        rows = [
+            sorted(
+                (title_id, generator.choice((-2.5, -1, 0.5, 3)))
+                for title_id in generator.sample(range(12), 5)
+            )
+            for _ in range(40)
+        ]
+        ratings = [dict(row) for row in rows]
+
+        def norm(title_id):
+            return sum(
+                row[title_id] ** 2 for row in ratings if title_id in row
+            )
+
+        expected = {}
+        for title_a in range(12):
+            candidates = []
+            for title_b in range(12):
+                common = [
+                    row[title_a] * row[title_b] for row in ratings
+                    if title_a in row and title_b in row
+                ]
+                if title_b == title_a or len(common) < 3 or sum(common) <= 0:
+                    continue
+                candidates.append((
+                    sum(common) / math.sqrt(norm(title_a) * norm(title_b)),
+                    title_b
+                ))
+            if candidates:
+                expected[title_a] = sorted(candidates, reverse=True)[:4]
+        found = find_similar(rows, 4, 3)
+        assert found.keys() == expected.keys()
+        for title_id, candidates in expected.items():
+            assert [similar for _, similar in found[title_id]] == [
+                similar for _, similar in candidates
+            ], (
+                'Проверьте, что `find_similar` находит для произведения '
+                'соседей с наибольшей косинусной близостью.'
+            )
+            assert [score for score, _ in found[title_id]] == pytest.approx(
+                [score for score, _ in candidates]
+            )
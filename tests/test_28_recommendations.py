@@ -0,0 +1,130 @@
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from api.recommendations import USER_NAMESPACE
+from reviews.models import CacheInvalidation, Review, SimilarTitle, Title
+
+RECOMMENDATIONS_URL = '/api/v1/users/me/recommendations/'
+
+
+def recommended(client):
+    response = client.get(RECOMMENDATIONS_URL)
+    assert response.status_code == HTTPStatus.OK, (
+        f'Проверьте, что GET-запрос пользователя к `{RECOMMENDATIONS_URL}` '
+        'возвращает ответ со статусом 200.'
+    )
+    return [item['name'] for item in response.json()['results']]
+
+
+def create_similar(pairs):
+    titles = {}
+    for name in ('Любимое', 'Скучное', 'Похожее', 'Очень похожее', 'Другое'):
+        titles[name] = Title.objects.create(name=name, year=2000)
+    positions = {}
+    for title, similar, score in pairs:
+        positions[title] = positions.get(title, 0) + 1
+        SimilarTitle.objects.create(
+            title=titles[title], similar=titles[similar],
+            position=positions[title], score=score
+        )
+    return titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test28Recommendations:
+
+    def test_01_blend_similar_titles(self, client, user, user_client,
+                                     django_assert_num_queries,
+                                     revocation_list):
+        titles = create_similar((
+            ('Любимое', 'Очень похожее', 0.9),
+            ('Любимое', 'Скучное', 0.8),
+            ('Любимое', 'Похожее', 0.5),
+            ('Скучное', 'Другое', 0.9),
+            ('Очень похожее', 'Другое', 0.3),
+        ))
+        assert recommended(user_client) == [], (
+            'Проверьте, что пользователю без отзывов ничего '
+            'не рекомендуется.'
+        )
+        for name, score in (('Любимое', 9), ('Скучное', 3)):
+            Review.objects.create(
+                title=titles[name], author=user, text='Т', score=score
+            )
+        response = user_client.get(RECOMMENDATIONS_URL)
+        assert [item['name'] for item in response.json()['results']] == [
+            'Очень похожее', 'Похожее'
+        ], (
+            'Проверьте, что рекомендуются произведения, похожие на высоко '
+            'оцененные пользователем, без тех, на которые он уже написал '
+            'отзыв.'
+        )
+        assert response.json()['results'][0]['score'] == pytest.approx(8.1)
+        with django_assert_num_queries(0):
+            recommended(user_client)
+
+        user_client.post(
+            f'/api/v1/titles/{titles["Очень похожее"].id}/reviews/',
+            data={'text': 'Отзыв', 'score': 10}
+        )
+        assert recommended(user_client) == ['Похожее', 'Другое'], (
+            'Проверьте, что новый отзыв пользователя обновляет его '
+            'рекомендации.'
+        )
+        assert client.get(RECOMMENDATIONS_URL).status_code == (
+            HTTPStatus.UNAUTHORIZED
+        )
+
+    def test_02_other_users_reviews(self, user, admin, user_client,
+                                    admin_client, revocation_list):
+        titles = create_similar((('Любимое', 'Похожее', 0.5),))
+        for author in (user, admin):
+            Review.objects.create(
+                title=titles['Любимое'], author=author, text='Т', score=10
+            )
+        assert recommended(user_client) == ['Похожее']
+        admin_client.post(
+            f'/api/v1/titles/{titles["Похожее"].id}/reviews/',
+            data={'text': 'Отзыв', 'score': 10}
+        )
+        assert recommended(admin_client) == []
+        assert recommended(user_client) == ['Похожее'], (
+            'Проверьте, что рекомендации кешируются отдельно для каждого '
+            'пользователя.'
+        )
+
+    def test_03_shared_invalidation(self, user, user_client, settings,
+                                    revocation_list):
+        titles = create_similar((('Любимое', 'Похожее', 0.5),))
+        Review.objects.create(
+            title=titles['Любимое'], author=user, text='Т', score=10
+        )
+        assert recommended(user_client) == ['Похожее']
+        # Другой процесс сохраняет отзыв и сбрасывает подборку.
+        Review.objects.bulk_create([Review(
+            title=titles['Похожее'], author=user, text='Т', score=10
+        )])
+        CacheInvalidation.objects.create(
+            namespace=USER_NAMESPACE.format(user.id)
+        )
+        settings.CACHE_INVALIDATION_CHECK_INTERVAL = 0
+        assert recommended(user_client) == [], (
+            'Проверьте, что отзыв, сохраненный в другом процессе, '
+            'сбрасывает подборку пользователя.'
+        )
+
+    def test_04_rebuild_invalidates(self, user, user_client,
+                                    revocation_list):
+        titles = create_similar((('Любимое', 'Похожее', 0.5),))
+        Review.objects.create(
+            title=titles['Любимое'], author=user, text='Т', score=10
+        )
+        assert recommended(user_client) == ['Похожее']
+        call_command('build_similar_titles', stdout=StringIO())
+        assert recommended(user_client) == [], (
+            'Проверьте, что пересчет похожих произведений сбрасывает '
+            'подборки рекомендаций.'
+        )
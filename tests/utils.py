@@ -1,5 +1,11 @@
+import re
 from http import HTTPStatus
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Category, Genre, Title
+
 
 check_name_and_slug_patterns = (
     (
@@ -305,3 +311,54 @@ def check_fields(obj_type, url_pattern, obj, expected_data, detail=False):
         f'данные {obj_types[obj_type]}{results_in_msg}. Поле `id` не '
         'найдено или не является целым числом.'
     )
+
+
+def create_catalog(titles_count):
+    category = Category.objects.create(name='Фильм', slug='films')
+    genres = [
+        Genre.objects.create(name='Ужасы', slug='horror'),
+        Genre.objects.create(name='Комедия', slug='comedy'),
+    ]
+    titles = []
+    for idx in range(titles_count):
+        title = Title.objects.create(
+            name=f'Произведение {idx}', year=2000, category=category
+        )
+        title.genre.set(genres)
+        titles.append(title)
+    return titles
+
+
+FULL_SCAN = re.compile(r'^SCAN \w+$')
+
+
+def query_plans(client, url):
+    with CaptureQueriesContext(connection) as context:
+        client.get(url)
+    plans = []
+    with connection.cursor() as cursor:
+        for query in context.captured_queries:
+            if not query['sql'].startswith('SELECT'):
+                continue
+            cursor.execute(f'EXPLAIN QUERY PLAN {query["sql"]}')
+            plans.append(
+                (query['sql'], [str(row[-1]) for row in cursor.fetchall()])
+            )
+    return plans
+
+
+def check_plans(client, url, allow_sort=False):
+    for sql, plan in query_plans(client, url):
+        assert not (' WHERE ' in sql and any(
+            FULL_SCAN.match(step) for step in plan
+        )), (
+            f'Проверьте, что запрос списка `{url}` выполняется по индексу, '
+            f'а не полным просмотром таблицы: {sql}\n{plan}'
+        )
+        # Жанры подгружаются только для произведений на странице.
+        if allow_sort or '_prefetch_related_val' in sql:
+            continue
+        assert not any('TEMP B-TREE' in step for step in plan), (
+            f'Проверьте, что запрос списка `{url}` читает записи из индекса '
+            f'в нужном порядке, без сортировки: {sql}\n{plan}'
+        )